@@ -1,5 +1,8 @@
+import numpy as np
+
 from Ammeters.base_ammeter import AmmeterEmulatorBase
-from src.utils.Utils import generate_random_float
+
+NUM_SAMPLES = 10
 
 
 class CircutorAmmeter(AmmeterEmulatorBase):
@@ -9,11 +12,22 @@ class CircutorAmmeter(AmmeterEmulatorBase):
         return b'MEASURE_CIRCUTOR -get_measurement -current'
 
     def measure_current(self) -> float:
-        num_samples = 10
-        time_step = generate_random_float(0.001, 0.01)  # Time step (0.001s - 0.01s)
-        voltages = [generate_random_float(0.1, 1.0) for _ in range(num_samples)]  # Voltage values
+        time_step = self.rng.uniform(0.001, 0.01)  # Time step (0.001s - 0.01s)
+        voltages = self.rng.uniform(0.1, 1.0, NUM_SAMPLES)  # Voltage values
 
-        print(f"CIRCUTOR Ammeter - Voltages: {voltages}, Time Step: {time_step}s")
-        current = sum(v * time_step for v in voltages)
-        print(f"Current: {current}A")
+        current = float(voltages.sum() * time_step)
+        log = self._trace()
+        if log:
+            log.debug("CIRCUTOR Ammeter - Voltages: %s, Time Step: %ss, Current: %sA", voltages, time_step, current)
         return current
+
+    def measure_current_batch(self, count: int) -> np.ndarray:
+        time_steps = self.rng.uniform(0.001, 0.01, count)
+        # One row of NUM_SAMPLES voltages per measurement
+        voltages = self.rng.uniform(0.1, 1.0, (count, NUM_SAMPLES))
+        currents = voltages.sum(axis=1) * time_steps
+        log = self._trace(count)
+        if log:
+            log.debug("CIRCUTOR Ammeter - batch of %d, first Voltages: %s, Time Step: %ss, Current: %sA",
+                      count, voltages[0], time_steps[0], currents[0])
+        return currents
@@ -1,5 +1,6 @@
+import numpy as np
+
 from Ammeters.base_ammeter import AmmeterEmulatorBase
-from src.utils.Utils import generate_random_float
 
 
 class EntesAmmeter(AmmeterEmulatorBase):
@@ -9,8 +10,21 @@ class EntesAmmeter(AmmeterEmulatorBase):
         return b'MEASURE_ENTES -get_data'
 
     def measure_current(self) -> float:
-        magnetic_field = generate_random_float(0.01, 0.1)  # Magnetic field strength (0.01T - 0.1T)
-        calibration_factor = generate_random_float(500, 2000)  # Calibration factor (500 - 2000)
+        magnetic_field = self.rng.uniform(0.01, 0.1)  # Magnetic field strength (0.01T - 0.1T)
+        calibration_factor = self.rng.uniform(500, 2000)  # Calibration factor (500 - 2000)
         current = magnetic_field * calibration_factor
-        print(f"ENTES Ammeter - Magnetic Field: {magnetic_field}T, Calibration Factor: {calibration_factor}, Current: {current}A")
+        log = self._trace()
+        if log:
+            log.debug("ENTES Ammeter - Magnetic Field: %sT, Calibration Factor: %s, Current: %sA",
+                      magnetic_field, calibration_factor, current)
         return current
+
+    def measure_current_batch(self, count: int) -> np.ndarray:
+        magnetic_fields = self.rng.uniform(0.01, 0.1, count)
+        calibration_factors = self.rng.uniform(500, 2000, count)
+        currents = magnetic_fields * calibration_factors
+        log = self._trace(count)
+        if log:
+            log.debug("ENTES Ammeter - batch of %d, first Magnetic Field: %sT, Calibration Factor: %s, Current: %sA",
+                      count, magnetic_fields[0], calibration_factors[0], currents[0])
+        return currents
@@ -1,5 +1,6 @@
+import numpy as np
+
 from Ammeters.base_ammeter import AmmeterEmulatorBase
-from src.utils.Utils import generate_random_float
 
 
 class GreenleeAmmeter(AmmeterEmulatorBase):
@@ -9,8 +10,20 @@ class GreenleeAmmeter(AmmeterEmulatorBase):
         return b'MEASURE_GREENLEE -get_measurement'
 
     def measure_current(self) -> float:
-        voltage = generate_random_float(1.0, 10.0)  # Random voltage (1V - 10V)
-        resistance = generate_random_float(0.1, 100.0)  # Random resistance (0.1Ω - 100Ω)
+        voltage = self.rng.uniform(1.0, 10.0)  # Random voltage (1V - 10V)
+        resistance = self.rng.uniform(0.1, 100.0)  # Random resistance (0.1Ω - 100Ω)
         current = voltage / resistance
-        print(f"Greenlee Ammeter - Voltage: {voltage}V, Resistance: {resistance}Ω, Current: {current}A")
+        log = self._trace()
+        if log:
+            log.debug("Greenlee Ammeter - Voltage: %sV, Resistance: %sΩ, Current: %sA", voltage, resistance, current)
         return current
+
+    def measure_current_batch(self, count: int) -> np.ndarray:
+        voltages = self.rng.uniform(1.0, 10.0, count)
+        resistances = self.rng.uniform(0.1, 100.0, count)
+        currents = voltages / resistances
+        log = self._trace(count)
+        if log:
+            log.debug("Greenlee Ammeter - batch of %d, first Voltage: %sV, Resistance: %sΩ, Current: %sA",
+                      count, voltages[0], resistances[0], currents[0])
+        return currents
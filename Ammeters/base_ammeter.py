@@ -1,33 +1,331 @@
+import logging
+import selectors
 import socket
-import time
-import random
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from Ammeters.protocol import (
+    FRAME_DELIMITER,
+    MAX_FRAME_SIZE,
+    encode_batch_values,
+    encode_error,
+    parse_batch_request,
+    split_frames,
+)
 
 NotImplementedErrorMsg = "Subclasses must implement this property."
 
+logger = logging.getLogger(__name__)
+
+# Defaults for the concurrent server, overridable from config.yaml (emulators.server).
+DEFAULT_BACKLOG = 128
+DEFAULT_MAX_CONNECTIONS = 256
+RECV_CHUNK = 4096
+# With DEBUG logging enabled, log the internals of every Nth measurement.
+DEFAULT_TRACE_EVERY = 1
+
+# Selector key data marking the stop() wake-up socket.
+_WAKEUP = object()
+
+
+def server_options(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Translate the `emulators.server` section of config.yaml into keyword
+    arguments for AmmeterEmulatorBase.
+    """
+    server_cfg = ((config or {}).get("emulators") or {}).get("server") or {}
+    mode = server_cfg.get("mode") or "concurrent"
+    if mode not in ("concurrent", "serial"):
+        raise ValueError(f"Unknown emulators.server.mode={mode!r}. Expected 'concurrent' or 'serial'")
+
+    emulators_cfg = (config or {}).get("emulators") or {}
+    logging_cfg = emulators_cfg.get("logging") or {}
+    seed = emulators_cfg.get("seed")
+    return {
+        "concurrent": mode == "concurrent",
+        "backlog": _positive_int(server_cfg, "backlog", DEFAULT_BACKLOG, "emulators.server."),
+        "max_connections": _positive_int(server_cfg, "max_connections", DEFAULT_MAX_CONNECTIONS, "emulators.server."),
+        "trace_every": _positive_int(logging_cfg, "trace_every", DEFAULT_TRACE_EVERY, "emulators.logging."),
+        "seed": None if seed is None else int(seed),
+    }
+
+
+def _positive_int(section: Dict[str, Any], key: str, default: int, prefix: str) -> int:
+    # Only a missing (None) value falls back to the default; an explicit 0 is an error.
+    value = section.get(key)
+    if value is None:
+        return default
+    value = int(value)
+    if value <= 0:
+        raise ValueError(f"{prefix}{key} must be > 0, got {value}")
+    return value
+
+
+class _Connection:
+    """Per-client state kept by the concurrent server between selector events."""
+
+    __slots__ = ("sock", "inbuf", "outbuf", "framed", "close_after_flush")
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.inbuf = b""
+        self.outbuf = bytearray()
+        self.framed = False
+        self.close_after_flush = False
+
+
 class AmmeterEmulatorBase(ABC):
-    def __init__(self, port: int):
+    def __init__(
+        self,
+        port: int,
+        *,
+        concurrent: bool = True,
+        backlog: int = DEFAULT_BACKLOG,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        trace_every: int = DEFAULT_TRACE_EVERY,
+        seed: Optional[int] = None,
+        reuse_port: bool = False,
+    ):
+        if backlog <= 0:
+            raise ValueError("backlog must be > 0")
+        if max_connections <= 0:
+            raise ValueError("max_connections must be > 0")
+        if trace_every <= 0:
+            raise ValueError("trace_every must be > 0")
+        if reuse_port and not hasattr(socket, "SO_REUSEPORT"):
+            raise ValueError("reuse_port is not supported on this platform")
+
         self.port = port
-        random.seed(time.time())  # Seed the random number generator for each instance
+        self.concurrent = concurrent
+        self.backlog = backlog
+        self.max_connections = max_connections
+        self.trace_every = trace_every
+        self._measurements = 0
+        # Measurement traces go to the concrete emulator's module logger, e.g. Ammeters.Greenlee_Ammeter.
+        self._log = logging.getLogger(type(self).__module__)
+        # Each instance draws from its own generator: the same seed replays the same
+        # measurements for the same sequence of requests; None seeds from OS entropy.
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        # SO_REUSEPORT lets several emulator processes listen on one port (see Ammeters.farm).
+        self.reuse_port = reuse_port
+        self._stopping = False
+        self._wakeup: Optional[socket.socket] = None
 
-    def start_server(self):
+    def bind(self) -> socket.socket:
         """
-        Starts the server to listen for client requests.
-        The server will run indefinitely, handling one client request at a time.
+        Create the listening socket. Clients can connect as soon as this
+        returns (the kernel queues them until the server loop accepts). With
+        port 0 the OS picks a free port, which is stored back in self.port.
+        Raises OSError if the port cannot be bound.
         """
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if self.reuse_port:
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
             s.bind(('localhost', self.port))
-            s.listen()
-            print(f"{self.__class__.__name__} is running on port {self.port}")
-            while True:
-                conn, addr = s.accept()
-                with conn:
-                    print(f"Connected by {addr}")
-                    data = conn.recv(1024)
-                    if data == self.get_current_command:
-                        # Call the specific measure_current() method defined in subclasses
-                        current = self.measure_current()
-                        conn.sendall(str(current).encode('utf-8'))
+            s.listen(self.backlog)
+        except OSError:
+            s.close()
+            raise
+        self.port = s.getsockname()[1]
+        self._stopping = False
+        return s
+
+    def start_server(self, listener: Optional[socket.socket] = None):
+        """
+        Starts the server to listen for client requests, on `listener` (from
+        bind()) if given. The server runs until stop() is called. In concurrent
+        mode (the default) a single selector loop multiplexes up to
+        `max_connections` clients; in serial mode one client connection is
+        handled at a time.
+        Both one-shot and framed requests are understood (see Ammeters.protocol).
+        """
+        s = listener if listener is not None else self.bind()
+        wakeup, self._wakeup = socket.socketpair()
+        try:
+            with s, wakeup:
+                logger.info("%s is running on port %s", self.__class__.__name__, self.port)
+                if self.concurrent:
+                    self._serve_concurrent(s, wakeup)
+                else:
+                    self._serve_serial(s, wakeup)
+        finally:
+            self._wakeup.close()
+            self._wakeup = None
+
+    def stop(self) -> None:
+        """
+        Make the server loop return (callable from any thread). In serial mode a
+        framed client being served is finished first.
+        """
+        self._stopping = True
+        wakeup = self._wakeup
+        if wakeup is not None:
+            try:
+                wakeup.send(b"\0")
+            except OSError:
+                pass
+
+    def _serve_serial(self, s: socket.socket, wakeup: socket.socket) -> None:
+        sel = selectors.DefaultSelector()
+        sel.register(s, selectors.EVENT_READ)
+        sel.register(wakeup, selectors.EVENT_READ)
+        with sel:
+            while not self._stopping:
+                if any(key.fileobj is s for key, _ in sel.select()):
+                    self._serve_one_serial(s)
+
+    def _serve_one_serial(self, s: socket.socket) -> None:
+        conn, addr = s.accept()
+        with conn:
+            logger.debug("Connected by %s", addr)
+            data = conn.recv(1024)
+            if FRAME_DELIMITER not in data:
+                reply = self._one_shot_reply(data)
+                if reply is not None:
+                    conn.sendall(reply)
+                return
+
+            # Framed client: keep answering until it hangs up.
+            while data:
+                frames, rest = split_frames(data)
+                conn.sendall(b"".join(self._handle_frame(f) for f in frames))
+                if len(rest) > MAX_FRAME_SIZE:
+                    break
+                data = conn.recv(RECV_CHUNK)
+                data = rest + data if data else b""
+
+    def _serve_concurrent(self, s: socket.socket, wakeup: socket.socket) -> None:
+        s.setblocking(False)
+        sel = selectors.DefaultSelector()
+        sel.register(s, selectors.EVENT_READ, data=None)
+        sel.register(wakeup, selectors.EVENT_READ, data=_WAKEUP)
+        open_connections = 0
+        accepting = True
+
+        try:
+            while not self._stopping:
+                for key, events in sel.select():
+                    if key.data is _WAKEUP:
+                        continue
+                    if key.data is None:
+                        open_connections += self._accept(sel, s)
+                    else:
+                        if not self._service(sel, key.data, events):
+                            open_connections -= 1
+
+                # Stop pulling from the kernel backlog while at the limit; pending
+                # clients stay queued there until a slot frees up.
+                if accepting and open_connections >= self.max_connections:
+                    sel.unregister(s)
+                    accepting = False
+                elif not accepting and open_connections < self.max_connections:
+                    sel.register(s, selectors.EVENT_READ, data=None)
+                    accepting = True
+        finally:
+            for key in list(sel.get_map().values()):
+                if isinstance(key.data, _Connection):
+                    key.data.sock.close()
+            sel.close()
+
+    def _accept(self, sel: selectors.BaseSelector, s: socket.socket) -> int:
+        try:
+            conn, addr = s.accept()
+        except BlockingIOError:
+            return 0
+        logger.debug("Connected by %s", addr)
+        conn.setblocking(False)
+        sel.register(conn, selectors.EVENT_READ, data=_Connection(conn))
+        return 1
+
+    def _service(self, sel: selectors.BaseSelector, state: _Connection, events: int) -> bool:
+        """Handle one selector event for a client. Returns False once the connection is closed."""
+        try:
+            if events & selectors.EVENT_READ and not state.close_after_flush:
+                data = state.sock.recv(RECV_CHUNK)
+                if not data:
+                    return self._close(sel, state)
+                if not state.framed and FRAME_DELIMITER not in data:
+                    # One-shot request: answer it (if recognised) and hang up.
+                    reply = self._one_shot_reply(data)
+                    if reply is not None:
+                        state.outbuf += reply
+                    state.close_after_flush = True
+                else:
+                    state.framed = True
+                    frames, state.inbuf = split_frames(state.inbuf + data)
+                    for frame in frames:
+                        state.outbuf += self._handle_frame(frame)
+                    if len(state.inbuf) > MAX_FRAME_SIZE:
+                        state.outbuf += encode_error("frame too large")
+                        state.close_after_flush = True
+
+            if state.outbuf:
+                sent = state.sock.send(state.outbuf)
+                del state.outbuf[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            return self._close(sel, state)
+
+        if state.close_after_flush and not state.outbuf:
+            return self._close(sel, state)
+
+        wanted = selectors.EVENT_WRITE if state.outbuf else selectors.EVENT_READ
+        if sel.get_key(state.sock).events != wanted:
+            sel.modify(state.sock, wanted, data=state)
+        return True
+
+    def _reply(self, request: bytes) -> bytes:
+        """
+        Build the (undelimited) reply for a single or batch measurement request.
+        Raises ValueError for requests this emulator does not understand.
+        """
+        if request == self.get_current_command:
+            # Call the specific measure_current() method defined in subclasses
+            return str(self.measure_current()).encode('utf-8')
+        count = parse_batch_request(request, self.get_current_command)
+        if count is None:
+            raise ValueError(f"unknown command {request.decode('utf-8', errors='replace')!r}")
+        return encode_batch_values(self.measure_current_batch(count))
+
+    def _one_shot_reply(self, request: bytes) -> Optional[bytes]:
+        # Unknown one-shot requests are dropped silently, as the original server did.
+        try:
+            return self._reply(request)
+        except ValueError:
+            return None
+
+    def _handle_frame(self, frame: bytes) -> bytes:
+        """Build the framed reply for one framed request."""
+        try:
+            return self._reply(frame) + FRAME_DELIMITER
+        except ValueError as e:
+            return encode_error(str(e))
+
+    @staticmethod
+    def _close(sel: selectors.BaseSelector, state: _Connection) -> bool:
+        sel.unregister(state.sock)
+        state.sock.close()
+        return False
+
+    def _trace(self, count: int = 1) -> Optional[logging.Logger]:
+        """
+        Logger to trace the internals of the next `count` measurements with, or
+        None. Tracing is off unless the emulator's logger is at DEBUG, and then
+        only every `trace_every`-th measurement is traced (a batch is traced
+        once if it spans such a measurement), so the hot path normally costs
+        one counter increment and a cached level check.
+        """
+        before = self._measurements
+        self._measurements += count
+        if before // self.trace_every == self._measurements // self.trace_every:
+            return None
+        return self._log if self._log.isEnabledFor(logging.DEBUG) else None
 
     @property
     @abstractmethod
@@ -46,3 +344,9 @@ class AmmeterEmulatorBase(ABC):
         """
         raise NotImplementedError(NotImplementedErrorMsg)
 
+    def measure_current_batch(self, count: int) -> np.ndarray:
+        """
+        Take `count` measurements for a batch request as a float64 array.
+        Subclasses override this with a vectorized draw from self.rng.
+        """
+        return np.fromiter((self.measure_current() for _ in range(count)), dtype=np.float64, count=count)
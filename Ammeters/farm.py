@@ -0,0 +1,238 @@
+"""
+Multi-process emulator farm.
+
+Runs several worker processes per ammeter type, all serving the same port, so
+emulator capacity scales with cores instead of sharing one GIL. The kernel
+balances incoming connections across the workers, either
+
+- "reuseport": every worker binds its own SO_REUSEPORT socket (Linux/BSD;
+  the kernel hashes connections across the listeners), or
+- "shared": the farm binds one listening socket and every worker accepts
+  from it (works wherever sockets can be passed to child processes).
+
+From the project root:
+
+    python -m Ammeters.farm --workers 4
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from typing import Any, Dict, List, Optional, Type
+
+import numpy as np
+
+from Ammeters.base_ammeter import AmmeterEmulatorBase, server_options
+from Ammeters.registry import driver_class
+
+logger = logging.getLogger(__name__)
+
+SHARDING_MODES = ("reuseport", "shared")
+
+
+def default_sharding() -> str:
+    return "reuseport" if hasattr(socket, "SO_REUSEPORT") else "shared"
+
+
+def serve_worker(
+    emulator_cls: Type[AmmeterEmulatorBase],
+    port: int,
+    options: Dict[str, Any],
+    ready,
+    listener: Optional[socket.socket] = None,
+    *,
+    reuse_port: bool = False,
+) -> None:
+    """
+    Process entry point for one emulator: bind `port` (unless given the
+    `listener` to serve), report the bound port or the bind error through the
+    `ready` pipe, then serve until SIGTERM.
+    """
+    # Ctrl-C reaches every process in the foreground group; the parent stops the workers with SIGTERM.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    emulator = emulator_cls(port, reuse_port=reuse_port, **options)
+    if listener is None:
+        try:
+            listener = emulator.bind()
+        except OSError as e:
+            ready.send(e)
+            return
+    # terminate() becomes a clean shutdown of the server loop.
+    signal.signal(signal.SIGTERM, lambda signum, frame: emulator.stop())
+    ready.send(emulator.port)
+    ready.close()
+    emulator.start_server(listener)
+
+
+class EmulatorFarm:
+    """
+    Starts `workers` processes per emulator and stops them all on stop() /
+    context exit. start() returns once every worker of that emulator is
+    listening; port 0 picks a free port shared by all of them.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        sharding: Optional[str] = None,
+        ready_timeout: float = 10.0,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.sharding = sharding or default_sharding()
+        if self.workers <= 0:
+            raise ValueError("workers must be > 0")
+        if self.sharding not in SHARDING_MODES:
+            raise ValueError(f"Unknown sharding {self.sharding!r}. Expected one of {', '.join(SHARDING_MODES)}")
+        if self.sharding == "reuseport" and not hasattr(socket, "SO_REUSEPORT"):
+            raise ValueError("SO_REUSEPORT is not supported on this platform; use sharding='shared'")
+        self.ready_timeout = ready_timeout
+        self.ports: Dict[str, int] = {}
+        self.processes: Dict[str, List[multiprocessing.Process]] = {}
+
+    def start(
+        self,
+        name: str,
+        emulator_cls: Type[AmmeterEmulatorBase],
+        port: int,
+        **options: Any,
+    ) -> int:
+        """Start the workers for one emulator; returns the port they all listen on."""
+        if name in self.processes:
+            raise ValueError(f"An emulator named {name!r} is already running")
+
+        # Hold the port while the workers come up: with "reuseport" a bound (not
+        # listening) socket only reserves it; with "shared" it is the socket they serve.
+        anchor = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        procs: List[multiprocessing.Process] = []
+        self.processes[name] = procs
+        try:
+            anchor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if self.sharding == "reuseport":
+                anchor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            anchor.bind(("localhost", port))
+            port = anchor.getsockname()[1]
+            listener = None
+            if self.sharding == "shared":
+                anchor.listen(options.get("backlog") or 128)
+                listener = anchor
+
+            for index in range(self.workers):
+                ready, child_end = multiprocessing.Pipe(duplex=False)
+                proc = multiprocessing.Process(
+                    target=serve_worker,
+                    args=(emulator_cls, port, _worker_options(options, index), child_end, listener),
+                    kwargs={"reuse_port": listener is None},
+                    name=f"emulator-{name}-{index}",
+                    daemon=True,
+                )
+                proc.start()
+                child_end.close()
+                procs.append(proc)
+                if not ready.poll(self.ready_timeout):
+                    raise TimeoutError(f"Worker {index} of {name} did not start within {self.ready_timeout}s")
+                try:
+                    reply = ready.recv()
+                except EOFError:
+                    raise RuntimeError(f"Worker {index} of {name} exited during start-up") from None
+                finally:
+                    ready.close()
+                if isinstance(reply, BaseException):
+                    raise reply
+        except BaseException:
+            self._stop_workers(name)
+            raise
+        finally:
+            anchor.close()
+
+        self.ports[name] = port
+        logger.info("%s: %d workers on port %s (%s)", name, self.workers, port, self.sharding)
+        return port
+
+    def stop(self, timeout: float = 5.0) -> None:
+        for name in list(self.processes):
+            self._stop_workers(name, timeout)
+
+    def _stop_workers(self, name: str, timeout: float = 5.0) -> None:
+        procs = self.processes.pop(name, [])
+        self.ports.pop(name, None)
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+        deadline = time.monotonic() + timeout
+        for proc in procs:
+            proc.join(max(0.0, deadline - time.monotonic()))
+            if proc.is_alive():
+                logger.warning("Worker %s did not stop within %ss; killing it", proc.name, timeout)
+                proc.kill()
+                proc.join()
+
+    def __enter__(self) -> "EmulatorFarm":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def start_farm(
+    config: Dict[str, Any],
+    workers: Optional[int] = None,
+    sharding: Optional[str] = None,
+    ports: Optional[Dict[str, int]] = None,
+) -> EmulatorFarm:
+    """
+    Start a farm for every ammeter in `ports` (default: every ammeter in
+    config.yaml, on its configured port) with the emulators.* server options.
+    `workers` and `sharding` default to emulators.farm in the config.
+    """
+    options = server_options(config)
+    farm_cfg = ((config or {}).get("emulators") or {}).get("farm") or {}
+    if ports is None:
+        ports = {name: int(cfg["port"]) for name, cfg in config["ammeters"].items()}
+
+    farm = EmulatorFarm(workers or farm_cfg.get("workers"), sharding or farm_cfg.get("sharding"))
+    try:
+        for name, port in ports.items():
+            farm.start(name, driver_class(name, config), port, **options)
+    except BaseException:
+        farm.stop()
+        raise
+    return farm
+
+
+def _worker_options(options: Dict[str, Any], index: int) -> Dict[str, Any]:
+    # Workers of a seeded farm get distinct, reproducible streams derived from the seed.
+    seed = options.get("seed")
+    if seed is None:
+        return options
+    return {**options, "seed": int(np.random.SeedSequence([seed, index]).generate_state(1)[0])}
+
+
+def main() -> None:
+    from src.utils.config import load_config
+    from src.utils.logger import configure_emulator_logging
+
+    parser = argparse.ArgumentParser(description="Run every configured emulator as a multi-process farm.")
+    parser.add_argument("--config", default="config/config.yaml")
+    parser.add_argument("--workers", type=int, help="processes per ammeter type (default: CPU count)")
+    parser.add_argument("--sharding", choices=SHARDING_MODES, help=f"default: {default_sharding()}")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    listener = configure_emulator_logging(config)
+
+    with start_farm(config, args.workers, args.sharding) as farm:
+        for name, port in farm.ports.items():
+            print(f"{name}: {farm.workers} workers on port {port}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    listener.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Managed emulator start-up and shutdown.
+
+EmulatorLauncher binds each emulator's listening socket in the calling thread
+before handing it to a background server thread, so when start() returns the
+emulator is already accepting connections, a port that cannot be bound raises
+right away, and port 0 gets a free port from the OS:
+
+    with start_emulators(config, ports={"greenlee": 0}) as launcher:
+        port = launcher.ports["greenlee"]
+        ...
+"""
+import copy
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from Ammeters.base_ammeter import AmmeterEmulatorBase, server_options
+from Ammeters.registry import driver_class
+
+logger = logging.getLogger(__name__)
+
+
+class EmulatorLauncher:
+    """Runs emulators on daemon threads and stops them all on stop() / context exit."""
+
+    def __init__(self):
+        self._running: Dict[str, Tuple[AmmeterEmulatorBase, threading.Thread]] = {}
+        # Exceptions that ended a server loop, by emulator name.
+        self.errors: Dict[str, BaseException] = {}
+
+    @property
+    def ports(self) -> Dict[str, int]:
+        """Actual listening port of every started emulator."""
+        return {name: emulator.port for name, (emulator, _) in self._running.items()}
+
+    def start(self, name: str, emulator: AmmeterEmulatorBase) -> int:
+        """Start `emulator` under `name`; returns its port once it is listening."""
+        if name in self._running:
+            raise ValueError(f"An emulator named {name!r} is already running")
+        listener = emulator.bind()
+        thread = threading.Thread(
+            target=self._serve, args=(name, emulator, listener), name=f"emulator-{name}", daemon=True,
+        )
+        self._running[name] = (emulator, thread)
+        thread.start()
+        return emulator.port
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop every emulator and wait up to `timeout` seconds for each server thread."""
+        running, self._running = self._running, {}
+        for emulator, _ in running.values():
+            emulator.stop()
+        for name, (_, thread) in running.items():
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning("Emulator %s did not stop within %ss", name, timeout)
+
+    def _serve(self, name: str, emulator: AmmeterEmulatorBase, listener) -> None:
+        try:
+            emulator.start_server(listener)
+        except BaseException as e:
+            self.errors[name] = e
+            logger.exception("Emulator %s on port %s stopped with an error", name, emulator.port)
+
+    def __enter__(self) -> "EmulatorLauncher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def start_emulators(
+    config: Dict[str, Any],
+    ports: Optional[Dict[str, int]] = None,
+) -> EmulatorLauncher:
+    """
+    Start an emulator for every ammeter in `ports` (default: every ammeter in
+    config.yaml, on its configured port), with the emulators.* server options.
+    Emulator classes come from Ammeters.registry, so only the ammeters in
+    `ports` are imported. If one fails to bind, the ones already started are
+    stopped and the error is raised.
+    """
+    options = server_options(config)
+    if ports is None:
+        ports = {name: int(cfg["port"]) for name, cfg in config["ammeters"].items()}
+
+    launcher = EmulatorLauncher()
+    try:
+        for name, port in ports.items():
+            launcher.start(name, driver_class(name, config)(port, **options))
+    except BaseException:
+        launcher.stop()
+        raise
+    return launcher
+
+
+def config_with_ports(config: Dict[str, Any], ports: Dict[str, int]) -> Dict[str, Any]:
+    """Copy of `config` whose ammeters point at the given (e.g. launcher-assigned) ports."""
+    config = copy.deepcopy(config)
+    for name, port in ports.items():
+        config["ammeters"][name]["port"] = port
+    return config
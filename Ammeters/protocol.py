@@ -0,0 +1,85 @@
+"""
+Wire protocol shared by the emulators and the client.
+
+Two request styles are accepted on the same port:
+
+- one-shot (original): the client sends the bare command, the emulator replies
+  with the value as text and closes the connection.
+- framed: every request and reply is terminated by FRAME_DELIMITER, and the
+  connection stays open so it can carry any number of requests. A connection
+  switches to framed mode as soon as its first chunk contains a delimiter.
+
+Either style can ask for a batch by appending `-n <count>` to the command
+(e.g. `MEASURE_GREENLEE -get_measurement -n 1000`); the reply is then the
+comma-separated list of `count` values.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+FRAME_DELIMITER = b"\n"
+ERROR_PREFIX = b"ERR "
+BATCH_FLAG = b" -n "
+MAX_FRAME_SIZE = 64 * 1024
+MAX_BATCH_SIZE = 10_000
+# Worst case for a full batch of repr()'d floats plus separators.
+MAX_REPLY_SIZE = MAX_BATCH_SIZE * 32
+
+
+class ProtocolError(RuntimeError):
+    """Raised when an emulator answers a framed request with an error reply."""
+
+
+def encode_request(command: bytes) -> bytes:
+    return command + FRAME_DELIMITER
+
+
+def encode_batch_request(command: bytes, count: int) -> bytes:
+    """Raises ValueError for a count the emulators would reject."""
+    return command + BATCH_FLAG + str(check_batch_size(count)).encode("ascii")
+
+
+def parse_batch_request(request: bytes, command: bytes) -> Optional[int]:
+    """
+    Return the sample count if `request` is the batch form of `command`, None otherwise.
+    Raises ValueError for a batch request with an invalid count.
+    """
+    prefix = command + BATCH_FLAG
+    if not request.startswith(prefix):
+        return None
+    return check_batch_size(int(request[len(prefix):]))
+
+
+def check_batch_size(count: int) -> int:
+    count = int(count)
+    if not 0 < count <= MAX_BATCH_SIZE:
+        raise ValueError(f"batch size must be between 1 and {MAX_BATCH_SIZE}")
+    return count
+
+
+def encode_batch_values(values: Sequence[float]) -> bytes:
+    """Batch payload without the frame delimiter (one-shot replies are not delimited)."""
+    if hasattr(values, "tolist"):
+        # NumPy arrays convert to Python floats in one C-level pass.
+        return ",".join(map(repr, values.tolist())).encode("utf-8")
+    return ",".join(map(repr, map(float, values))).encode("utf-8")
+
+
+def encode_error(message: str) -> bytes:
+    return ERROR_PREFIX + message.encode("utf-8") + FRAME_DELIMITER
+
+
+def split_frames(buffer: bytes) -> Tuple[List[bytes], bytes]:
+    """Split a receive buffer into complete frames (delimiter stripped) and the unfinished tail."""
+    *frames, rest = bytes(buffer).split(FRAME_DELIMITER)
+    return [f.rstrip(b"\r") for f in frames], rest
+
+
+def parse_reply(frame: bytes) -> float:
+    if frame.startswith(ERROR_PREFIX):
+        raise ProtocolError(frame[len(ERROR_PREFIX):].decode("utf-8", errors="replace"))
+    return float(frame.decode("utf-8").strip())
+
+
+def parse_batch_reply(frame: bytes) -> List[float]:
+    if frame.startswith(ERROR_PREFIX):
+        raise ProtocolError(frame[len(ERROR_PREFIX):].decode("utf-8", errors="replace"))
+    return [float(x) for x in frame.split(b",")]
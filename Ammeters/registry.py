@@ -0,0 +1,110 @@
+"""
+Ammeter driver registry.
+
+Maps the ammeter names used under `ammeters:` in config.yaml to their
+emulator classes. Classes are imported the first time they are asked for,
+so starting one emulator never imports the others. A name is resolved from,
+in order:
+
+1. `ammeters.<name>.driver` in the config, as "package.module:ClassName",
+2. register() calls,
+3. the built-in emulators (BUILTIN_DRIVERS),
+4. the "ammeters.drivers" entry point group of installed packages.
+
+A new meter type therefore only needs its config entry (with `driver:` if
+it is not built in):
+
+    ammeters:
+      fluke:
+        port: 5003
+        command: "MEASURE_FLUKE -current"
+        driver: "my_meters.fluke:FlukeAmmeter"
+"""
+import functools
+import importlib
+import threading
+from importlib.metadata import entry_points
+from typing import Any, Dict, List, Mapping, Optional, Type, Union
+
+from Ammeters.base_ammeter import AmmeterEmulatorBase
+
+ENTRY_POINT_GROUP = "ammeters.drivers"
+
+BUILTIN_DRIVERS: Dict[str, str] = {
+    "greenlee": "Ammeters.Greenlee_Ammeter:GreenleeAmmeter",
+    "entes": "Ammeters.Entes_Ammeter:EntesAmmeter",
+    "circutor": "Ammeters.Circutor_Ammeter:CircutorAmmeter",
+}
+
+Driver = Union[str, Type[AmmeterEmulatorBase]]
+
+_registered: Dict[str, Driver] = {}
+_lock = threading.Lock()
+
+
+def register(name: str, driver: Driver) -> None:
+    """Make `name` resolve to `driver`: a class or a "package.module:ClassName" string."""
+    with _lock:
+        _registered[name] = driver
+
+
+def available(config: Optional[Any] = None) -> List[str]:
+    """Every name that resolves to a driver (this scans the installed entry points)."""
+    names = set(BUILTIN_DRIVERS) | set(_registered)
+    names.update(ep.name for ep in entry_points(group=ENTRY_POINT_GROUP))
+    names.update(name for name in _configured_ammeters(config) if _configured_driver(name, config))
+    return sorted(names)
+
+
+def driver_class(name: str, config: Optional[Any] = None) -> Type[AmmeterEmulatorBase]:
+    """
+    Emulator class for ammeter `name`. `config` (a src.utils.config.Config or
+    the raw config.yaml dict) may name the driver under ammeters.<name>.driver.
+    """
+    driver = _configured_driver(name, config) or _registered.get(name) or BUILTIN_DRIVERS.get(name)
+    if driver is None:
+        driver = _entry_point(name)
+    if driver is None:
+        raise KeyError(f"No driver for ammeter {name!r}. Available: {', '.join(available(config))}")
+    return driver if isinstance(driver, type) else _import(driver)
+
+
+@functools.lru_cache(maxsize=None)
+def _import(target: str) -> Type[AmmeterEmulatorBase]:
+    module_name, _, attr = target.partition(":")
+    if not module_name or not attr:
+        raise ValueError(f"Driver {target!r} must look like 'package.module:ClassName'")
+    try:
+        cls = getattr(importlib.import_module(module_name), attr)
+    except AttributeError:
+        raise ImportError(f"Module {module_name!r} has no driver class {attr!r}") from None
+    if not (isinstance(cls, type) and issubclass(cls, AmmeterEmulatorBase)):
+        raise TypeError(f"Driver {target!r} is not an AmmeterEmulatorBase subclass")
+    return cls
+
+
+def _entry_point(name: str) -> Optional[Type[AmmeterEmulatorBase]]:
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        if ep.name == name:
+            cls = ep.load()
+            if not (isinstance(cls, type) and issubclass(cls, AmmeterEmulatorBase)):
+                raise TypeError(f"Entry point {ep.value!r} for {name!r} is not an AmmeterEmulatorBase subclass")
+            return cls
+    return None
+
+
+def _configured_ammeters(config: Optional[Any]) -> Mapping[str, Any]:
+    if config is None:
+        return {}
+    if isinstance(config, Mapping):
+        return config.get("ammeters") or {}
+    return config.ammeters
+
+
+def _configured_driver(name: str, config: Optional[Any]) -> Optional[str]:
+    entry = _configured_ammeters(config).get(name)
+    if entry is None:
+        return None
+    if isinstance(entry, Mapping):
+        return entry.get("driver")
+    return entry.driver
@@ -1,35 +1,36 @@
-import json
+import sys
 from pathlib import Path
-import matplotlib.pyplot as plt
+
+from src.testing.catalog import CATALOG_FILE, ResultCatalog
+from src.testing.plotting import load_run, plot_single
 
 RESULTS_DIR = Path("results")
 
 def latest_result_file() -> Path:
+    # The catalog answers "newest run" with one indexed query
+    if (RESULTS_DIR / CATALOG_FILE).exists():
+        catalog = ResultCatalog(RESULTS_DIR)
+        row = catalog.latest()
+        if row is not None:
+            return catalog.result_path(row)
+
+    # Fallback for results directories without a catalog
     files = sorted(RESULTS_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
     if not files:
+        # Covers both <run_id>.json and the <run_id>.meta.json sidecar of binary results
         raise FileNotFoundError("No results JSON files found under results/")
     return files[0]
 
 def main():
-    path = latest_result_file()
-    data = json.loads(path.read_text(encoding="utf-8"))
-
-    measurements = data["data"]["measurements"]
-    timestamps = data["data"]["timestamps_epoch"]
-
-    # normalize time to start at 0 for plot readability
-    t0 = timestamps[0]
-    t = [x - t0 for x in timestamps]
-
-    plt.figure()
-    plt.plot(t, measurements)
-    plt.title(f"Current over time ({data['ammeter_type']})")
-    plt.xlabel("Time (s)")
-    plt.ylabel("Current (A)")
-    plt.tight_layout()
-
-    out_png = RESULTS_DIR / f"{data['run_id']}.png"
-    plt.savefig(out_png)
+    # Plot the given result (.json, .meta.json, or the .index.json of a run still
+    # being written), or the latest saved run.
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else latest_result_file()
+    # Binary (npy) results and in-progress runs are memory-mapped, and only
+    # min/max per pixel column is drawn, so even huge runs plot quickly.
+    run = load_run(path)
+
+    out_png = RESULTS_DIR / f"{run['run_id']}.png"
+    plot_single(run, out_png)
     print("Saved plot:", out_png)
 
 if __name__ == "__main__":
@@ -0,0 +1,11 @@
+import sys
+
+from src.cli import main
+
+
+if __name__ == "__main__":
+    # Load-test the emulators and client paths: python -m src.cli --bench. Reports are
+    # saved under benchmarks/ (<timestamp>_<commit>.json); pass --baseline with an
+    # earlier one to flag regressions, e.g.
+    # python -m examples.run_benchmark --concurrency 1 4 16 --duration 2 --baseline benchmarks/<report>.json
+    sys.exit(main(["--bench", *sys.argv[1:]]))
@@ -1,16 +1,11 @@
-import threading
-import time
-import json
 from pathlib import Path
 
-import matplotlib.pyplot as plt
-
-from Ammeters.Greenlee_Ammeter import GreenleeAmmeter
-from Ammeters.Entes_Ammeter import EntesAmmeter
-from Ammeters.Circutor_Ammeter import CircutorAmmeter
-from Ammeters.client import request_current_from_ammeter
+from Ammeters.client import request_current_from_ammeter_async
+from Ammeters.launcher import start_emulators
 
 from src.testing.ammeter_framework import AmmeterTestFramework
+from src.testing.analysis import compare_runs, report_frame, save_report
+from src.testing.plotting import plot_comparison, plot_single
 
 
 # All results (json + plots) will be saved here
@@ -18,88 +13,29 @@ RESULTS_DIR = Path("results")
 RESULTS_DIR.mkdir(exist_ok=True)
 
 
-def start_emulators():
-    # Start each ammeter emulator in a background thread.
-    # Using daemon threads so they stop automatically when the script exits.
-    threading.Thread(target=lambda: GreenleeAmmeter(5000).start_server(), daemon=True).start()
-    threading.Thread(target=lambda: EntesAmmeter(5001).start_server(), daemon=True).start()
-    threading.Thread(target=lambda: CircutorAmmeter(5002).start_server(), daemon=True).start()
-
-    # Give the servers a moment to start listening on their ports
-    time.sleep(2)
-
-
-def load_result(path: Path) -> dict:
-    # Helper to load a saved result json file
-    return json.loads(path.read_text(encoding="utf-8"))
-
-
-def plot_single(result: dict, out_path: Path):
-    # Plot current values over time for a single ammeter run
-    measurements = result["data"]["measurements"]
-    timestamps = result["data"]["timestamps_epoch"]
-
-    # Normalize time so the first sample starts at t=0
-    t0 = timestamps[0]
-    t = [x - t0 for x in timestamps]
-
-    plt.figure()
-    plt.plot(t, measurements)
-    plt.title(f"Current over time ({result['ammeter_type']})")
-    plt.xlabel("Time (seconds)")
-    plt.ylabel("Current (A)")
-    plt.tight_layout()
-    plt.savefig(out_path)
-    plt.close()
-
-
-def plot_comparison(results: dict[str, dict], out_path: Path):
-    # Plot all ammeters on the same graph for comparison
-    plt.figure()
-
-    for ammeter_type, result in results.items():
-        measurements = result["data"]["measurements"]
-        timestamps = result["data"]["timestamps_epoch"]
-
-        t0 = timestamps[0]
-        t = [x - t0 for x in timestamps]
-
-        plt.plot(t, measurements, label=ammeter_type)
-
-    plt.title("Current over time – comparison")
-    plt.xlabel("Time (seconds)")
-    plt.ylabel("Current (A)")
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(out_path)
-    plt.close()
-
-
 def main():
-    # Start all emulators before running any measurements
-    start_emulators()
-
     # Create the test framework instance
     fw = AmmeterTestFramework("config/config.yaml", results_dir=str(RESULTS_DIR))
 
-    ammeters = ["greenlee", "entes", "circutor"]
-    collected_results: dict[str, dict] = {}
+    # Every ammeter configured in config.yaml
+    ammeters = list(fw.settings.ammeters)
 
-    print("Running duration-based sampling campaign...\n")
+    # Start all emulators before running any measurements.
+    # They are listening as soon as start_emulators() returns, and stop when the block exits.
+    with start_emulators(fw.config):
+        print("Running duration-based sampling campaign...\n")
 
-    for ammeter in ammeters:
-        print(f"Sampling {ammeter}...")
-
-        # Run a time-based sampling session
-        result = fw.run_test(
-            ammeter,
-            request_current_from_ammeter,
+        # Sample all ammeters concurrently: the campaign takes as long as one run.
+        collected_results = fw.run_campaign(
+            ammeters,
+            request_current_from_ammeter_async,
             total_duration_seconds=3.0,
             sampling_frequency_hz=10.0,
             save=True,
         )
 
-        collected_results[ammeter] = result
+    for ammeter, result in collected_results.items():
+        print(f"Sampled {ammeter}")
 
         # Save individual plot for this ammeter
         json_path = RESULTS_DIR / f"{result['run_id']}.json"
@@ -115,6 +51,12 @@ def main():
     plot_comparison(collected_results, comparison_path)
 
     print("Comparison plot saved:", comparison_path)
+
+    # Cross-ammeter metrics chosen by analysis.statistical_metrics in config.yaml
+    report = compare_runs(collected_results, config=fw.settings)
+    report_path = save_report(report, RESULTS_DIR / "comparison.json")
+    print(report_frame(report).to_string())
+    print("Comparison report saved:", report_path)
     print("\nCampaign completed.")
 
 
@@ -1,20 +1,10 @@
-from src.testing.ammeter_framework import AmmeterTestFramework
+import sys
+
+from src.cli import main
 
-def main():
-    # יצירת מסגרת הבדיקות
-    framework = AmmeterTestFramework()
-    
-    # הרצת בדיקות לכל סוגי האמפרמטרים
-    ammeter_types = ["greenlee", "entes", "circutor"]
-    results = {}
-    
-    for ammeter_type in ammeter_types:
-        print(f"Testing {ammeter_type} ammeter...")
-        results[ammeter_type] = framework.run_test()
-        
-    # השוואת תוצאות
-    for ammeter_type, result in results.items():
-        print(f"\nResults for {ammeter_type}:")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    # Count-based test of every configured ammeter, with the measurement count and
+    # result format from config.yaml. Any src.cli option can be added, e.g.
+    # python -m examples.run_tests --ammeter greenlee --count 100 --plot
+    sys.exit(main(sys.argv[1:]))
@@ -1,42 +1,29 @@
-import threading
 import time
 
-from Ammeters.Circutor_Ammeter import CircutorAmmeter
-from Ammeters.Entes_Ammeter import EntesAmmeter
-from Ammeters.Greenlee_Ammeter import GreenleeAmmeter
 from Ammeters.client import request_current_from_ammeter
+from Ammeters.launcher import start_emulators
+from src.utils.config import load_config
+from src.utils.logger import configure_emulator_logging
 
-
-def run_greenlee_emulator():
-    greenlee = GreenleeAmmeter(5000)
-    greenlee.start_server()
-
-
-def run_entes_emulator():
-    entes = EntesAmmeter(5001)
-    entes.start_server()
-
-
-def run_circutor_emulator():
-    circutor = CircutorAmmeter(5002)
-    circutor.start_server()
+CONFIG = load_config("config/config.yaml")
 
 
 if __name__ == "__main__":
-    # Start each ammeter emulator in a separate thread
-    threading.Thread(target=run_greenlee_emulator, daemon=True).start()
-    threading.Thread(target=run_entes_emulator, daemon=True).start()
-    threading.Thread(target=run_circutor_emulator, daemon=True).start()
-
-    # Give servers time to start
-    time.sleep(3)
-
-    # --- OPTIONAL: manual smoke test (not the real tests) ---
-    print("Smoke test:")
-    print(request_current_from_ammeter(5000, b"MEASURE_GREENLEE -get_measurement"))
-    print(request_current_from_ammeter(5001, b"MEASURE_ENTES -get_data"))
-    print(request_current_from_ammeter(5002, b"MEASURE_CIRCUTOR -get_measurement -current"))
-
-    # Keep process alive so pytest / framework can connect
-    while True:
-        time.sleep(1)
\ No newline at end of file
+    # Emulator logs go through a background queue listener instead of print()
+    configure_emulator_logging(CONFIG)
+
+    # Start every configured ammeter emulator on its own thread; they are
+    # listening on their configured ports as soon as this returns.
+    with start_emulators(CONFIG) as launcher:
+        # --- OPTIONAL: manual smoke test (not the real tests) ---
+        print("Smoke test:")
+        for name, port in launcher.ports.items():
+            command = CONFIG["ammeters"][name]["command"].encode("utf-8")
+            print(name, request_current_from_ammeter(port, command))
+
+        # Keep process alive so pytest / framework can connect
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,293 @@
+"""
+Command-line entry point for sampling campaigns.
+
+    python -m src.cli --count 1000
+    python -m src.cli --ammeter greenlee --ammeter entes --duration 10 --frequency 50 --format stream
+    python -m src.cli --duration 60 --frequency 20 --repeat 5 --concurrency 4
+    python -m src.cli --sync --duration 3 --frequency 10 --plot --analyze
+    python -m src.cli --bench --concurrency 1 4 16 --duration 2
+
+By default the emulators of the selected ammeters are started on their
+configured ports for the length of the run; pass --external to sample
+meters (or emulators) that are already listening. Sampling arguments left
+out come from config.yaml, as with AmmeterTestFramework.run_test().
+
+Only argparse is imported up front: the framework, NumPy, matplotlib
+(--plot) and pandas (--analyze) are imported when the chosen command needs
+them, so --help and argument errors return immediately.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+CLIENTS = ("one_shot", "pooled", "batch")
+FORMATS = ("json", "npy", "stream")
+BENCH_CONCURRENCY = (1, 4, 16)
+BENCH_DURATION_SECONDS = 2.0
+# Flush interval for --format stream when result_management.flush_interval_seconds is unset.
+STREAM_FLUSH_SECONDS = 1.0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="Run ammeter sampling campaigns, or benchmark the emulators and clients with --bench.",
+    )
+    parser.add_argument("--config", default="config/config.yaml", help="config file (default: %(default)s)")
+    parser.add_argument("--results-dir", default="results", help="where results are saved (default: %(default)s)")
+    parser.add_argument("--ammeter", action="append", help="ammeter to sample, repeatable (default: all configured)")
+    parser.add_argument("--external", action="store_true", help="use emulators or meters that are already running")
+
+    sampling = parser.add_argument_group("sampling (defaults from config.yaml)")
+    sampling.add_argument("--count", type=int, help="count-based run of this many measurements")
+    sampling.add_argument("--duration", type=float, help="seconds per run (with --frequency); seconds per combination with --bench")
+    sampling.add_argument("--frequency", type=float, help="samples per second of a duration-based run")
+    sampling.add_argument("--repeat", type=int, default=1, help="runs per ammeter (default: %(default)s)")
+    sampling.add_argument(
+        "--concurrency", type=int, nargs="+",
+        help="runs: worker processes (default 1, in this process); --bench: levels to try (default: 1 4 16)",
+    )
+    sampling.add_argument(
+        "--client", choices=CLIENTS, action="append",
+        help="client path: one_shot connections, pooled persistent connections, or pooled with batch requests "
+             "for count-based runs (default: batch); repeatable with --bench (default: all)",
+    )
+    sampling.add_argument("--sync", action="store_true", help="sample all selected ammeters on the same clock ticks")
+
+    output = parser.add_argument_group("output")
+    output.add_argument(
+        "--format", choices=FORMATS,
+        help="json, npy, or stream: constant memory, appended to disk during the run (default: result_management.format)",
+    )
+    output.add_argument("--no-save", action="store_true", help="do not save results")
+    output.add_argument("--plot", action="store_true", help="plot each run and a comparison of all runs")
+    output.add_argument("--analyze", action="store_true", help="compare the runs using analysis.statistical_metrics")
+
+    bench = parser.add_argument_group("benchmark")
+    bench.add_argument("--bench", action="store_true", help="load-test the emulators and client paths instead")
+    bench.add_argument("--bench-dir", default="benchmarks", help="where benchmark reports are saved (default: %(default)s)")
+    bench.add_argument("--baseline", type=Path, help="earlier benchmark report to compare against")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    _check_args(parser, args)
+    if args.bench:
+        return _bench(args)
+    return _campaign(parser, args)
+
+
+def _check_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    if args.bench:
+        if args.count is not None or args.frequency is not None or args.sync:
+            parser.error("--bench runs for --duration seconds per combination; --count, --frequency and --sync do not apply")
+        if args.concurrency and min(args.concurrency) <= 0:
+            parser.error("--concurrency must be > 0")
+        return
+
+    if args.count is not None and (args.duration is not None or args.frequency is not None):
+        parser.error("use either --count or --duration with --frequency")
+    if (args.duration is None) != (args.frequency is None):
+        parser.error("--duration and --frequency go together")
+    if args.repeat <= 0:
+        parser.error("--repeat must be > 0")
+    if args.concurrency is not None and (len(args.concurrency) != 1 or args.concurrency[0] <= 0):
+        parser.error("--concurrency takes one worker count > 0 (several levels only with --bench)")
+    if args.baseline is not None:
+        parser.error("--baseline only applies to --bench")
+    if args.client and len(args.client) > 1:
+        parser.error("--client takes one client path (several only with --bench)")
+    args.client = args.client[0] if args.client else None
+
+    workers = args.concurrency[0] if args.concurrency else 1
+    if workers > 1:
+        if args.sync or args.plot or args.analyze:
+            parser.error("--sync, --plot and --analyze run in this process; drop --concurrency")
+        if args.client not in (None, "batch"):
+            parser.error("campaign workers use pooled connections with batch requests; drop --client")
+        if args.no_save:
+            parser.error("campaign workers always save their results; drop --no-save")
+    if args.sync and args.format == "stream":
+        parser.error("synchronized runs are kept in memory; use --format json or npy")
+    if args.sync and args.client == "batch":
+        parser.error("synchronized runs request one sample per ammeter per tick; use --client one_shot or pooled")
+
+
+def _campaign(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    from src.utils.config import get_config
+
+    config = get_config(args.config)
+    ammeters = args.ammeter or list(config.ammeters)
+    unknown = [name for name in ammeters if name not in config.ammeters]
+    if unknown:
+        parser.error(f"unknown ammeter(s) {', '.join(unknown)}. Configured: {', '.join(config.ammeters)}")
+
+    sampling = _sampling(args, config)
+    with _emulators(args, config, ammeters):
+        workers = args.concurrency[0] if args.concurrency else 1
+        if workers > 1:
+            return _pool_campaign(args, ammeters, sampling, workers)
+        results = _local_campaign(args, ammeters, sampling)
+
+    if args.plot:
+        _plot(args, results)
+    if args.analyze:
+        _analyze(args, config, results)
+    return 0
+
+
+def _sampling(args: argparse.Namespace, config: Any) -> Dict[str, Any]:
+    """run_test() keyword arguments shared by every run."""
+    sampling: Dict[str, Any] = {}
+    if args.count is not None:
+        sampling["measurements_count"] = args.count
+    if args.duration is not None:
+        sampling["total_duration_seconds"] = args.duration
+        sampling["sampling_frequency_hz"] = args.frequency
+    if args.format == "stream":
+        sampling["streaming"] = True
+        sampling["flush_interval_seconds"] = config.flush_interval_seconds or STREAM_FLUSH_SECONDS
+    elif args.format is not None:
+        sampling["result_format"] = args.format
+    if args.no_save:
+        sampling["save"] = False
+    return sampling
+
+
+def _emulators(args: argparse.Namespace, config: Any, ammeters: Sequence[str]):
+    if args.external:
+        return nullcontext()
+    from Ammeters.launcher import start_emulators
+
+    return start_emulators(config.raw, ports={name: config.ammeter(name).port for name in ammeters})
+
+
+def _local_campaign(args: argparse.Namespace, ammeters: Sequence[str], sampling: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    from Ammeters.client import AmmeterClientPool, request_current_from_ammeter
+    from src.testing.ammeter_framework import AmmeterTestFramework
+
+    fw = AmmeterTestFramework(args.config, results_dir=args.results_dir)
+    results: Dict[str, Dict[str, Any]] = {}
+    with AmmeterClientPool() as pool:
+        get = request_current_from_ammeter if args.client == "one_shot" else pool
+        get_batch = pool.request_batch if args.client in (None, "batch") else None
+        for repetition in range(args.repeat):
+            if args.sync:
+                result = fw.run_synchronized(ammeters, get, **sampling)
+                results[_label(result, repetition, args.repeat)] = result
+                _print_synchronized(result)
+                continue
+            for name in ammeters:
+                result = fw.run_test(name, get, get_batch=get_batch, **sampling)
+                results[_label(result, repetition, args.repeat)] = result
+                _print_run(name, result["run_id"], result["stats"])
+    return results
+
+
+def _pool_campaign(args: argparse.Namespace, ammeters: Sequence[str], sampling: Dict[str, Any], workers: int) -> int:
+    from src.testing.campaign import build_matrix, print_progress, run_campaign_pool
+
+    report = run_campaign_pool(
+        build_matrix(ammeters, [sampling], args.repeat),
+        config_path=args.config,
+        results_dir=args.results_dir,
+        max_workers=workers,
+        progress=print_progress,
+    )
+    for group in report["groups"]:
+        print(f"{group['ammeter_type']:<10} runs={group['runs']} mean={group['mean_of_means']:.6g} "
+              f"std_of_means={group['std_of_means']:.3g} min={group['min']:.6g} max={group['max']:.6g}")
+    print(f"{len(report['jobs'])} runs in {report['elapsed_seconds']:.1f}s, {len(report['failed'])} failed")
+    return 1 if report["failed"] else 0
+
+
+def _label(result: Dict[str, Any], repetition: int, repeat: int) -> str:
+    return result["ammeter_type"] if repeat == 1 else f"{result['ammeter_type']}#{repetition + 1}"
+
+
+def _print_run(name: str, run_id: str, stats: Dict[str, Any]) -> None:
+    p99 = stats.get("latency", {}).get("request", {}).get("p99_seconds")
+    latency = f" p99_latency={p99 * 1e3:.3f}ms" if p99 is not None else ""
+    print(f"{name:<10} run={run_id[:8]} mean={stats['mean']:.6g} std={stats['std']:.3g} "
+          f"min={stats['min']:.6g} max={stats['max']:.6g}{latency}")
+
+
+def _print_synchronized(result: Dict[str, Any]) -> None:
+    stats = result["stats"]
+    for name in result["synchronized"]:
+        _print_run(name, result["run_id"], {**stats[name], "latency": stats["latency"].get(name, {})})
+
+
+def _plot(args: argparse.Namespace, results: Dict[str, Dict[str, Any]]) -> None:
+    from src.testing.plotting import plot_comparison, plot_single
+
+    out_dir = Path(args.results_dir)
+    for result in results.values():
+        if "synchronized" not in result:
+            print("plot:", plot_single(result, out_dir / f"{result['run_id']}.png"))
+    series = _series(results)
+    if len(series) > 1:
+        print("plot:", plot_comparison(series, out_dir / "comparison.png"))
+
+
+def _analyze(args: argparse.Namespace, config: Any, results: Dict[str, Dict[str, Any]]) -> None:
+    from src.testing.analysis import compare_runs, report_frame, save_report
+
+    runs = _series(results)
+    if len(runs) < 2:
+        print("analysis: needs at least two runs", file=sys.stderr)
+        return
+    # The columns of one synchronized run share their timestamps, so compare them on wall-clock time.
+    relative = not (len(results) == 1 and "synchronized" in next(iter(results.values())))
+    report = compare_runs(runs, config=config, relative=relative)
+    print(report_frame(report).to_string())
+    if not args.no_save:
+        print("analysis:", save_report(report, Path(args.results_dir) / "comparison.json"))
+
+
+def _series(results: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """One run per ammeter series: synchronized results are split into their columns."""
+    from src.testing.analysis import synchronized_runs
+
+    series: Dict[str, Dict[str, Any]] = {}
+    for label, result in results.items():
+        if "synchronized" not in result:
+            series[label] = result
+        elif len(results) == 1:
+            series.update(synchronized_runs(result))
+        else:
+            series.update({f"{label}:{name}": run for name, run in synchronized_runs(result).items()})
+    return series
+
+
+def _bench(args: argparse.Namespace) -> int:
+    from src.testing.benchmark import compare, format_comparison, format_report, load_benchmark, run_benchmark, save_benchmark
+
+    report = run_benchmark(
+        args.config,
+        ammeters=args.ammeter,
+        clients=args.client or CLIENTS,
+        concurrency=args.concurrency or BENCH_CONCURRENCY,
+        duration_seconds=args.duration or BENCH_DURATION_SECONDS,
+        emulator_mode="external" if args.external else "process",
+    )
+    print(format_report(report))
+    if not args.no_save:
+        print("\nSaved:", save_benchmark(report, args.bench_dir))
+
+    if args.baseline is None:
+        return 0
+    # Flag combinations whose throughput or p99 latency got >10% worse
+    rows = compare(load_benchmark(args.baseline), report)
+    print(format_comparison(rows))
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
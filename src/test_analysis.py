@@ -0,0 +1,86 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.testing.analysis import METRICS, align, allan_deviation, compare_runs, load_runs, report_frame
+from src.testing.results_io import save_npy
+from src.utils.config import get_config
+
+
+def _run(run_id, ammeter_type, values, start=1_700_000_000.0, period=0.1):
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        "run_id": run_id,
+        "ammeter_type": ammeter_type,
+        "data": {"measurements": values, "timestamps_epoch": start + np.arange(len(values)) * period},
+    }
+
+
+def test_metrics_against_reference():
+    t = np.arange(200) * 0.1
+    base = np.sin(t)
+    runs = {
+        "reference": _run("a", "greenlee", base),
+        # Offset and 10% gain; a later start, compared on relative time.
+        "biased": _run("b", "entes", 1.1 * base + 0.5, start=1_700_000_100.0),
+        "drifting": _run("c", "circutor", base + 0.01 * t),
+    }
+    runs["biased"]["data"]["measurements"][50] = 100.0
+
+    report = compare_runs(runs, reference="greenlee")
+    metrics = report["metrics"]
+
+    assert set(metrics) == set(METRICS)
+    assert report["time_base"]["points"] == 200
+    assert metrics["bias"][0] == 0.0
+    assert metrics["bias"][1] == pytest.approx(0.5 + 0.1 * base.mean() + (100.0 - 1.1 * base[50] - 0.5) / 200)
+    assert metrics["correlation"][1][1] == pytest.approx(1.0)
+    assert metrics["correlation"][0][2] > 0.9
+    assert metrics["outliers"]["count"] == [0, 1, 0]
+    assert metrics["drift"]["slope_per_second"][2] - metrics["drift"]["slope_per_second"][0] == pytest.approx(0.01)
+    assert len(metrics["allan_deviation"]["tau_seconds"]) == len(metrics["allan_deviation"]["adev"][0])
+
+    frame = report_frame(report)
+    assert list(frame.index) == ["reference", "biased", "drifting"]
+    assert frame.loc["biased", "outliers"] == 1
+
+
+def test_metrics_come_from_config(tmp_path):
+    config = get_config("config/config.yaml")
+    runs = {"x": _run("x", "greenlee", np.ones(10)), "y": _run("y", "entes", np.full(10, 2.0))}
+
+    report = compare_runs(runs, config=config, metrics=["bias", "relative_error"])
+    assert report["reference"] == "mean"
+    assert report["metrics"] == {"bias": [-0.5, 0.5], "relative_error": [pytest.approx(1 / 3), pytest.approx(1 / 3)]}
+    assert set(compare_runs(runs, config=config)["metrics"]) == set(config.analysis.statistical_metrics)
+
+    with pytest.raises(ValueError, match="Unknown metric"):
+        compare_runs(runs, metrics=["kurtosis"])
+
+
+def test_allan_deviation_of_white_noise():
+    rng = np.random.default_rng(1)
+    tau, adev = allan_deviation(rng.normal(size=(4, 4096)), 1.0)
+    assert tau[0] == 1.0 and tau[-1] == 2048.0
+    # White noise: ADEV falls as 1 / sqrt(tau).
+    np.testing.assert_allclose(adev[:, 4], 1 / np.sqrt(16), rtol=0.25)
+
+
+def test_absolute_alignment_needs_overlap():
+    runs = {"a": _run("a", "greenlee", np.ones(5)), "b": _run("b", "entes", np.ones(5), start=1_700_001_000.0)}
+    with pytest.raises(ValueError, match="overlap"):
+        align(runs, relative=False)
+
+
+def test_compares_hundreds_of_saved_runs_quickly(tmp_path):
+    rng = np.random.default_rng(2)
+    paths = [save_npy(_run(f"run{i:04d}", "greenlee", rng.normal(size=2000)), tmp_path) for i in range(300)]
+
+    started = time.perf_counter()
+    report = compare_runs(load_runs(paths))
+    elapsed = time.perf_counter() - started
+
+    assert len(report["runs"]) == 300
+    assert len(report["metrics"]["correlation"]) == 300
+    assert elapsed < 10
@@ -0,0 +1,68 @@
+import pytest
+
+from Ammeters.client import request_current_from_ammeter
+
+from src.testing.benchmark import (
+    compare,
+    emulators,
+    format_comparison,
+    load_benchmark,
+    measure_load,
+    run_benchmark,
+    save_benchmark,
+)
+
+
+@pytest.fixture(scope="module")
+def greenlee_port():
+    with emulators({"greenlee": 0}, mode="thread") as ports:
+        yield ports["greenlee"]
+
+
+@pytest.mark.parametrize("client", ["one_shot", "pooled", "batch"])
+def test_measure_load_reports_throughput_and_latency(greenlee_port, client):
+    report = measure_load(greenlee_port, b"MEASURE_GREENLEE -get_measurement", client,
+                          concurrency=2, duration_seconds=0.2, warmup_seconds=0.05, batch_size=10)
+
+    assert report["requests"] > 0
+    assert report["errors"] == 0
+    assert report["samples"] == report["requests"] * report["batch_size"]
+    assert report["requests_per_second"] == report["requests"] / 0.2
+    latency = report["latency_ms"]
+    assert 0 < latency["p50"] <= latency["p99"] <= latency["max"]
+
+
+def test_measure_load_fails_fast_without_emulator():
+    with emulators({"greenlee": 0}, mode="thread") as ports:
+        stopped_port = ports["greenlee"]
+    with pytest.raises(ConnectionError):
+        measure_load(stopped_port, b"MEASURE_GREENLEE -get_measurement", "pooled", duration_seconds=0.1)
+
+
+@pytest.mark.parametrize("mode", ["process", "thread"])
+def test_emulators_use_configured_server_options(mode):
+    # A seeded emulator replays the same measurements, so the configured seed must reach it.
+    config = {"emulators": {"seed": 7}}
+    first = []
+    for _ in range(2):
+        with emulators({"greenlee": 0}, mode=mode, config=config) as ports:
+            first.append(request_current_from_ammeter(ports["greenlee"], b"MEASURE_GREENLEE -get_measurement"))
+    assert first[0] == first[1]
+
+
+def test_benchmark_report_roundtrip_and_compare(tmp_path):
+    report = run_benchmark(
+        ammeters=["entes"], clients=["pooled"], concurrency=[1],
+        duration_seconds=0.2, warmup_seconds=0.05, emulator_mode="process",
+    )
+    assert [(r["ammeter_type"], r["client"], r["concurrency"]) for r in report["results"]] == [("entes", "pooled", 1)]
+
+    saved = load_benchmark(save_benchmark(report, tmp_path))
+    assert saved["results"] == report["results"]
+
+    slower = {**saved, "results": [{**r, "requests_per_second": r["requests_per_second"] / 2} for r in saved["results"]]}
+    [row] = compare(saved, slower)
+    assert row["throughput_ratio"] == pytest.approx(0.5)
+    assert row["regression"]
+    assert not compare(saved, saved)[0]["regression"]
+    assert format_comparison([row]).split()[-1] == "REGRESSION"
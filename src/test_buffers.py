@@ -0,0 +1,37 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.testing.ammeter_framework import AmmeterTestFramework
+from src.testing.buffers import SampleBuffer
+
+
+def test_sample_buffer_grows_past_initial_capacity():
+    buf = SampleBuffer(capacity=2)
+    for i in range(5):
+        buf.append(float(i), 100.0 + i)
+    buf.extend(np.array([5.0, 6.0]), np.array([105.0, 106.0]))
+
+    values, timestamps = buf.arrays()
+    assert values.dtype == np.float64
+    assert values.tolist() == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+    assert timestamps.tolist() == [100.0 + i for i in range(7)]
+
+
+def test_summary_matches_reference_statistics(tmp_path):
+    fw = AmmeterTestFramework("config/config.yaml", results_dir=str(tmp_path / "results"))
+    values = iter(np.linspace(1.0, 100.0, 1000))
+
+    result = fw.run_test("entes", lambda port, command: next(values), measurements_count=1000, save=True)
+
+    stats = result["stats"]
+    assert stats["mean"] == pytest.approx(50.5)
+    assert stats["median"] == pytest.approx(50.5)
+    assert stats["min"] == 1.0 and stats["max"] == 100.0
+    assert stats["p95"] == pytest.approx(np.percentile(np.linspace(1.0, 100.0, 1000), 95))
+    assert stats["p50"] <= stats["p95"] <= stats["p99"] <= stats["max"]
+
+    saved = json.loads((tmp_path / "results" / f"{result['run_id']}.json").read_text(encoding="utf-8"))
+    assert len(saved["data"]["measurements"]) == 1000
+    assert saved["stats"] == stats
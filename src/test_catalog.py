@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from src.testing.ammeter_framework import AmmeterTestFramework
+from src.testing.catalog import ResultCatalog
+
+
+@pytest.fixture
+def framework(tmp_path):
+    return AmmeterTestFramework("config/config.yaml", results_dir=str(tmp_path))
+
+
+def test_saved_runs_are_indexed(framework):
+    greenlee = framework.run_test("greenlee", lambda port, command: 1.0, measurements_count=3)
+    entes = framework.run_test("entes", lambda port, command: 5.0, measurements_count=4, result_format="npy")
+
+    catalog = framework.catalog
+    assert catalog.latest()["run_id"] == entes["run_id"]
+    assert catalog.latest("greenlee")["run_id"] == greenlee["run_id"]
+
+    row = catalog.get(entes["run_id"])
+    assert row["format"] == "npy"
+    assert row["samples"] == 4
+    assert row["mean"] == 5.0
+    assert catalog.result_path(row).exists()
+
+    assert [r["run_id"] for r in catalog.query(stats={"mean": (2.0, None)})] == [entes["run_id"]]
+    assert catalog.query(ammeter_type="circutor") == []
+
+
+def test_unsaved_runs_are_not_indexed(framework):
+    framework.run_test("greenlee", lambda port, command: 1.0, measurements_count=3, save=False)
+    assert framework.catalog.latest() is None
+
+
+def test_rebuild_indexes_existing_files(framework, tmp_path):
+    result = framework.run_test("circutor", lambda port, command: 0.2, measurements_count=2, save=False)
+    (tmp_path / f"{result['run_id']}.json").write_text(
+        json.dumps({**result, "data": {}}), encoding="utf-8")
+
+    catalog = ResultCatalog(tmp_path)
+    assert catalog.rebuild() == 1
+    assert catalog.get(result["run_id"])["ammeter_type"] == "circutor"
+
+
+def test_query_rejects_unknown_columns(framework):
+    with pytest.raises(ValueError):
+        framework.catalog.query(order_by="path; DROP TABLE runs")
+    with pytest.raises(ValueError):
+        framework.catalog.query(stats={"variance": (0, 1)})
@@ -0,0 +1,82 @@
+import json
+import subprocess
+import sys
+
+import pytest
+import yaml
+
+from Ammeters.launcher import config_with_ports, start_emulators
+from src import cli
+from src.utils.config import load_config
+
+
+@pytest.fixture(scope="module")
+def config_path(tmp_path_factory):
+    # Emulators on free ports, and a config.yaml pointing at them for --external runs.
+    raw = load_config("config/config.yaml")
+    with start_emulators(raw, ports={name: 0 for name in raw["ammeters"]}) as launcher:
+        path = tmp_path_factory.mktemp("config") / "config.yaml"
+        path.write_text(yaml.safe_dump(config_with_ports(raw, launcher.ports)), encoding="utf-8")
+        yield str(path)
+
+
+def test_startup_defers_heavy_imports():
+    code = (
+        "import sys\n"
+        "from src import cli\n"
+        "cli.build_parser().parse_args(['--count', '10', '--plot', '--analyze'])\n"
+        "print(sorted(m for m in ('numpy', 'matplotlib', 'pandas', 'src.testing') if m in sys.modules))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+
+@pytest.mark.parametrize("argv", [
+    ["--count", "5", "--duration", "1", "--frequency", "10"],
+    ["--duration", "1"],
+    ["--concurrency", "1", "4"],
+    ["--concurrency", "2", "--sync"],
+    ["--sync", "--format", "stream"],
+    ["--baseline", "x.json"],
+    ["--client", "pooled", "--client", "batch"],
+    ["--bench", "--count", "5"],
+    ["--ammeter", "nope", "--external"],
+])
+def test_rejects_conflicting_options(argv, capsys):
+    with pytest.raises(SystemExit) as e:
+        cli.main(argv)
+    assert e.value.code == 2
+    assert "error:" in capsys.readouterr().err
+
+
+def test_count_runs_save_results(config_path, tmp_path, capsys):
+    results_dir = tmp_path / "results"
+    assert cli.main([
+        "--config", config_path, "--results-dir", str(results_dir), "--external",
+        "--ammeter", "greenlee", "--ammeter", "entes", "--count", "20", "--format", "npy", "--analyze",
+    ]) == 0
+
+    out = capsys.readouterr().out
+    assert out.startswith("greenlee") and "\nentes" in out
+    assert len(list(results_dir.glob("*.meta.json"))) == 2
+    report = json.loads((results_dir / "comparison.json").read_text(encoding="utf-8"))
+    assert [run["label"] for run in report["runs"]] == ["greenlee", "entes"]
+
+
+def test_streaming_and_synchronized_runs(config_path, tmp_path):
+    results_dir = tmp_path / "results"
+    common = ["--config", config_path, "--results-dir", str(results_dir), "--external"]
+    assert cli.main([*common, "--ammeter", "circutor", "--duration", "0.3", "--frequency", "20", "--format", "stream"]) == 0
+    assert len(list(results_dir.glob("*.meta.json"))) == 1
+
+    assert cli.main([*common, "--sync", "--client", "pooled", "--count", "5", "--no-save"]) == 0
+    assert len(list(results_dir.glob("*.meta.json"))) == 1
+
+
+def test_bench(config_path, tmp_path, capsys):
+    assert cli.main([
+        "--config", config_path, "--external", "--bench", "--bench-dir", str(tmp_path),
+        "--ammeter", "greenlee", "--client", "pooled", "--concurrency", "1", "--duration", "0.2",
+    ]) == 0
+    assert "greenlee" in capsys.readouterr().out
+    assert len(list(tmp_path.glob("*.json"))) == 1
@@ -0,0 +1,129 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+from Ammeters.client import (
+    AmmeterConnection,
+    AsyncAmmeterConnection,
+    RetryPolicy,
+    request_current_from_ammeter,
+    request_current_from_ammeter_async,
+    with_retries,
+    with_retries_async,
+)
+from Ammeters.protocol import ProtocolError
+
+
+@pytest.fixture
+def silent_port():
+    # Accepts connections (via the backlog) but never answers.
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(("localhost", 0))
+    s.listen(8)
+    yield s.getsockname()[1]
+    s.close()
+
+
+@pytest.fixture
+def trickle_port():
+    # Answers every request in pieces, as a slow device on a congested link would.
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(("localhost", 0))
+    s.listen(8)
+
+    def serve():
+        while True:
+            try:
+                conn, _ = s.accept()
+            except OSError:
+                return
+            with conn:
+                request = conn.recv(1024)
+                framed = request.endswith(b"\n")
+                for piece in (b"1.", b"25", b"\n" if framed else b""):
+                    conn.sendall(piece)
+                    time.sleep(0.02)
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield s.getsockname()[1]
+    s.close()
+
+
+def test_one_shot_times_out_on_a_hung_device(silent_port):
+    started = time.perf_counter()
+    with pytest.raises(TimeoutError, match=str(silent_port)):
+        request_current_from_ammeter(silent_port, b"MEASURE", timeout=0.2)
+    assert time.perf_counter() - started < 1.0
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(request_current_from_ammeter_async(silent_port, b"MEASURE", timeout=0.2))
+
+
+def test_framed_connections_time_out_and_close(silent_port):
+    conn = AmmeterConnection(silent_port, timeout=0.2)
+    with pytest.raises(TimeoutError):
+        conn.request(b"MEASURE")
+    assert not conn.connected
+
+    async def run():
+        conn = AsyncAmmeterConnection(silent_port, timeout=0.2)
+        with pytest.raises(TimeoutError):
+            await conn.request(b"MEASURE")
+        assert not conn.connected
+
+    asyncio.run(run())
+
+
+def test_replies_are_read_until_complete(trickle_port):
+    assert request_current_from_ammeter(trickle_port, b"MEASURE") == 1.25
+    assert asyncio.run(request_current_from_ammeter_async(trickle_port, b"MEASURE")) == 1.25
+    with AmmeterConnection(trickle_port) as conn:
+        assert conn.request(b"MEASURE") == 1.25
+
+    async def run():
+        async with AsyncAmmeterConnection(trickle_port) as conn:
+            return await conn.request(b"MEASURE")
+
+    assert asyncio.run(run()) == 1.25
+
+
+def test_retries_back_off_and_give_up():
+    calls = []
+
+    def flaky(port, command):
+        calls.append(time.perf_counter())
+        if len(calls) < 3:
+            raise ConnectionRefusedError("not yet")
+        return 1.0
+
+    policy = RetryPolicy(attempts=3, backoff_seconds=0.02, jitter=0)
+    assert with_retries(flaky, policy)(0, b"") == 1.0
+    assert len(calls) == 3
+    assert calls[1] - calls[0] >= 0.02 and calls[2] - calls[1] >= 0.04
+
+    def refused(port, command):
+        calls.append(port)
+        raise ConnectionRefusedError
+
+    calls.clear()
+    with pytest.raises(ConnectionRefusedError):
+        asyncio.run(with_retries_async(_as_async(refused), RetryPolicy(attempts=4, backoff_seconds=0))(7, b""))
+    assert calls == [7] * 4
+
+    def error_reply(port, command):
+        calls.append(port)
+        raise ProtocolError("unknown command")
+
+    calls.clear()
+    with pytest.raises(ProtocolError):
+        with_retries(error_reply)(8, b"")
+    assert calls == [8]
+
+
+def _as_async(fn):
+    async def wrapper(*args):
+        return fn(*args)
+    return wrapper
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+import yaml
+
+from src.testing.ammeter_framework import AmmeterTestFramework
+from src.utils.config import get_config, load_config
+
+
+def _write(path, config, bump_ns=0):
+    path.write_text(yaml.safe_dump(config), encoding="utf-8")
+    if bump_ns:
+        # Make sure the rewrite is visible even on coarse-mtime filesystems.
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump_ns))
+
+
+def test_config_is_parsed_once_and_reparsed_on_change(tmp_path):
+    path = tmp_path / "config.yaml"
+    raw = load_config("config/config.yaml")
+    _write(path, raw)
+
+    config = get_config(path)
+    assert get_config(str(path)) is config
+    assert config.ammeter("greenlee").command_bytes == b"MEASURE_GREENLEE -get_measurement"
+    assert config.sampling.measurements_count == raw["testing"]["sampling"]["measurements_count"]
+    # load_config() hands out copies, so callers cannot corrupt the cache.
+    load_config(path)["ammeters"].clear()
+    assert "greenlee" in get_config(path).ammeters
+
+    raw["ammeters"]["greenlee"]["port"] = 6123
+    _write(path, raw, bump_ns=10_000_000)
+    reloaded = get_config(path)
+    assert reloaded is not config
+    assert reloaded.ammeter("greenlee").port == 6123
+
+    with pytest.raises(KeyError, match="Available"):
+        reloaded.ammeter("fluke")
+
+
+@pytest.mark.parametrize("edit, message", [
+    (lambda c: c["ammeters"]["entes"].update(port="5001x"), "ammeters.entes.port"),
+    (lambda c: c["ammeters"]["entes"].update(port=70000), "ammeters.entes.port"),
+    (lambda c: c["ammeters"]["entes"].pop("command"), "ammeters.entes.command"),
+    (lambda c: c["testing"]["sampling"].update(batch_size=2.5), "testing.sampling.batch_size"),
+    (lambda c: c["testing"]["scheduler"].update(overrun_policy="drop"), "testing.scheduler.overrun_policy"),
+    (lambda c: c["result_management"].update(format="NPY"), "result_management.format"),
+])
+def test_invalid_config_is_rejected(tmp_path, edit, message):
+    raw = load_config("config/config.yaml")
+    edit(raw)
+    path = tmp_path / "config.yaml"
+    _write(path, raw)
+    with pytest.raises(ValueError, match=message):
+        get_config(path)
+
+
+def test_framework_hot_reload(tmp_path):
+    path = tmp_path / "config.yaml"
+    raw = load_config("config/config.yaml")
+    _write(path, raw)
+    fixed = AmmeterTestFramework(str(path), results_dir=str(tmp_path / "results"))
+    live = AmmeterTestFramework(str(path), results_dir=str(tmp_path / "results"), hot_reload=True)
+
+    def run(fw):
+        return fw.run_test("entes", lambda port, command: float(port), save=False)
+
+    raw["ammeters"]["entes"]["port"] = 6001
+    raw["testing"]["sampling"]["measurements_count"] = 3
+    _write(path, raw, bump_ns=10_000_000)
+    assert run(fixed)["stats"]["mean"] == 5001.0
+    result = run(live)
+    assert result["stats"]["mean"] == 6001.0
+    assert result["sampling"]["measurements_count"] == 3
+
+    # A broken edit keeps the last good config.
+    path.write_text("ammeters: [", encoding="utf-8")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 20_000_000))
+    assert run(live)["stats"]["mean"] == 6001.0
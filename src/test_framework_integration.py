@@ -1,31 +1,57 @@
-import threading
+import asyncio
+import logging
+import os
+import signal
+import socket
 import time
+import numpy as np
 import pytest
 import yaml
 
 from src.testing.ammeter_framework import AmmeterTestFramework
-from Ammeters.Greenlee_Ammeter import GreenleeAmmeter
-from Ammeters.Entes_Ammeter import EntesAmmeter
-from Ammeters.Circutor_Ammeter import CircutorAmmeter
-from Ammeters.client import request_current_from_ammeter
+from src.testing.analysis import compare_runs, synchronized_runs
+from src.testing.campaign import build_matrix, run_campaign_pool
+from src.testing.catalog import ResultCatalog
+from Ammeters.base_ammeter import server_options
+from Ammeters.farm import SHARDING_MODES, EmulatorFarm
+from Ammeters.launcher import EmulatorLauncher, config_with_ports, start_emulators
+from Ammeters.registry import driver_class
+from Ammeters.client import (
+    AmmeterClientPool,
+    AmmeterConnection,
+    AsyncAmmeterConnection,
+    request_batch_from_ammeter,
+    request_current_from_ammeter,
+    request_current_from_ammeter_async,
+)
+from Ammeters.protocol import ProtocolError
+from src.utils.config import get_config, load_config
 
 
-AMMETERS = ["greenlee", "entes", "circutor"]
+# Every ammeter configured in config.yaml; their emulator classes are imported on demand.
+AMMETERS = list(get_config("config/config.yaml").ammeters)
 
 
-@pytest.fixture(scope="session", autouse=True)
+@pytest.fixture(scope="session")
 def emulators():
-    # Start emulators once for the whole test session
-    threading.Thread(target=lambda: GreenleeAmmeter(5000).start_server(), daemon=True).start()
-    threading.Thread(target=lambda: EntesAmmeter(5001).start_server(), daemon=True).start()
-    threading.Thread(target=lambda: CircutorAmmeter(5002).start_server(), daemon=True).start()
+    # Start emulators once for the whole test session, on free ports picked by the OS,
+    # so parallel sessions never collide. They are listening when start_emulators() returns.
+    with start_emulators(load_config("config/config.yaml"), ports={a: 0 for a in AMMETERS}) as launcher:
+        yield launcher.ports
 
-    time.sleep(2)  # give servers time to boot
+
+@pytest.fixture(scope="session")
+def config_path(emulators, tmp_path_factory):
+    # config.yaml pointing at this session's emulator ports
+    path = tmp_path_factory.mktemp("config") / "config.yaml"
+    config = config_with_ports(load_config("config/config.yaml"), emulators)
+    path.write_text(yaml.safe_dump(config), encoding="utf-8")
+    return str(path)
 
 
 @pytest.fixture
-def framework(tmp_path):
-    return AmmeterTestFramework("config/config.yaml", results_dir=str(tmp_path / "results"))
+def framework(tmp_path, config_path):
+    return AmmeterTestFramework(config_path, results_dir=str(tmp_path / "results"))
 
 
 @pytest.mark.parametrize("ammeter_type", AMMETERS)
@@ -74,6 +100,37 @@ def test_partial_sampling_params_raise(tmp_path):
         fw.run_test("greenlee", request_current_from_ammeter, total_duration_seconds=1, save=False)
 
 
+@pytest.mark.parametrize("batch_size", [0, 20_000])
+def test_batch_size_outside_protocol_limit_raises(tmp_path, batch_size):
+    cfg = {
+        "testing": {"sampling": {"measurements_count": 10, "batch_size": batch_size}},
+        "ammeters": {"greenlee": {"port": 5000, "command": "MEASURE_GREENLEE -get_measurement"}},
+    }
+    cfg_path = tmp_path / "config.yaml"
+    cfg_path.write_text(yaml.dump(cfg), encoding="utf-8")
+
+    fw = AmmeterTestFramework(str(cfg_path), results_dir=str(tmp_path / "results"))
+
+    # From config and per run, before any request is sent.
+    with pytest.raises(ValueError, match="10000"):
+        fw.run_test("greenlee", request_current_from_ammeter, get_batch=request_batch_from_ammeter, save=False)
+    with pytest.raises(ValueError, match="10000"):
+        fw.run_test("greenlee", request_current_from_ammeter, get_batch=request_batch_from_ammeter,
+                    batch_size=batch_size, measurements_count=10, save=False)
+
+
+def test_unknown_result_format_raises_before_sampling(framework):
+    def never_called(port, command):
+        raise AssertionError("sampled despite an invalid result_format")
+
+    with pytest.raises(ValueError, match="NPY"):
+        framework.run_test("greenlee", never_called, measurements_count=5, result_format="NPY")
+    with pytest.raises(ValueError, match="NPY"):
+        asyncio.run(framework.run_test_async("greenlee", never_called, measurements_count=5, result_format="NPY"))
+    with pytest.raises(ValueError, match="NPY"):
+        framework.run_synchronized(["greenlee", "entes"], never_called, measurements_count=5, result_format="NPY")
+
+
 def test_sampling_by_duration_and_frequency(framework):
     result = framework.run_test(
         "greenlee",
@@ -87,3 +144,297 @@ def test_sampling_by_duration_and_frequency(framework):
 
     # Windows timing is not exact, so don't assert an exact number
     assert len(measurements) >= 3
+
+
+def test_emulator_serves_many_clients_concurrently(emulators):
+    # Open every connection before sending anything: a one-at-a-time server would
+    # block on the first idle client and the later ones would time out.
+    clients = [socket.create_connection(("localhost", emulators["greenlee"]), timeout=5) for _ in range(50)]
+    try:
+        for c in reversed(clients):
+            c.sendall(b"MEASURE_GREENLEE -get_measurement")
+        replies = [float(c.recv(1024).decode("utf-8")) for c in clients]
+    finally:
+        for c in clients:
+            c.close()
+
+    assert len(replies) == 50
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_launcher_reports_port_and_stops_cleanly(concurrent):
+    launcher = EmulatorLauncher()
+    port = launcher.start("greenlee", driver_class("greenlee")(0, concurrent=concurrent))
+    assert port != 0 and launcher.ports == {"greenlee": port}
+    # Listening as soon as start() returns: no sleep needed.
+    assert request_current_from_ammeter(port, b"MEASURE_GREENLEE -get_measurement") > 0
+
+    (_, thread), = launcher._running.values()
+    launcher.stop(timeout=2)
+    assert not thread.is_alive()
+    assert not launcher.errors
+    with pytest.raises(OSError):
+        socket.create_connection(("localhost", port), timeout=1)
+
+
+def test_launcher_raises_when_port_is_taken(emulators):
+    config = load_config("config/config.yaml")
+    with pytest.raises(OSError):
+        start_emulators(config, ports={"entes": 0, "greenlee": emulators["greenlee"]})
+
+
+@pytest.mark.parametrize("sharding", SHARDING_MODES)
+def test_farm_workers_share_one_port(sharding):
+    if sharding == "reuseport" and not hasattr(socket, "SO_REUSEPORT"):
+        pytest.skip("SO_REUSEPORT not available")
+
+    with EmulatorFarm(workers=3, sharding=sharding) as farm:
+        port = farm.start("entes", driver_class("entes"), 0)
+        procs = farm.processes["entes"]
+        assert len(procs) == 3 and all(p.is_alive() for p in procs)
+        values = [request_current_from_ammeter(port, b"MEASURE_ENTES -get_data") for _ in range(30)]
+        assert all(v > 0 for v in values)
+    # terminate() is handled as a clean server shutdown.
+    assert [p.exitcode for p in procs] == [0, 0, 0]
+
+
+def test_farm_workers_ignore_ctrl_c():
+    with EmulatorFarm(workers=2) as farm:
+        port = farm.start("greenlee", driver_class("greenlee"), 0)
+        procs = farm.processes["greenlee"]
+        for proc in procs:
+            os.kill(proc.pid, signal.SIGINT)
+        time.sleep(0.2)
+        # Still serving: only the parent reacts to Ctrl-C, and stops them on exit.
+        assert all(p.is_alive() for p in procs)
+        assert request_current_from_ammeter(port, b"MEASURE_GREENLEE -get_measurement") > 0
+    assert [p.exitcode for p in procs] == [0, 0]
+
+
+def test_farm_raises_when_port_is_taken(emulators):
+    with EmulatorFarm(workers=2) as farm, pytest.raises(OSError):
+        farm.start("greenlee", driver_class("greenlee"), emulators["greenlee"])
+
+
+def test_server_options_from_config():
+    opts = server_options({"emulators": {"server": {"mode": "serial", "backlog": 16, "max_connections": 4}}})
+    assert opts == {"concurrent": False, "backlog": 16, "max_connections": 4, "trace_every": 1,
+                    "seed": None}
+
+    with pytest.raises(ValueError):
+        server_options({"emulators": {"server": {"mode": "threads"}}})
+    for cfg in ({"server": {"backlog": 0}}, {"server": {"max_connections": -1}}, {"logging": {"trace_every": 0}}):
+        with pytest.raises(ValueError, match="must be > 0"):
+            server_options({"emulators": cfg})
+    assert server_options({"emulators": {"server": {"backlog": None}}})["backlog"] == 128
+
+
+def test_measurement_trace_is_sampled_and_level_gated(caplog):
+    emulator = driver_class("greenlee")(0, trace_every=3)
+    with caplog.at_level(logging.INFO, logger="Ammeters"):
+        for _ in range(6):
+            emulator.measure_current()
+    assert not caplog.records
+
+    with caplog.at_level(logging.DEBUG, logger="Ammeters"):
+        for _ in range(6):
+            emulator.measure_current()
+    assert len(caplog.records) == 2
+
+
+@pytest.mark.parametrize("ammeter_type", AMMETERS)
+def test_seeded_emulators_replay_and_batch(ammeter_type):
+    emulator_cls = driver_class(ammeter_type)
+    first, second = emulator_cls(0, seed=1234), emulator_cls(0, seed=1234)
+    assert [first.measure_current() for _ in range(5)] == [second.measure_current() for _ in range(5)]
+
+    batch = first.measure_current_batch(1000)
+    assert batch.shape == (1000,) and batch.dtype == np.float64
+    assert np.array_equal(batch, second.measure_current_batch(1000))
+    assert (batch > 0).all()
+    assert not np.array_equal(batch, emulator_cls(0, seed=4321).measure_current_batch(1000))
+
+
+def test_persistent_connection_carries_many_requests(emulators):
+    with AmmeterConnection(emulators["entes"]) as conn:
+        values = [conn.request(b"MEASURE_ENTES -get_data") for _ in range(20)]
+
+        with pytest.raises(ProtocolError):
+            conn.request(b"MEASURE_ENTES -bogus")
+        # An error reply does not poison the connection.
+        values.append(conn.request(b"MEASURE_ENTES -get_data"))
+
+    assert len(values) == 21
+    assert all(v > 0 for v in values)
+
+
+def test_client_pool_reuses_connections_with_framework(framework, emulators):
+    port = emulators["circutor"]
+    with AmmeterClientPool() as pool:
+        result = framework.run_test("circutor", pool, measurements_count=10, save=False)
+        assert len(result["data"]["measurements"]) == 10
+        assert pool.idle_count(port) == 1
+
+        # Break the pooled socket behind the pool's back: the next call must reconnect.
+        conn, _ = pool._idle[port][0]
+        conn._sock.close()
+        assert pool(port, b"MEASURE_CIRCUTOR -get_measurement -current") > 0
+        assert pool.idle_count(port) == 1
+
+
+@pytest.mark.parametrize("ammeter_type", AMMETERS)
+def test_count_based_sampling_in_batches(framework, ammeter_type):
+    with AmmeterClientPool() as pool:
+        result = framework.run_test(
+            ammeter_type,
+            pool,
+            measurements_count=2500,
+            get_batch=pool.request_batch,
+            batch_size=1000,
+            save=False,
+        )
+
+    assert len(result["data"]["measurements"]) == 2500
+    assert len(result["data"]["timestamps_epoch"]) == 2500
+    assert result["sampling"]["batch_size"] == 1000
+
+
+def test_async_connection_with_emulator(emulators):
+    async def run():
+        async with AsyncAmmeterConnection(emulators["greenlee"]) as conn:
+            values = await asyncio.gather(*(conn.request(b"MEASURE_GREENLEE -get_measurement") for _ in range(10)))
+            batch = await conn.request_batch(b"MEASURE_GREENLEE -get_measurement", 100)
+            with pytest.raises(ProtocolError):
+                await conn.request(b"NOT_A_COMMAND")
+        return values, batch
+
+    values, batch = asyncio.run(run())
+    assert len(values) == 10 and all(v > 0 for v in values)
+    assert len(batch) == 100
+
+
+def test_one_shot_batch_request(emulators):
+    values = request_batch_from_ammeter(emulators["greenlee"], b"MEASURE_GREENLEE -get_measurement", 50)
+    assert len(values) == 50
+
+
+@pytest.mark.parametrize("count", [0, -1, 10_001])
+def test_invalid_batch_size_fails_before_sending(emulators, count):
+    # Every client path raises the same error instead of a silent drop or an error reply.
+    port, command = emulators["greenlee"], b"MEASURE_GREENLEE -get_measurement"
+    with pytest.raises(ValueError, match="between 1 and 10000"):
+        request_batch_from_ammeter(port, command, count)
+    with AmmeterConnection(port) as conn, pytest.raises(ValueError, match="between 1 and 10000"):
+        conn.request_batch(command, count)
+
+
+def test_run_test_async(framework):
+    result = asyncio.run(framework.run_test_async(
+        "entes",
+        request_current_from_ammeter_async,
+        measurements_count=5,
+        save=False,
+    ))
+
+    assert len(result["data"]["measurements"]) == 5
+    assert result["stats"]["min"] <= result["stats"]["mean"] <= result["stats"]["max"]
+
+
+def test_run_campaign_samples_ammeters_concurrently(framework):
+    results = framework.run_campaign(
+        AMMETERS,
+        request_current_from_ammeter_async,
+        total_duration_seconds=1.0,
+        sampling_frequency_hz=5.0,
+        save=True,
+    )
+
+    assert set(results) == set(AMMETERS)
+    assert all(len(r["data"]["measurements"]) >= 3 for r in results.values())
+    # The sampling windows overlap: every run started before any run took its last sample.
+    starts = [r["started_at_epoch"] for r in results.values()]
+    last_samples = [r["data"]["timestamps_epoch"][-1] for r in results.values()]
+    assert max(starts) < min(last_samples)
+    assert len(list(framework.results_dir.glob("*.json"))) == len(AMMETERS)
+
+
+def test_run_synchronized_samples_all_ammeters_on_shared_ticks(framework):
+    result = framework.run_synchronized(
+        AMMETERS,
+        request_current_from_ammeter,
+        total_duration_seconds=0.5,
+        sampling_frequency_hz=20.0,
+    )
+
+    data = result["data"]
+    ticks = len(data["timestamps_epoch"])
+    assert ticks == result["schedule"]["fired_samples"] >= 5
+    assert all(len(data[name]) == ticks for name in AMMETERS)
+    assert all(len(data[f"{name}_request_start_seconds"]) == ticks for name in AMMETERS)
+    assert set(result["stats"]["latency"]) == set(AMMETERS)
+    report = compare_runs(synchronized_runs(result), relative=False, metrics=["bias", "correlation"])
+    assert report["time_base"]["points"] == ticks
+
+    # Saved as one result and indexed with every sample counted once.
+    (row,) = framework.catalog.query()
+    assert row["ammeter_type"] == "greenlee+entes+circutor" and row["samples"] == ticks
+    assert synchronized_runs(framework.catalog.result_path(row))["entes"]["data"]["measurements"].tolist() == \
+        data["entes"].tolist()
+
+
+def test_run_synchronized_issues_requests_concurrently(framework):
+    def slow(port, command):
+        time.sleep(0.05)
+        return float(port)
+
+    result = framework.run_synchronized(AMMETERS, slow, measurements_count=6, save=False)
+    data = result["data"]
+
+    assert data["entes"].tolist() == [float(result["ammeters"]["entes"]["port"])] * 6
+    # On every tick the requests are in flight together: each one starts before any of them returns.
+    starts = np.vstack([data[f"{name}_request_start_seconds"] for name in AMMETERS])
+    responses = np.vstack([data[f"{name}_response_seconds"] for name in AMMETERS])
+    assert (starts.max(axis=0) < responses.min(axis=0)).all()
+    assert result["stats"]["start_spread"]["max_seconds"] < 0.05
+
+    with pytest.raises(ValueError, match="duplicates"):
+        framework.run_synchronized(["entes", "entes"], slow, measurements_count=1)
+
+
+def test_process_pool_campaign(tmp_path, config_path):
+    jobs = build_matrix(AMMETERS, [{"measurements_count": 20}, {"measurements_count": 50}], repetitions=2)
+    seen = []
+
+    report = run_campaign_pool(
+        jobs,
+        config_path=config_path,
+        results_dir=str(tmp_path / "results"),
+        max_workers=2,
+        progress=seen.append,
+    )
+
+    assert report["failed"] == []
+    assert len(report["jobs"]) == 12
+    assert [p.done for p in seen] == list(range(1, 13))
+    assert seen[-1].eta_seconds == 0
+    assert len(report["groups"]) == 6
+    assert all(g["runs"] == 2 for g in report["groups"])
+    # Every job was saved (and indexed) by its worker process.
+    assert len(ResultCatalog(tmp_path / "results").query()) == 12
+
+
+@pytest.mark.parametrize("client", ["one_shot", "pooled"])
+def test_socket_clients_report_phase_breakdown(tmp_path, config_path, client):
+    fw = AmmeterTestFramework(config_path, results_dir=str(tmp_path))
+    with AmmeterClientPool() as pool:
+        get = request_current_from_ammeter if client == "one_shot" else pool
+        result = fw.run_test("greenlee", get, measurements_count=20, save=False)
+
+    latency = result["stats"]["latency"]
+    for phase in ("connect", "send", "recv"):
+        assert latency[phase]["count"] == 20
+    assert latency["recv"]["max_seconds"] <= latency["request"]["max_seconds"]
+    if client == "pooled":
+        # Only the first request opens a connection.
+        assert np.count_nonzero(result["data"]["connect_seconds"]) == 1
+
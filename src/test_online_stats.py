@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from src.testing.ammeter_framework import AmmeterTestFramework
+from src.testing.buffers import StreamingBuffer
+from src.testing.online_stats import OnlineStats
+
+
+def test_online_stats_match_exact_statistics():
+    rng = np.random.default_rng(1234)
+    values = rng.normal(10.0, 2.0, 50_000)
+
+    stats = OnlineStats()
+    for x in values[:20_000]:
+        stats.update(float(x))
+    stats.update_many(values[20_000:])
+    summary = stats.summary()
+
+    assert summary["mean"] == pytest.approx(values.mean())
+    assert summary["std"] == pytest.approx(values.std())
+    assert summary["min"] == values.min() and summary["max"] == values.max()
+    # P-square quantiles are estimates; they should land close to the exact ones.
+    for key, q in (("p50", 50), ("p95", 95), ("p99", 99)):
+        assert summary[key] == pytest.approx(np.percentile(values, q), rel=0.01)
+
+
+def test_online_stats_exact_for_few_samples():
+    stats = OnlineStats()
+    for x in (3.0, 1.0, 2.0):
+        stats.update(x)
+    assert stats.summary()["median"] == 2.0
+
+
+def test_streaming_buffer_memory_is_bounded():
+    buf = StreamingBuffer(keep_samples=100)
+    for i in range(10_000):
+        buf.append(float(i), float(i))
+    buf.extend(np.arange(10_000, 20_000, dtype=float), np.arange(10_000, 20_000, dtype=float))
+
+    values, timestamps = buf.arrays()
+    assert len(buf) == 20_000
+    assert 50 <= len(values) <= 100
+    # Kept samples are evenly spaced across the whole run.
+    assert np.all(np.diff(values) == buf.stride)
+    assert buf.stats.summary()["max"] == 19_999.0
+
+
+def test_streaming_run_returns_same_stats_shape(tmp_path):
+    fw = AmmeterTestFramework("config/config.yaml", results_dir=str(tmp_path / "results"))
+
+    streamed = fw.run_test("greenlee", lambda port, command: 1.5, measurements_count=5000,
+                           streaming=True, keep_samples=0, save=True)
+    buffered = fw.run_test("greenlee", lambda port, command: 1.5, measurements_count=10, save=False)
+
+    assert streamed["stats"].keys() == buffered["stats"].keys()
+    assert streamed["stats"]["mean"] == pytest.approx(1.5)
+    assert len(streamed["data"]["measurements"]) == 0
+    assert streamed["streaming"]["samples_seen"] == 5000
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from src.testing.buffers import SampleBuffer
+from src.testing.plotting import decimate_minmax, load_run, plot_comparison, plot_single
+from src.testing.result_writer import StreamingResultWriter
+from src.testing.results_io import save_npy
+
+
+def test_decimation_keeps_extremes_in_time_order():
+    rng = np.random.default_rng(3)
+    n = 100_003
+    t = np.arange(n, dtype=np.float64) * 1e-3
+    y = rng.normal(size=n)
+    y[12_345], y[99_999] = 50.0, -50.0
+
+    td, yd = decimate_minmax(t, y, 640)
+
+    assert len(yd) <= 2 * 640 + 2
+    assert yd.max() == 50.0 and yd.min() == -50.0
+    assert np.all(np.diff(td) >= 0)
+    # Every kept point is a real sample.
+    np.testing.assert_array_equal(yd, y[np.rint(td * 1e3).astype(int)])
+
+
+def test_short_series_is_not_decimated():
+    t, y = np.arange(10.0), np.arange(10.0) ** 2
+    td, yd = decimate_minmax(t, y, 5)
+    np.testing.assert_array_equal(td, t)
+    np.testing.assert_array_equal(yd, y)
+    with pytest.raises(ValueError):
+        decimate_minmax(t, y[:-1], 5)
+
+
+def _result(run_id, ammeter_type, n):
+    t = 1_700_000_000.0 + np.arange(n) * 1e-3
+    return {
+        "run_id": run_id,
+        "ammeter_type": ammeter_type,
+        "data": {"measurements": np.sin(np.arange(n) / 100.0), "timestamps_epoch": t},
+    }
+
+
+def test_plots_memory_mapped_and_in_progress_runs(tmp_path):
+    saved = save_npy(_result("saved", "greenlee", 50_000), tmp_path)
+    assert isinstance(load_run(saved)["data"]["measurements"], np.memmap)
+
+    writer = StreamingResultWriter(tmp_path, "live", SampleBuffer(), meta={"ammeter_type": "entes"})
+    values = np.arange(5000, dtype=np.float64)
+    writer.extend(values, 1_700_000_000.0 + values)
+    writer.flush()
+    live = load_run(tmp_path / "live.index.json")
+    assert live["ammeter_type"] == "entes"
+    np.testing.assert_array_equal(live["data"]["measurements"], values)
+
+    plot_single(saved, tmp_path / "saved.png")
+    plot_comparison(
+        {"greenlee": saved, "entes": tmp_path / "live.index.json", "circutor": _result("mem", "circutor", 10)},
+        tmp_path / "comparison.png",
+    )
+    writer.abort()
+
+    assert (tmp_path / "saved.png").stat().st_size > 0
+    assert (tmp_path / "comparison.png").stat().st_size > 0
@@ -0,0 +1,59 @@
+import subprocess
+import sys
+
+import pytest
+import yaml
+
+from Ammeters import registry
+from Ammeters.base_ammeter import AmmeterEmulatorBase
+from Ammeters.client import request_current_from_ammeter
+from Ammeters.launcher import start_emulators
+from src.utils.config import get_config, load_config
+
+
+class FlukeAmmeter(AmmeterEmulatorBase):
+    # A meter type added purely through config.yaml (see test_config_adds_a_new_meter_type).
+    @property
+    def get_current_command(self) -> bytes:
+        return b"MEASURE_FLUKE -current"
+
+    def measure_current(self) -> float:
+        return 4.2
+
+
+def test_builtin_drivers_are_imported_lazily():
+    code = (
+        "import sys\n"
+        "from Ammeters.registry import driver_class\n"
+        "assert driver_class('entes').__name__ == 'EntesAmmeter'\n"
+        "print(sorted(m for m in sys.modules if m.endswith('_Ammeter')))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "['Ammeters.Entes_Ammeter']"
+
+
+def test_config_adds_a_new_meter_type(tmp_path):
+    raw = load_config("config/config.yaml")
+    raw["ammeters"] = {"fluke": {"port": 0, "command": "MEASURE_FLUKE -current", "driver": f"{__name__}:FlukeAmmeter"}}
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.safe_dump(raw), encoding="utf-8")
+    config = get_config(path)
+
+    assert registry.driver_class("fluke", config) is FlukeAmmeter
+    assert "fluke" in registry.available(config)
+    with start_emulators(raw) as launcher:
+        assert request_current_from_ammeter(launcher.ports["fluke"], b"MEASURE_FLUKE -current") == 4.2
+
+
+def test_register_and_unknown_names(monkeypatch):
+    monkeypatch.setattr(registry, "_registered", {})
+    with pytest.raises(KeyError, match="greenlee"):
+        registry.driver_class("fluke")
+
+    registry.register("fluke", FlukeAmmeter)
+    assert registry.driver_class("fluke") is FlukeAmmeter
+
+    with pytest.raises(ImportError):
+        registry.driver_class("x", {"ammeters": {"x": {"driver": "Ammeters.Entes_Ammeter:Nope"}}})
+    with pytest.raises(TypeError):
+        registry.driver_class("x", {"ammeters": {"x": {"driver": "Ammeters.client:RetryPolicy"}}})
@@ -0,0 +1,129 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.testing.ammeter_framework import AmmeterTestFramework
+from src.testing.buffers import SampleBuffer
+from src.testing import result_writer
+from src.testing.catalog import ResultCatalog
+from src.testing.online_stats import OnlineStats
+from src.testing.result_writer import StreamingResultWriter, read_index, recover_run
+from src.testing.results_io import load_result
+
+
+def test_streamed_run_is_finalized_as_npy(tmp_path):
+    fw = AmmeterTestFramework("config/config.yaml", results_dir=str(tmp_path))
+    values = iter(range(3000))
+
+    result = fw.run_test("greenlee", lambda port, command: next(values), measurements_count=3000,
+                         streaming=True, keep_samples=0, flush_interval_seconds=0.01)
+
+    loaded = load_result(tmp_path / f"{result['run_id']}.meta.json")
+    # Only the on-disk copy holds every sample; memory held none of them.
+    assert len(result["data"]["measurements"]) == 0
+    np.testing.assert_array_equal(loaded["data"]["measurements"], np.arange(3000))
+    assert loaded["stats"] == result["stats"]
+    assert not list(tmp_path.glob("*.part")) and not list(tmp_path.glob("*.index.json"))
+
+
+def test_interrupted_run_can_be_recovered(tmp_path):
+    fw = AmmeterTestFramework("config/config.yaml", results_dir=str(tmp_path))
+    calls = iter(range(100))
+
+    def flaky(port, command):
+        n = next(calls)
+        if n == 50:
+            raise KeyboardInterrupt
+        return float(n)
+
+    with pytest.raises(KeyboardInterrupt):
+        fw.run_test("entes", flaky, measurements_count=100, flush_interval_seconds=60)
+
+    (index_file,) = tmp_path.glob("*.index.json")
+    run_id = index_file.name.split(".")[0]
+    index = read_index(tmp_path, run_id)
+    assert index["status"] == "interrupted"
+    assert index["samples"] == 50
+
+    loaded = load_result(recover_run(tmp_path, run_id))
+    assert loaded["ammeter_type"] == "entes"
+    assert loaded["stats"]["max"] == 49.0
+    assert ResultCatalog(tmp_path).get(run_id)["samples"] == 50
+    np.testing.assert_array_equal(loaded["data"]["measurements"], np.arange(50))
+
+
+def test_recovery_reads_the_run_in_chunks(tmp_path, monkeypatch):
+    writer = StreamingResultWriter(tmp_path, "run", SampleBuffer(), flush_interval_seconds=60)
+    values = np.arange(50, dtype=np.float64)
+    writer.extend(values, values)
+    writer.abort()
+
+    chunks = []
+    update_many = OnlineStats.update_many
+    monkeypatch.setattr(result_writer, "COPY_CHUNK_SAMPLES", 16)
+    monkeypatch.setattr(OnlineStats, "update_many", lambda self, v: (chunks.append(len(v)), update_many(self, v)))
+
+    stats = load_result(recover_run(tmp_path, "run"))["stats"]
+    assert chunks == [16, 16, 16, 2]
+    assert (stats["min"], stats["max"]) == (0.0, 49.0)
+    assert stats["mean"] == pytest.approx(24.5) and stats["std"] == pytest.approx(values.std())
+
+
+def test_run_interrupted_before_first_flush_is_recovered_empty(tmp_path):
+    fw = AmmeterTestFramework("config/config.yaml", results_dir=str(tmp_path))
+
+    def interrupted(port, command):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        fw.run_test("entes", interrupted, measurements_count=100, flush_interval_seconds=60)
+
+    (index_file,) = tmp_path.glob("*.index.json")
+    run_id = index_file.name.split(".")[0]
+    assert read_index(tmp_path, run_id)["samples"] == 0
+
+    loaded = load_result(recover_run(tmp_path, run_id))
+    assert loaded["ammeter_type"] == "entes"
+    assert loaded["stats"] == {}
+    assert loaded["recovered"]["samples"] == 0
+    assert len(loaded["data"]["measurements"]) == 0
+    assert not list(tmp_path.glob("*.part")) and not list(tmp_path.glob("*.index.json"))
+
+
+def test_resume_discards_torn_tail(tmp_path):
+    writer = StreamingResultWriter(tmp_path, "run", SampleBuffer(), flush_interval_seconds=60)
+    for i in range(10):
+        writer.append(float(i), float(i))
+    writer.abort()
+    with open(tmp_path / "run.samples.part", "ab") as f:
+        f.write(b"\x00" * 5)  # half-written record from a crash
+
+    resumed = StreamingResultWriter(tmp_path, "run", SampleBuffer(), flush_interval_seconds=60, resume=True)
+    resumed.append(10.0, 10.0)
+    loaded = load_result(resumed.finalize({"run_id": "run", "data": {}, "stats": {}}))
+
+    np.testing.assert_array_equal(loaded["data"]["measurements"], np.arange(11))
+
+
+def test_batches_are_synced_per_interval_not_per_batch(tmp_path, monkeypatch):
+    fsyncs = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (fsyncs.append(fd), real_fsync(fd)))
+
+    writer = StreamingResultWriter(tmp_path, "run", SampleBuffer(), flush_interval_seconds=10, chunk_samples=65536)
+    for start in range(0, 200_000, 1000):
+        values = np.arange(start, start + 1000, dtype=np.float64)
+        writer.extend(values, values)
+    # Before the interval is up only a full chunk forces a sync: 200k samples fill it 3 times
+    # (each time with the batch that overflowed it written straight after).
+    assert len(fsyncs) == 3
+    assert read_index(tmp_path, "run")["samples"] == 3 * 66_000
+
+    # A batch bigger than the chunk is written straight through with one sync.
+    values = np.arange(200_000, 300_000, dtype=np.float64)
+    writer.extend(values, values)
+    assert len(fsyncs) == 4
+
+    loaded = load_result(writer.finalize({"run_id": "run", "data": {}, "stats": {}}))
+    np.testing.assert_array_equal(loaded["data"]["measurements"], np.arange(300_000))
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from src.testing.ammeter_framework import AmmeterTestFramework
+from src.testing.results_io import load_result
+
+
+@pytest.mark.parametrize("result_format", ["json", "npy"])
+def test_saved_result_round_trips(tmp_path, result_format):
+    fw = AmmeterTestFramework("config/config.yaml", results_dir=str(tmp_path))
+    values = iter(range(1, 101))
+
+    result = fw.run_test("entes", lambda port, command: next(values), measurements_count=100,
+                         save=False)
+    path = fw._save_result(result, result_format)
+    loaded = load_result(path)
+
+    assert loaded["run_id"] == result["run_id"]
+    assert loaded["stats"] == result["stats"]
+    np.testing.assert_array_equal(loaded["data"]["measurements"], result["data"]["measurements"])
+    np.testing.assert_array_equal(loaded["data"]["timestamps_epoch"], result["data"]["timestamps_epoch"])
+
+
+def test_npy_results_are_memory_mapped(tmp_path):
+    fw = AmmeterTestFramework("config/config.yaml", results_dir=str(tmp_path))
+
+    result = fw.run_test("greenlee", lambda port, command: 2.0, measurements_count=1000,
+                         result_format="npy")
+    meta = tmp_path / f"{result['run_id']}.meta.json"
+    assert meta.exists()
+    assert (tmp_path / f"{result['run_id']}.measurements.npy").exists()
+
+    loaded = load_result(meta)
+    assert isinstance(loaded["data"]["measurements"], np.memmap)
+    assert loaded["data"]["measurements"].dtype == np.float64
+    assert len(loaded["data"]["timestamps_epoch"]) == 1000
@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from src.testing.ammeter_framework import AmmeterTestFramework
+from src.testing.scheduler import SampleScheduler
+
+
+def test_scheduler_hits_target_count_at_1khz():
+    scheduler = SampleScheduler(1000.0, 0.2, overrun_policy="catch_up")
+
+    started = time.perf_counter()
+    ticks = list(scheduler.ticks())
+    elapsed = time.perf_counter() - started
+
+    assert len(ticks) == 200
+    assert [t.index for t in ticks] == list(range(200))
+    # Deadlines are absolute, so the run ends on the last tick, not later.
+    assert elapsed == pytest.approx(0.2, abs=0.05)
+    assert all(t.jitter_ns >= 0 for t in ticks)
+
+
+@pytest.mark.parametrize("policy", ["skip", "record"])
+def test_overrun_drops_overdue_ticks(policy):
+    scheduler = SampleScheduler(100.0, 0.1, overrun_policy=policy)
+
+    fired = []
+    for tick in scheduler.ticks():
+        fired.append(tick.index)
+        if tick.index == 2:
+            time.sleep(0.045)  # overrun by several periods
+
+    report = scheduler.report()
+    assert len(fired) + report["missed_samples"] == 10
+    assert report["missed_samples"] >= 3
+    if policy == "record":
+        assert report["missed_ticks"] == [i for i in range(10) if i not in fired]
+    else:
+        assert report["missed_ticks"] == []
+
+
+def test_record_policy_only_counts_without_keep_jitter():
+    # Streaming runs: a run that falls behind must not grow a list of missed ticks.
+    scheduler = SampleScheduler(100.0, 0.1, overrun_policy="record", keep_jitter=False)
+
+    fired = []
+    for tick in scheduler.ticks():
+        fired.append(tick.index)
+        if tick.index == 2:
+            time.sleep(0.045)
+
+    report = scheduler.report()
+    assert len(fired) + report["missed_samples"] == 10
+    assert report["missed_samples"] >= 3
+    assert scheduler.missed == []
+    assert "missed_ticks" not in report
+
+
+def test_catch_up_fires_every_tick_after_overrun():
+    scheduler = SampleScheduler(100.0, 0.1, overrun_policy="catch_up")
+
+    fired = []
+    for tick in scheduler.ticks():
+        fired.append(tick.index)
+        if tick.index == 2:
+            time.sleep(0.045)
+
+    assert fired == list(range(10))
+    assert scheduler.report()["missed_samples"] == 0
+
+
+def test_invalid_overrun_policy():
+    with pytest.raises(ValueError):
+        SampleScheduler(10.0, 1.0, overrun_policy="drop")
+
+
+def test_time_based_run_records_schedule_and_jitter(tmp_path):
+    fw = AmmeterTestFramework("config/config.yaml", results_dir=str(tmp_path / "results"))
+
+    result = fw.run_test(
+        "greenlee",
+        lambda port, command: 1.0,
+        total_duration_seconds=0.5,
+        sampling_frequency_hz=200.0,
+        overrun_policy="catch_up",
+        save=False,
+    )
+
+    assert len(result["data"]["measurements"]) == 100
+    assert len(result["data"]["jitter_seconds"]) == 100
+    assert result["schedule"]["target_samples"] == 100
+    assert result["schedule"]["overrun_policy"] == "catch_up"
+    timestamps = result["data"]["timestamps_epoch"]
+    assert all(b > a for a, b in zip(timestamps, timestamps[1:]))
@@ -0,0 +1,80 @@
+import time
+
+import numpy as np
+import pytest
+
+from Ammeters.client import PhaseTimes, capture_phases
+from src.testing.ammeter_framework import AmmeterTestFramework
+from src.testing.timing import LatencyHistogram, RequestTimer
+
+
+def test_histogram_percentiles_are_close_to_exact():
+    rng = np.random.default_rng(7)
+    latencies = rng.lognormal(mean=np.log(200_000), sigma=0.5, size=20_000).astype(np.int64)
+    hist = LatencyHistogram()
+    for ns in latencies:
+        hist.add(int(ns))
+
+    summary = hist.summary()
+    assert summary["count"] == len(latencies)
+    assert summary["min_seconds"] == latencies.min() / 1e9
+    assert summary["max_seconds"] == latencies.max() / 1e9
+    for p in (50, 90, 99):
+        assert summary[f"p{p}_seconds"] == pytest.approx(np.percentile(latencies, p) / 1e9, rel=0.12)
+    assert sum(summary["histogram"]["counts"]) == len(latencies)
+    assert len(summary["histogram"]["edges_seconds"]) == len(summary["histogram"]["counts"]) + 1
+
+
+def test_timer_reads_and_resets_phases():
+    timer = RequestTimer()
+    with timer.capture() as phases:
+        phases.mark(0, 10, 15, 40)
+        timer.record(100, 200)
+        timer.record(300, 350, deadline_ns=290)
+
+    stats = timer.stats()
+    assert stats["request"]["count"] == 2
+    assert stats["scheduler_lag"]["count"] == 1
+    assert stats["connect"]["count"] == 1 and stats["recv"]["max_seconds"] == 25e-9
+
+    data = timer.arrays()
+    assert np.isnan(data["deadline_seconds"][0]) and not np.isnan(data["deadline_seconds"][1])
+    assert data["connect_seconds"][0] == 10e-9 and np.isnan(data["connect_seconds"][1])
+
+
+def test_capture_phases_is_scoped():
+    times = PhaseTimes()
+    with capture_phases(times):
+        pass
+    assert times.connect_ns == times.send_ns == times.recv_ns == -1
+
+
+def test_run_results_carry_request_timing(tmp_path):
+    fw = AmmeterTestFramework("config/config.yaml", results_dir=str(tmp_path))
+
+    def slow(port, command):
+        time.sleep(0.002)
+        return 1.0
+
+    # catch_up fires every tick even if the machine is busy, so the counts below are exact.
+    result = fw.run_test("greenlee", slow, total_duration_seconds=0.1, sampling_frequency_hz=100,
+                         overrun_policy="catch_up", save=False)
+    latency = result["stats"]["latency"]
+    assert latency["request"]["count"] == 10
+    assert latency["request"]["p50_seconds"] >= 0.002
+    assert latency["scheduler_lag"]["count"] == 10
+    # A stub reports no socket phases.
+    assert "connect" not in latency and "connect_seconds" not in result["data"]
+
+    data = result["data"]
+    assert len(data["request_start_seconds"]) == len(data["response_seconds"]) == len(data["deadline_seconds"]) == 10
+    assert (data["response_seconds"] - data["request_start_seconds"] >= 0.002).all()
+    assert (data["request_start_seconds"] >= data["deadline_seconds"]).all()
+
+
+def test_streaming_runs_keep_only_histograms(tmp_path):
+    fw = AmmeterTestFramework("config/config.yaml", results_dir=str(tmp_path))
+    result = fw.run_test("greenlee", lambda port, command: 1.0, measurements_count=500,
+                         streaming=True, keep_samples=0, save=False)
+    assert result["stats"]["latency"]["request"]["count"] == 500
+    assert "request_start_seconds" not in result["data"]
@@ -1,25 +1,79 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import time
 import uuid
-import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from statistics import mean, median, pstdev
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, Optional, Callable, Sequence, Awaitable, Union
 
-from src.utils.config import load_config
+import numpy as np
+
+from Ammeters.protocol import MAX_BATCH_SIZE
+from src.testing.buffers import SampleBuffer, StreamingBuffer, summarize
+from src.testing.catalog import ResultCatalog
+from src.testing.result_writer import StreamingResultWriter
+from src.testing.results_io import RESULT_FORMATS, save_result
+from src.testing.scheduler import DEFAULT_SPIN_THRESHOLD_NS, SampleScheduler
+from src.testing.timing import RequestTimer
+from src.utils.config import AmmeterSpec, Config, get_config
 
 
 # Injectable "measurement function" so the framework stays generic and testable.
 # It can be the real socket client, a stub, or any other backend.
 MeasurementFn = Callable[[int, bytes], float]
 
+# Optional batch counterpart: (port, command, count) -> `count` measurements in one round trip.
+# Used for count-based sampling when provided, e.g. Ammeters.client.request_batch_from_ammeter.
+BatchMeasurementFn = Callable[[int, bytes, int], Sequence[float]]
+
+# Async variant for run_test_async()/run_campaign(), e.g. Ammeters.client.request_current_from_ammeter_async.
+AsyncMeasurementFn = Callable[[int, bytes], Awaitable[float]]
+
+# Either sink can back a run: full arrays, or constant-memory streaming stats.
+Buffer = Union[SampleBuffer, StreamingBuffer]
+
+DEFAULT_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
 
 class AmmeterTestFramework:
-    def __init__(self, config_path: str = "config/config.yaml", results_dir: str = "results"):
-        self.config = load_config(config_path)
+    def __init__(
+        self,
+        config_path: str = "config/config.yaml",
+        results_dir: str = "results",
+        *,
+        hot_reload: bool = False,
+    ):
+        """
+        The config comes from the src.utils.config cache, so frameworks are
+        cheap to create. With `hot_reload=True` every run first picks up edits
+        to the config file (an invalid edit is logged and the previous config kept).
+        """
+        self.config_path = config_path
+        self.hot_reload = hot_reload
+        self._settings: Config = get_config(config_path)
         self.results_dir = Path(results_dir)
         self.results_dir.mkdir(parents=True, exist_ok=True)
+        # SQLite index of saved runs (see src.testing.catalog); on unless disabled in config.
+        self.catalog: Optional[ResultCatalog] = ResultCatalog(self.results_dir) if self._settings.catalog else None
+
+    @property
+    def settings(self) -> Config:
+        """Typed config used by the runs (re-checked for edits with hot_reload)."""
+        if self.hot_reload:
+            try:
+                self._settings = get_config(self.config_path)
+            except (OSError, ValueError) as e:
+                logger.warning("Keeping the previous config; reloading %s failed: %s", self.config_path, e)
+        return self._settings
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """Raw config.yaml document (shared, read-only)."""
+        return self._settings.raw
 
     def run_test(
         self,
@@ -29,7 +83,14 @@ class AmmeterTestFramework:
         measurements_count: Optional[int] = None,
         total_duration_seconds: Optional[float] = None,
         sampling_frequency_hz: Optional[float] = None,
+        get_batch: Optional[BatchMeasurementFn] = None,
+        batch_size: Optional[int] = None,
+        overrun_policy: Optional[str] = None,
+        streaming: bool = False,
+        keep_samples: Optional[int] = None,
         save: bool = True,
+        result_format: Optional[str] = None,
+        flush_interval_seconds: Optional[float] = None,
     ) -> Dict[str, Any]:
         """
         Run a sampling session for a given ammeter type and return a result dict.
@@ -37,41 +98,357 @@ class AmmeterTestFramework:
         Supports both:
         - count-based sampling (measurements_count)
         - time-based sampling (total_duration_seconds + sampling_frequency_hz)
+
+        For count-based sampling, passing `get_batch` fetches up to `batch_size`
+        measurements per round trip instead of one.
+
+        Time-based sampling runs on a SampleScheduler; `overrun_policy` picks what
+        happens to ticks missed because a sample took longer than a period.
+
+        With `streaming=True` memory stays constant however long the run is:
+        stats are computed incrementally and only `keep_samples` raw samples
+        (evenly decimated, default from testing.streaming) are kept in `data`.
+
+        Every request is timed (see src.testing.timing): latency histograms go
+        to result["stats"]["latency"] and, unless streaming, per-request
+        start/response/deadline and connect/send/recv columns to result["data"].
+
+        Saved results use `result_format` ("json" or "npy", see
+        src.testing.results_io), defaulting to result_management.format.
+        With `flush_interval_seconds` (default result_management.flush_interval_seconds)
+        samples are also appended to disk during the run by a StreamingResultWriter,
+        and the final result is always written in the "npy" format.
         """
-        am_cfg = self._get_ammeter_cfg(ammeter_type)
-        port = int(am_cfg["port"])
-        command = am_cfg["command"].encode("utf-8") if isinstance(am_cfg["command"], str) else am_cfg["command"]
+        port, command, sampling = self._resolve_run(
+            ammeter_type,
+            measurements_count=measurements_count,
+            total_duration_seconds=total_duration_seconds,
+            sampling_frequency_hz=sampling_frequency_hz,
+            batch_size=batch_size,
+            result_format=result_format,
+        )
+        if get_batch is None or sampling["measurements_count"] is None:
+            sampling["batch_size"] = None
+        scheduler = self._make_scheduler(sampling, overrun_policy, streaming)
+        buffer = self._make_buffer(sampling, scheduler, streaming, keep_samples)
 
-        # Allow config-driven defaults, while still letting callers override per run.
-        sampling_defaults = (self.config.get("testing", {})
-                               .get("sampling", {}))
+        run_id = str(uuid.uuid4())
+        started_at = time.time()
+        # Per-request timing; streaming runs keep only its histograms.
+        timer = RequestTimer(keep_samples=not streaming)
+        writer = self._open_writer(
+            run_id, started_at, ammeter_type, port, command, sampling, buffer, save, flush_interval_seconds,
+        )
+
+        try:
+            self._sample(
+                port=port,
+                command=command,
+                get_measurement=get_measurement,
+                buffer=writer if writer is not None else buffer,
+                measurements_count=sampling["measurements_count"],
+                scheduler=scheduler,
+                timer=timer,
+                get_batch=get_batch,
+                batch_size=sampling["batch_size"] or DEFAULT_BATCH_SIZE,
+            )
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+
+        result = self._build_result(
+            run_id, started_at, ammeter_type, port, command, sampling, buffer, scheduler, timer,
+        )
 
-        def pick(name, current):
-            return current if current is not None else sampling_defaults.get(name)
+        if writer is not None:
+            self._record(result, writer.finalize(result))
+        elif save:
+            self._save_result(result, result_format)
 
-        measurements_count = pick("measurements_count", measurements_count)
-        total_duration_seconds = pick("total_duration_seconds", total_duration_seconds)
-        sampling_frequency_hz = pick("sampling_frequency_hz", sampling_frequency_hz)
+        return result
 
-        self._validate_sampling_args(
+    async def run_test_async(
+        self,
+        ammeter_type: str,
+        get_measurement: AsyncMeasurementFn,
+        *,
+        measurements_count: Optional[int] = None,
+        total_duration_seconds: Optional[float] = None,
+        sampling_frequency_hz: Optional[float] = None,
+        overrun_policy: Optional[str] = None,
+        streaming: bool = False,
+        keep_samples: Optional[int] = None,
+        save: bool = True,
+        result_format: Optional[str] = None,
+        flush_interval_seconds: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Asyncio counterpart of run_test(), driven by an async measurement function
+        (e.g. Ammeters.client.request_current_from_ammeter_async). While one
+        request is in flight the event loop is free to sample other ammeters.
+        """
+        port, command, sampling = self._resolve_run(
+            ammeter_type,
             measurements_count=measurements_count,
             total_duration_seconds=total_duration_seconds,
             sampling_frequency_hz=sampling_frequency_hz,
+            result_format=result_format,
         )
+        sampling["batch_size"] = None
+        scheduler = self._make_scheduler(sampling, overrun_policy, streaming)
+        buffer = self._make_buffer(sampling, scheduler, streaming, keep_samples)
 
         run_id = str(uuid.uuid4())
         started_at = time.time()
+        # Per-request timing; streaming runs keep only its histograms.
+        timer = RequestTimer(keep_samples=not streaming)
+        writer = self._open_writer(
+            run_id, started_at, ammeter_type, port, command, sampling, buffer, save, flush_interval_seconds,
+        )
+
+        try:
+            await self._sample_async(
+                port=port,
+                command=command,
+                get_measurement=get_measurement,
+                buffer=writer if writer is not None else buffer,
+                measurements_count=sampling["measurements_count"],
+                scheduler=scheduler,
+                timer=timer,
+            )
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+
+        result = self._build_result(
+            run_id, started_at, ammeter_type, port, command, sampling, buffer, scheduler, timer,
+        )
 
-        measurements, timestamps = self._sample(
-            port=port,
-            command=command,
-            get_measurement=get_measurement,
+        if writer is not None:
+            self._record(result, await asyncio.to_thread(writer.finalize, result))
+        elif save:
+            await asyncio.to_thread(self._save_result, result, result_format)
+
+        return result
+
+    def run_synchronized(
+        self,
+        ammeter_types: Sequence[str],
+        get_measurement: MeasurementFn,
+        *,
+        measurements_count: Optional[int] = None,
+        total_duration_seconds: Optional[float] = None,
+        sampling_frequency_hz: Optional[float] = None,
+        overrun_policy: Optional[str] = None,
+        save: bool = True,
+        result_format: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Sample several ammeters on the same ticks of one monotonic clock.
+
+        Every tick sends one request to each ammeter at once, from one worker
+        thread per ammeter, so a tick costs about one round trip however many
+        ammeters take part. The result has a single `timestamps_epoch` column
+        (the tick's firing time) and one measurement column per ammeter under
+        its name in `data`, with per-ammeter stats and latency under `stats`.
+        `start_spread_seconds` records how far apart the requests of each tick
+        actually started. See src.testing.analysis.synchronized_runs() to
+        compare the columns.
+
+        Sampling arguments work as in run_test(); count-based runs fire the
+        ticks back to back. Synchronized runs are kept in memory (no streaming).
+        """
+        names = list(ammeter_types)
+        if not names:
+            raise ValueError("ammeter_types must not be empty")
+        if len(set(names)) != len(names):
+            raise ValueError("ammeter_types must not contain duplicates")
+
+        targets: Dict[str, tuple[int, bytes]] = {}
+        for name in names:
+            port, command, sampling = self._resolve_run(
+                name,
+                measurements_count=measurements_count,
+                total_duration_seconds=total_duration_seconds,
+                sampling_frequency_hz=sampling_frequency_hz,
+                result_format=result_format,
+            )
+            targets[name] = (port, command)
+        sampling["batch_size"] = None
+        scheduler = self._make_scheduler(sampling, overrun_policy)
+        expected = sampling["measurements_count"] if scheduler is None else scheduler.total_ticks
+
+        run_id = str(uuid.uuid4())
+        started_at = time.time()
+        clock = RequestTimer()
+        # All timers share one clock anchor, so their columns line up.
+        timers = {name: RequestTimer(origin=clock) for name in names}
+        buffers = {name: SampleBuffer(expected) for name in names}
+
+        def take(name: str, deadline_ns: Optional[int]) -> float:
+            port, command = targets[name]
+            timer = timers[name]
+            with timer.capture():
+                start_ns = time.perf_counter_ns()
+                value = float(get_measurement(port, command))
+                end_ns = time.perf_counter_ns()
+                timer.record(start_ns, end_ns, deadline_ns)
+            return value
+
+        with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="sync-sample") as pool:
+            def take_all(ts: float, deadline_ns: Optional[int] = None) -> None:
+                futures = [pool.submit(take, name, deadline_ns) for name in names]
+                for name, future in zip(names, futures):
+                    buffers[name].append(future.result(), ts)
+
+            if scheduler is None:
+                for _ in range(expected):
+                    take_all(clock.to_epoch(time.perf_counter_ns()))
+            else:
+                for tick in scheduler.ticks():
+                    take_all(clock.to_epoch(tick.fired_ns), tick.deadline_ns)
+
+        columns = {name: buffer.arrays()[0] for name, buffer in buffers.items()}
+        timestamps = buffers[names[0]].arrays()[1]
+        timing = {name: timer.arrays() for name, timer in timers.items()}
+        starts = np.vstack([timing[name]["request_start_seconds"] for name in names])
+        spread = starts.max(axis=0) - starts.min(axis=0)
+
+        result: Dict[str, Any] = {
+            "run_id": run_id,
+            "started_at_epoch": started_at,
+            "ammeter_type": "+".join(names),
+            "synchronized": names,
+            "ammeters": {
+                name: {"port": port, "command": command.decode(errors="replace")}
+                for name, (port, command) in targets.items()
+            },
+            "sampling": sampling,
+            "data": {
+                "timestamps_epoch": timestamps,
+                **columns,
+                "start_spread_seconds": spread,
+                **{f"{name}_{key}": values for name, arrays in timing.items() for key, values in arrays.items()},
+            },
+            "stats": {
+                **{name: self._summarize(values) for name, values in columns.items()},
+                "latency": {name: timer.stats() for name, timer in timers.items()},
+                "start_spread": {
+                    "mean_seconds": float(spread.mean()),
+                    "max_seconds": float(spread.max()),
+                },
+            },
+            "timing": {"origin_epoch": clock.origin_epoch},
+        }
+        if scheduler is not None:
+            result["schedule"] = scheduler.report()
+
+        if save:
+            self._save_result(result, result_format)
+        return result
+
+    async def run_campaign_async(
+        self,
+        ammeter_types: Sequence[str],
+        get_measurement: AsyncMeasurementFn,
+        *,
+        save: bool = True,
+        **sampling: Any,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Sample several ammeter types concurrently; returns {ammeter_type: result}."""
+        results = await asyncio.gather(*(
+            self.run_test_async(ammeter_type, get_measurement, save=save, **sampling)
+            for ammeter_type in ammeter_types
+        ))
+        return dict(zip(ammeter_types, results))
+
+    def run_campaign(
+        self,
+        ammeter_types: Sequence[str],
+        get_measurement: AsyncMeasurementFn,
+        *,
+        save: bool = True,
+        **sampling: Any,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Blocking entry point for run_campaign_async(): all ammeters are sampled in
+        one event loop, so the campaign takes as long as its slowest run rather
+        than the sum of all runs.
+        """
+        return asyncio.run(self.run_campaign_async(ammeter_types, get_measurement, save=save, **sampling))
+
+    def _resolve_run(
+        self,
+        ammeter_type: str,
+        *,
+        measurements_count: Optional[int],
+        total_duration_seconds: Optional[float],
+        sampling_frequency_hz: Optional[float],
+        batch_size: Optional[int] = None,
+        result_format: Optional[str] = None,
+    ) -> tuple[int, bytes, Dict[str, Any]]:
+        """
+        Look up the ammeter and merge per-run sampling args with the config
+        defaults. This is where a hot-reloading framework picks up config edits;
+        the rest of the run uses the same snapshot.
+        """
+        settings = self.settings
+        spec = self._get_ammeter_cfg(ammeter_type)
+        port, command = spec.port, spec.command_bytes
+
+        # Allow config-driven defaults, while still letting callers override per run.
+        defaults = settings.sampling
+
+        # An explicit duration/frequency selects time-based sampling, so it must
+        # not be overridden by a default measurements_count from the config.
+        if measurements_count is None and total_duration_seconds is None and sampling_frequency_hz is None:
+            measurements_count = defaults.measurements_count
+        if total_duration_seconds is None:
+            total_duration_seconds = defaults.total_duration_seconds
+        if sampling_frequency_hz is None:
+            sampling_frequency_hz = defaults.sampling_frequency_hz
+        if batch_size is None:
+            batch_size = defaults.batch_size if defaults.batch_size is not None else DEFAULT_BATCH_SIZE
+        batch_size = int(batch_size)
+        # The emulators reject larger batches, so fail here rather than mid-run.
+        if not 0 < batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}")
+        # Checked before sampling so a typo cannot throw a finished run away at save time.
+        if result_format is not None and result_format not in RESULT_FORMATS:
+            raise ValueError(f"Unknown result format {result_format!r}. Expected one of {', '.join(RESULT_FORMATS)}")
+
+        self._validate_sampling_args(
             measurements_count=measurements_count,
             total_duration_seconds=total_duration_seconds,
             sampling_frequency_hz=sampling_frequency_hz,
         )
 
-        stats = self._summarize(measurements)
+        return port, command, {
+            "measurements_count": measurements_count,
+            "total_duration_seconds": total_duration_seconds,
+            "sampling_frequency_hz": sampling_frequency_hz,
+            "batch_size": batch_size,
+        }
+
+    def _build_result(
+        self,
+        run_id: str,
+        started_at: float,
+        ammeter_type: str,
+        port: int,
+        command: bytes,
+        sampling: Dict[str, Any],
+        buffer: Buffer,
+        scheduler: Optional[SampleScheduler] = None,
+        timer: Optional[RequestTimer] = None,
+    ) -> Dict[str, Any]:
+        measurements, timestamps = buffer.arrays()
+        if isinstance(buffer, StreamingBuffer):
+            stats = buffer.stats.summary()
+        else:
+            stats = self._summarize(measurements)
 
         result: Dict[str, Any] = {
             "run_id": run_id,
@@ -81,11 +458,7 @@ class AmmeterTestFramework:
                 "port": port,
                 "command": command.decode(errors="replace"),
             },
-            "sampling": {
-                "measurements_count": measurements_count,
-                "total_duration_seconds": total_duration_seconds,
-                "sampling_frequency_hz": sampling_frequency_hz,
-            },
+            "sampling": sampling,
             "data": {
                 "measurements": measurements,
                 "timestamps_epoch": timestamps,
@@ -93,19 +466,95 @@ class AmmeterTestFramework:
             "stats": stats,
         }
 
-        if save:
-            self._save_result(result)
+        if scheduler is not None:
+            result["schedule"] = scheduler.report()
+            if scheduler.keep_jitter:
+                result["data"]["jitter_seconds"] = np.asarray(scheduler.jitter_ns, dtype=np.float64) / 1e9
+
+        if timer is not None:
+            stats["latency"] = timer.stats()
+            # Start/response/deadline columns are seconds after this epoch time.
+            result["timing"] = {"origin_epoch": timer.origin_epoch}
+            result["data"].update(timer.arrays())
+
+        if isinstance(buffer, StreamingBuffer):
+            result["streaming"] = {
+                "samples_seen": len(buffer),
+                "samples_kept": buffer.kept,
+                "keep_every": buffer.stride,
+            }
 
         return result
 
+    def _make_buffer(
+        self,
+        sampling: Dict[str, Any],
+        scheduler: Optional[SampleScheduler],
+        streaming: bool,
+        keep_samples: Optional[int],
+    ) -> Buffer:
+        if streaming:
+            if keep_samples is None:
+                keep_samples = self._settings.keep_samples
+            return StreamingBuffer(int(keep_samples))
+
+        expected = sampling["measurements_count"]
+        return SampleBuffer(expected if expected is not None else scheduler.total_ticks)
+
+    def _open_writer(
+        self,
+        run_id: str,
+        started_at: float,
+        ammeter_type: str,
+        port: int,
+        command: bytes,
+        sampling: Dict[str, Any],
+        buffer: Buffer,
+        save: bool,
+        flush_interval_seconds: Optional[float],
+    ) -> Optional[StreamingResultWriter]:
+        if flush_interval_seconds is None:
+            flush_interval_seconds = self._settings.flush_interval_seconds
+        if not save or flush_interval_seconds is None:
+            return None
+
+        # Enough metadata in the index for recover_run() to rebuild the result header.
+        meta = {
+            "started_at_epoch": started_at,
+            "ammeter_type": ammeter_type,
+            "ammeter": {"port": port, "command": command.decode(errors="replace")},
+            "sampling": sampling,
+        }
+        return StreamingResultWriter(
+            self.results_dir,
+            run_id,
+            buffer,
+            flush_interval_seconds=float(flush_interval_seconds),
+            meta=meta,
+        )
 
+    def _make_scheduler(
+        self,
+        sampling: Dict[str, Any],
+        overrun_policy: Optional[str],
+        streaming: bool = False,
+    ) -> Optional[SampleScheduler]:
+        """Build the tick source for time-based runs (None for count-based runs)."""
+        if sampling["measurements_count"] is not None:
+            return None
+
+        spin_us = self._settings.spin_threshold_us
+        return SampleScheduler(
+            float(sampling["sampling_frequency_hz"]),
+            float(sampling["total_duration_seconds"]),
+            overrun_policy=overrun_policy or self._settings.overrun_policy or "record",
+            spin_threshold_ns=int(spin_us * 1000) if spin_us is not None else DEFAULT_SPIN_THRESHOLD_NS,
+            # Per-sample jitter grows with the run, so streaming runs only keep its summary.
+            keep_jitter=not streaming,
+        )
 
-    def _get_ammeter_cfg(self, ammeter_type: str) -> Dict[str, Any]:
-        try:
-            return self.config["ammeters"][ammeter_type]
-        except KeyError as e:
-            available = ", ".join(sorted(self.config.get("ammeters", {}).keys()))
-            raise KeyError(f"Unknown ammeter_type={ammeter_type!r}. Available: {available}") from e
+    def _get_ammeter_cfg(self, ammeter_type: str) -> AmmeterSpec:
+        return self._settings.ammeter(ammeter_type)
 
     def _validate_sampling_args(
         self,
@@ -134,54 +583,89 @@ class AmmeterTestFramework:
         port: int,
         command: bytes,
         get_measurement: MeasurementFn,
+        buffer: Buffer,
         measurements_count: Optional[int],
-        total_duration_seconds: Optional[float],
-        sampling_frequency_hz: Optional[float],
-    ) -> tuple[List[float], List[float]]:
-        measurements: List[float] = []
-        timestamps: List[float] = []
-
-        def take_one() -> None:
-            ts = time.time()
+        scheduler: Optional[SampleScheduler] = None,
+        timer: RequestTimer,
+        get_batch: Optional[BatchMeasurementFn] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        def take_one(ts: Optional[float] = None, deadline_ns: Optional[int] = None) -> None:
+            start_ns = time.perf_counter_ns()
             val = float(get_measurement(port, command))
-            timestamps.append(ts)
-            measurements.append(val)
-
-        # Count-based sampling: take N samples as fast as the backend responds.
-        if measurements_count is not None:
-            for _ in range(measurements_count):
-                take_one()
-            return measurements, timestamps
-
-        # Time-based sampling: aim for a given cadence (best-effort).
-        period = 1.0 / float(sampling_frequency_hz)
-        end_time = time.time() + float(total_duration_seconds)
-
-        while time.time() < end_time:
-            t0 = time.time()
-            take_one()
-
-            # Best-effort cadence (not real-time accurate, but stable enough for QA sampling).
-            elapsed = time.time() - t0
-            sleep_for = period - elapsed
-            if sleep_for > 0:
-                time.sleep(sleep_for)
-
-        return measurements, timestamps
-
-    def _summarize(self, values: List[float]) -> Dict[str, float]:
-        if not values:
-            raise ValueError("No measurements collected")
-
-        return {
-            "mean": float(mean(values)),
-            "median": float(median(values)),
-            "std": float(pstdev(values)),
-            "min": float(min(values)),
-            "max": float(max(values)),
-        }
-
-    def _save_result(self, result: Dict[str, Any]) -> Path:
-        out_file = self.results_dir / f"{result['run_id']}.json"
-        out_file.write_text(json.dumps(result, indent=2), encoding="utf-8")
+            end_ns = time.perf_counter_ns()
+            buffer.append(val, timer.to_epoch(start_ns) if ts is None else ts)
+            timer.record(start_ns, end_ns, deadline_ns)
+
+        def take_batch(count: int) -> None:
+            start_ns = time.perf_counter_ns()
+            values = np.asarray(get_batch(port, command, count), dtype=np.float64)
+            end_ns = time.perf_counter_ns()
+            if len(values) != count:
+                raise RuntimeError(f"Batch request for {count} samples returned {len(values)}")
+            # Samples in a batch are taken back to back inside the round trip;
+            # spread their timestamps evenly across it.
+            buffer.extend(values, np.linspace(timer.to_epoch(start_ns), timer.to_epoch(end_ns), count, endpoint=False))
+            timer.record(start_ns, end_ns)
+
+        with timer.capture():
+            # Count-based sampling: take N samples as fast as the backend responds.
+            if measurements_count is not None:
+                if get_batch is not None:
+                    remaining = measurements_count
+                    while remaining > 0:
+                        n = min(batch_size, remaining)
+                        take_batch(n)
+                        remaining -= n
+                    return
+
+                for _ in range(measurements_count):
+                    take_one()
+                return
+
+            # Time-based sampling: one sample per scheduler tick, stamped with the
+            # tick's firing time mapped from the monotonic clock onto the epoch.
+            for tick in scheduler.ticks():
+                take_one(timer.to_epoch(tick.fired_ns), tick.deadline_ns)
+
+    async def _sample_async(
+        self,
+        *,
+        port: int,
+        command: bytes,
+        get_measurement: AsyncMeasurementFn,
+        buffer: Buffer,
+        measurements_count: Optional[int],
+        scheduler: Optional[SampleScheduler] = None,
+        timer: RequestTimer,
+    ) -> None:
+        async def take_one(ts: Optional[float] = None, deadline_ns: Optional[int] = None) -> None:
+            start_ns = time.perf_counter_ns()
+            val = float(await get_measurement(port, command))
+            end_ns = time.perf_counter_ns()
+            buffer.append(val, timer.to_epoch(start_ns) if ts is None else ts)
+            timer.record(start_ns, end_ns, deadline_ns)
+
+        with timer.capture():
+            if measurements_count is not None:
+                for _ in range(measurements_count):
+                    await take_one()
+                return
+
+            # Same schedule as _sample(), but yielding to the event loop while waiting.
+            async for tick in scheduler.aticks():
+                await take_one(timer.to_epoch(tick.fired_ns), tick.deadline_ns)
+
+    def _summarize(self, values: np.ndarray) -> Dict[str, float]:
+        return summarize(values)
+
+    def _save_result(self, result: Dict[str, Any], result_format: Optional[str] = None) -> Path:
+        if result_format is None:
+            result_format = self._settings.result_format
+        out_file = save_result(result, self.results_dir, result_format)
+        self._record(result, out_file)
         return out_file
+
+    def _record(self, result: Dict[str, Any], path: Path) -> None:
+        if self.catalog is not None:
+            self.catalog.record(result, path)
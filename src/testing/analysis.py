@@ -0,0 +1,283 @@
+"""
+Cross-ammeter comparison of runs.
+
+load_runs() reads many saved runs (memory-mapped where possible), align()
+resamples them onto one common time base as a (runs x points) matrix, and
+compare_runs() computes the metrics named in analysis.statistical_metrics on
+that matrix with vectorized NumPy, so comparing more runs adds rows rather
+than Python loops:
+
+- bias: mean difference from the reference (by default the mean of all runs)
+- relative_error: mean |difference| / |reference|
+- correlation: Pearson correlation matrix between runs
+- allan_deviation: non-overlapping Allan deviation at octave-spaced averaging times
+- outliers: samples whose robust z-score (median/MAD) exceeds outlier_threshold
+- drift: least-squares slope of each run over time
+
+    report = compare_runs(load_runs(paths), config=get_config("config/config.yaml"))
+    frame = report_frame(report)  # one pandas row per run
+
+    # Ammeters sampled together by run_synchronized() share their time base exactly:
+    report = compare_runs(synchronized_runs(result), relative=False)
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.testing.catalog import ResultCatalog
+from src.testing.result_writer import RunSource, load_run
+from src.testing.results_io import to_json
+from src.utils.config import Config
+
+METRICS = ("bias", "relative_error", "correlation", "allan_deviation", "outliers", "drift")
+DEFAULT_OUTLIER_THRESHOLD = 3.5
+# Scales the median absolute deviation to the standard deviation of normal data.
+MAD_SCALE = 1.4826
+
+
+@dataclass(frozen=True)
+class AlignedRuns:
+    labels: Tuple[str, ...]
+    ammeter_types: Tuple[str, ...]
+    # Common time base in seconds: since each run's own start (relative) or since the latest start.
+    t: np.ndarray
+    # One row per run, resampled onto `t`.
+    values: np.ndarray
+    relative: bool
+
+    @property
+    def step_seconds(self) -> float:
+        return float(self.t[1] - self.t[0]) if len(self.t) > 1 else 0.0
+
+
+def load_runs(sources: Union[Mapping[str, RunSource], Sequence[RunSource]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Load runs keyed by label: the mapping's keys, or "<ammeter_type>:<run_id prefix>"
+    for a sequence. Accepts anything load_run() does.
+    """
+    if isinstance(sources, Mapping):
+        return {label: load_run(source) for label, source in sources.items()}
+
+    runs: Dict[str, Dict[str, Any]] = {}
+    for source in sources:
+        run = load_run(source)
+        runs[f"{run.get('ammeter_type', '?')}:{str(run.get('run_id', len(runs)))[:8]}"] = run
+    return runs
+
+
+def synchronized_runs(result: RunSource) -> Dict[str, Dict[str, Any]]:
+    """
+    Split a run_synchronized() result into one run per ammeter, keyed by
+    ammeter type. They share the exact same timestamps, so compare them with
+    relative=False.
+    """
+    result = load_run(result)
+    data = result["data"]
+    return {
+        name: {
+            "run_id": result["run_id"],
+            "ammeter_type": name,
+            "started_at_epoch": result.get("started_at_epoch"),
+            "data": {"measurements": data[name], "timestamps_epoch": data["timestamps_epoch"]},
+        }
+        for name in result["synchronized"]
+    }
+
+
+def runs_from_catalog(results_dir: Union[str, Path], **query: Any) -> Dict[str, Dict[str, Any]]:
+    """Load every run matching a ResultCatalog.query() (e.g. ammeter_type=, since=, limit=)."""
+    catalog = ResultCatalog(results_dir)
+    return load_runs([catalog.result_path(row) for row in catalog.query(**query)])
+
+
+def align(
+    runs: Mapping[str, Dict[str, Any]],
+    *,
+    relative: bool = True,
+    points: Optional[int] = None,
+) -> AlignedRuns:
+    """
+    Linearly resample every run onto one time grid covering the span all runs
+    share. With `relative` (the default) each run is timed from its own first
+    sample, which compares runs taken one after another; otherwise runs are
+    aligned on wall-clock time, which needs them to overlap. The grid step
+    defaults to the coarsest run's median sample interval.
+    """
+    if not runs:
+        raise ValueError("No runs to align")
+
+    series = []
+    for label, run in runs.items():
+        t = np.asarray(run["data"]["timestamps_epoch"], dtype=np.float64)
+        y = np.asarray(run["data"]["measurements"], dtype=np.float64)
+        if len(t) < 2:
+            raise ValueError(f"Run {label!r} has fewer than 2 samples")
+        series.append((t - t[0] if relative else t, y))
+
+    start = max(t[0] for t, _ in series)
+    end = min(t[-1] for t, _ in series)
+    if end <= start:
+        raise ValueError("Runs do not overlap in time")
+    if points is None:
+        step = max(float(np.median(np.diff(t))) for t, _ in series)
+        points = int(round((end - start) / step)) + 1 if step > 0 else 2
+    if points < 2:
+        raise ValueError("points must be >= 2")
+
+    grid = np.linspace(start, end, points)
+    return AlignedRuns(
+        labels=tuple(runs),
+        ammeter_types=tuple(str(run.get("ammeter_type", "?")) for run in runs.values()),
+        t=grid - (0.0 if relative else start),
+        values=np.vstack([np.interp(grid, t, y) for t, y in series]),
+        relative=relative,
+    )
+
+
+def compare_runs(
+    runs: Union[AlignedRuns, Mapping[str, Dict[str, Any]]],
+    *,
+    metrics: Optional[Sequence[str]] = None,
+    reference: Optional[str] = None,
+    outlier_threshold: Optional[float] = None,
+    config: Optional[Config] = None,
+    relative: bool = True,
+    points: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Compute cross-run metrics. Unset arguments default to the analysis section
+    of `config`: `metrics` to analysis.statistical_metrics (all METRICS when
+    empty), `reference` (a run label or ammeter type; None compares against
+    the mean of all runs) and `outlier_threshold`.
+    """
+    settings = config.analysis if config is not None else None
+    if metrics is None:
+        metrics = (settings.statistical_metrics if settings else ()) or METRICS
+    unknown = [m for m in metrics if m not in METRICS]
+    if unknown:
+        raise ValueError(f"Unknown metric(s) {', '.join(unknown)}. Expected any of {', '.join(METRICS)}")
+    if reference is None and settings is not None:
+        reference = settings.reference
+    if outlier_threshold is None:
+        outlier_threshold = settings.outlier_threshold if settings else DEFAULT_OUTLIER_THRESHOLD
+
+    aligned = runs if isinstance(runs, AlignedRuns) else align(runs, relative=relative, points=points)
+    ref_values = _reference(aligned, reference)
+
+    report: Dict[str, Any] = {
+        "runs": [{"label": label, "ammeter_type": kind} for label, kind in zip(aligned.labels, aligned.ammeter_types)],
+        "time_base": {
+            "relative": aligned.relative,
+            "points": len(aligned.t),
+            "step_seconds": aligned.step_seconds,
+            "span_seconds": float(aligned.t[-1] - aligned.t[0]),
+        },
+        "reference": reference if reference is not None else "mean",
+        "metrics": {},
+    }
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name in metrics:
+            report["metrics"][name] = _METRIC_FUNCTIONS[name](aligned, ref_values, outlier_threshold)
+    return report
+
+
+def allan_deviation(values: np.ndarray, step_seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Non-overlapping Allan deviation of each row of `values` (evenly sampled
+    every `step_seconds`) at averaging times step * 1, 2, 4, ... while at
+    least two averages fit. Returns (tau_seconds, adev[rows, taus]).
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    rows, n = values.shape
+    if n < 2:
+        return np.empty(0), np.empty((rows, 0))
+
+    factors = 2 ** np.arange(int(np.log2(n // 2)) + 1)
+    adev = np.empty((rows, len(factors)))
+    for i, m in enumerate(factors):
+        k = n // m
+        means = values[:, :k * m].reshape(rows, k, m).mean(axis=2)
+        adev[:, i] = np.sqrt(0.5 * np.mean(np.diff(means, axis=1) ** 2, axis=1))
+    return factors * step_seconds, adev
+
+
+def report_frame(report: Dict[str, Any]):
+    """Per-run scalar metrics of a compare_runs() report as a pandas DataFrame indexed by label."""
+    import pandas as pd
+
+    metrics = report["metrics"]
+    columns: Dict[str, Any] = {"ammeter_type": [run["ammeter_type"] for run in report["runs"]]}
+    for name in ("bias", "relative_error"):
+        if name in metrics:
+            columns[name] = metrics[name]
+    if "outliers" in metrics:
+        columns["outliers"] = metrics["outliers"]["count"]
+        columns["outlier_fraction"] = metrics["outliers"]["fraction"]
+    if "drift" in metrics:
+        columns["drift_per_second"] = metrics["drift"]["slope_per_second"]
+        columns["drift_change"] = metrics["drift"]["change"]
+    return pd.DataFrame(columns, index=pd.Index([run["label"] for run in report["runs"]], name="label"))
+
+
+def save_report(report: Dict[str, Any], out_path: Union[str, Path]) -> Path:
+    out_path = Path(out_path)
+    out_path.write_text(json.dumps(report, indent=2, default=to_json), encoding="utf-8")
+    return out_path
+
+
+def _reference(aligned: AlignedRuns, reference: Optional[str]) -> np.ndarray:
+    if reference is None:
+        return aligned.values.mean(axis=0)
+    for i, (label, kind) in enumerate(zip(aligned.labels, aligned.ammeter_types)):
+        if reference in (label, kind):
+            return aligned.values[i]
+    raise KeyError(f"Reference {reference!r} matches no run. Runs: {', '.join(aligned.labels)}")
+
+
+def _bias(aligned: AlignedRuns, ref: np.ndarray, threshold: float) -> list:
+    return (aligned.values - ref).mean(axis=1).tolist()
+
+
+def _relative_error(aligned: AlignedRuns, ref: np.ndarray, threshold: float) -> list:
+    error = np.abs(aligned.values - ref) / np.abs(ref)
+    error[~np.isfinite(error)] = np.nan
+    return np.nanmean(error, axis=1).tolist()
+
+
+def _correlation(aligned: AlignedRuns, ref: np.ndarray, threshold: float) -> list:
+    return np.corrcoef(aligned.values).reshape(len(aligned.labels), -1).tolist()
+
+
+def _allan(aligned: AlignedRuns, ref: np.ndarray, threshold: float) -> Dict[str, Any]:
+    tau, adev = allan_deviation(aligned.values, aligned.step_seconds)
+    return {"tau_seconds": tau.tolist(), "adev": adev.tolist()}
+
+
+def _outliers(aligned: AlignedRuns, ref: np.ndarray, threshold: float) -> Dict[str, Any]:
+    values = aligned.values
+    deviation = np.abs(values - np.median(values, axis=1, keepdims=True))
+    mad = np.median(deviation, axis=1, keepdims=True) * MAD_SCALE
+    # With a zero MAD any sample off the median is an outlier (inf); 0/0 is not (nan).
+    count = (deviation / mad > threshold).sum(axis=1)
+    return {"threshold": threshold, "count": count.tolist(), "fraction": (count / values.shape[1]).tolist()}
+
+
+def _drift(aligned: AlignedRuns, ref: np.ndarray, threshold: float) -> Dict[str, Any]:
+    t = aligned.t - aligned.t.mean()
+    slope = (aligned.values - aligned.values.mean(axis=1, keepdims=True)) @ t / (t @ t)
+    return {"slope_per_second": slope.tolist(), "change": (slope * (aligned.t[-1] - aligned.t[0])).tolist()}
+
+
+_METRIC_FUNCTIONS: Dict[str, Callable[[AlignedRuns, np.ndarray, float], Any]] = {
+    "bias": _bias,
+    "relative_error": _relative_error,
+    "correlation": _correlation,
+    "allan_deviation": _allan,
+    "outliers": _outliers,
+    "drift": _drift,
+}
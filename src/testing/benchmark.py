@@ -0,0 +1,395 @@
+"""
+Load-generation benchmark for the emulators and the client paths.
+
+For every (ammeter type x client path x concurrency) combination, N client
+threads hammer one emulator for a fixed time and every request's latency is
+recorded. The report gives requests/sec, samples/sec and latency percentiles
+per combination, together with the commit and machine it was measured on, and
+is saved as JSON so runs from different commits can be compared:
+
+    report = run_benchmark("config/config.yaml", concurrency=(1, 8), duration_seconds=3.0)
+    save_benchmark(report, "benchmarks")
+    regressions = compare(load_benchmark("benchmarks/baseline.json"), report)
+
+Emulators are started as subprocesses by default ("process"), so the server
+does not compete with the load generator for the GIL; "thread" runs them
+in-process and "external" benchmarks emulators that are already running on
+the configured ports.
+"""
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import subprocess
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from Ammeters.client import AmmeterConnection, request_current_from_ammeter
+from Ammeters.base_ammeter import server_options
+from Ammeters.farm import serve_worker
+from Ammeters.launcher import EmulatorLauncher
+from Ammeters.registry import driver_class
+from src.testing.results_io import to_json
+from src.utils.config import load_config
+
+EMULATOR_MODES = ("process", "thread", "external")
+CLIENT_PATHS = ("one_shot", "pooled", "batch")
+LATENCY_PERCENTILES = (50, 90, 99)
+DEFAULT_BATCH_SIZE = 100
+
+# A client path builds a per-thread "request" callable returning the number of samples
+# it fetched, plus a close function for its resources.
+Request = Callable[[], int]
+ClientFactory = Callable[[int, bytes, int], Tuple[Request, Callable[[], None]]]
+
+
+def _one_shot_client(port: int, command: bytes, batch_size: int) -> Tuple[Request, Callable[[], None]]:
+    def request() -> int:
+        request_current_from_ammeter(port, command)
+        return 1
+    return request, lambda: None
+
+
+def _pooled_client(port: int, command: bytes, batch_size: int) -> Tuple[Request, Callable[[], None]]:
+    conn = AmmeterConnection(port, timeout=10.0).connect()
+
+    def request() -> int:
+        conn.request(command)
+        return 1
+    return request, conn.close
+
+
+def _batch_client(port: int, command: bytes, batch_size: int) -> Tuple[Request, Callable[[], None]]:
+    conn = AmmeterConnection(port, timeout=10.0).connect()
+
+    def request() -> int:
+        return len(conn.request_batch(command, batch_size))
+    return request, conn.close
+
+
+CLIENT_FACTORIES: Dict[str, ClientFactory] = {
+    "one_shot": _one_shot_client,
+    "pooled": _pooled_client,
+    "batch": _batch_client,
+}
+
+
+def wait_for_port(port: int, host: str = "localhost", timeout: float = 10.0) -> None:
+    """Block until something accepts connections on `port`, or raise TimeoutError."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Nothing listening on {host}:{port} after {timeout}s")
+            time.sleep(0.05)
+
+
+@contextmanager
+def emulators(
+    ports: Dict[str, int],
+    mode: str = "process",
+    ready_timeout: float = 10.0,
+    config: Optional[Dict[str, Any]] = None,
+) -> Iterator[Dict[str, int]]:
+    """
+    Make sure one emulator per ammeter type is listening and yield the actual
+    port map. "process" and "thread" start them (port 0 picks a free port) and
+    stop them on exit; "external" only waits for the given ports. Emulator
+    classes are looked up in Ammeters.registry (with `config`'s driver entries).
+    """
+    if mode not in EMULATOR_MODES:
+        raise ValueError(f"Unknown emulator mode {mode!r}. Expected one of {', '.join(EMULATOR_MODES)}")
+
+    if mode == "external":
+        for port in ports.values():
+            wait_for_port(port, timeout=ready_timeout)
+        yield dict(ports)
+        return
+
+    options = server_options(config)
+    if mode == "thread":
+        with EmulatorLauncher() as launcher:
+            for ammeter_type, port in ports.items():
+                launcher.start(ammeter_type, driver_class(ammeter_type, config)(port, **options))
+            yield launcher.ports
+        return
+
+    processes: List[multiprocessing.Process] = []
+    actual: Dict[str, int] = {}
+    try:
+        for ammeter_type, port in ports.items():
+            ready, child_end = multiprocessing.Pipe(duplex=False)
+            emulator_cls = driver_class(ammeter_type, config)
+            proc = multiprocessing.Process(target=serve_worker, args=(emulator_cls, port, options, child_end), daemon=True)
+            proc.start()
+            child_end.close()
+            processes.append(proc)
+            if not ready.poll(ready_timeout):
+                raise TimeoutError(f"Emulator {ammeter_type} did not start within {ready_timeout}s")
+            reply = ready.recv()
+            ready.close()
+            if isinstance(reply, BaseException):
+                raise reply
+            actual[ammeter_type] = reply
+        yield actual
+    finally:
+        for proc in processes:
+            proc.terminate()
+        for proc in processes:
+            proc.join(timeout=5)
+
+
+def measure_load(
+    port: int,
+    command: bytes,
+    client: str = "pooled",
+    *,
+    concurrency: int = 1,
+    duration_seconds: float = 2.0,
+    warmup_seconds: float = 0.2,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Drive one emulator with `concurrency` client threads using the given client
+    path for `duration_seconds` (after an unrecorded warm-up) and summarise
+    throughput and latency.
+    """
+    if client not in CLIENT_FACTORIES:
+        raise ValueError(f"Unknown client path {client!r}. Expected one of {', '.join(CLIENT_PATHS)}")
+    if concurrency <= 0:
+        raise ValueError("concurrency must be > 0")
+    if duration_seconds <= 0:
+        raise ValueError("duration_seconds must be > 0")
+
+    factory = CLIENT_FACTORIES[client]
+    latencies = [array("q") for _ in range(concurrency)]
+    samples = [0] * concurrency
+    errors = [0] * concurrency
+    start = threading.Barrier(concurrency + 1)
+    window: Dict[str, int] = {}
+    connect_errors: List[OSError] = []
+
+    def worker(i: int) -> None:
+        try:
+            request, close = factory(port, command, batch_size)
+        except OSError as e:
+            connect_errors.append(e)
+            start.abort()
+            return
+        try:
+            try:
+                start.wait()
+            except threading.BrokenBarrierError:
+                return
+            record_from, stop_at = window["record_from"], window["stop_at"]
+            record = latencies[i]
+            while True:
+                t0 = time.perf_counter_ns()
+                if t0 >= stop_at:
+                    break
+                try:
+                    n = request()
+                except (OSError, RuntimeError, ValueError):
+                    if t0 >= record_from:
+                        errors[i] += 1
+                    continue
+                if t0 >= record_from:
+                    record.append(time.perf_counter_ns() - t0)
+                    samples[i] += n
+        finally:
+            close()
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    now = time.perf_counter_ns()
+    window["record_from"] = now + int(warmup_seconds * 1e9)
+    window["stop_at"] = window["record_from"] + int(duration_seconds * 1e9)
+    try:
+        start.wait()
+    except threading.BrokenBarrierError:
+        pass
+    finally:
+        for t in threads:
+            t.join()
+    if connect_errors:
+        raise ConnectionError(f"Benchmark clients could not connect to port {port}") from connect_errors[0]
+
+    latency_ns = np.concatenate([np.frombuffer(a, dtype=np.int64) for a in latencies])
+    requests = len(latency_ns)
+    report: Dict[str, Any] = {
+        "client": client,
+        "concurrency": concurrency,
+        "duration_seconds": duration_seconds,
+        "batch_size": batch_size if client == "batch" else 1,
+        "requests": requests,
+        "errors": sum(errors),
+        "samples": sum(samples),
+        "requests_per_second": requests / duration_seconds,
+        "samples_per_second": sum(samples) / duration_seconds,
+    }
+    if requests:
+        latency_ms = latency_ns / 1e6
+        report["latency_ms"] = {
+            "mean": float(latency_ms.mean()),
+            **{f"p{p}": float(v) for p, v in zip(LATENCY_PERCENTILES, np.percentile(latency_ms, LATENCY_PERCENTILES))},
+            "max": float(latency_ms.max()),
+        }
+    return report
+
+
+def run_benchmark(
+    config_path: str = "config/config.yaml",
+    *,
+    ammeters: Optional[Sequence[str]] = None,
+    clients: Sequence[str] = CLIENT_PATHS,
+    concurrency: Sequence[int] = (1, 4, 16),
+    duration_seconds: float = 2.0,
+    warmup_seconds: float = 0.2,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    emulator_mode: str = "process",
+) -> Dict[str, Any]:
+    """
+    Benchmark every (ammeter, client path, concurrency) combination.
+
+    Unless emulator_mode is "external" (use the emulators running on the
+    configured ports), emulators are started on free ports, so a benchmark
+    never collides with emulators already running for the tests.
+    """
+    config = load_config(config_path)
+    ammeter_cfg = config["ammeters"]
+    ammeters = list(ammeters or ammeter_cfg)
+    for ammeter_type in ammeters:
+        if ammeter_type not in ammeter_cfg:
+            raise ValueError(f"Unknown ammeter type: {ammeter_type}")
+
+    if emulator_mode == "external":
+        requested = {a: int(ammeter_cfg[a]["port"]) for a in ammeters}
+    else:
+        requested = {a: 0 for a in ammeters}
+
+    results: List[Dict[str, Any]] = []
+    started = time.time()
+    with emulators(requested, mode=emulator_mode, config=config) as ports:
+        for ammeter_type in ammeters:
+            command = ammeter_cfg[ammeter_type]["command"].encode("utf-8")
+            for client in clients:
+                for n in concurrency:
+                    load = measure_load(
+                        ports[ammeter_type], command, client,
+                        concurrency=n,
+                        duration_seconds=duration_seconds,
+                        warmup_seconds=warmup_seconds,
+                        batch_size=batch_size,
+                    )
+                    results.append({"ammeter_type": ammeter_type, **load})
+
+    return {
+        "started_at": datetime.fromtimestamp(started).isoformat(),
+        "commit": _git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "emulator_mode": emulator_mode,
+        "results": results,
+    }
+
+
+def save_benchmark(report: Dict[str, Any], out_dir: Union[str, Path] = "benchmarks") -> Path:
+    """Write the report as `<timestamp>_<commit>.json` in `out_dir`."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = report["started_at"].replace(":", "").replace("-", "").split(".")[0]
+    out_file = out_dir / f"{stamp}_{report.get('commit') or 'nocommit'}.json"
+    out_file.write_text(json.dumps(report, indent=2, default=to_json), encoding="utf-8")
+    return out_file
+
+
+def load_benchmark(path: Union[str, Path]) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    tolerance: float = 0.10,
+) -> List[Dict[str, Any]]:
+    """
+    Match results by (ammeter_type, client, concurrency) and report the
+    throughput and p99 latency ratios (current / baseline). An entry is
+    flagged as a regression when throughput drops, or p99 latency grows, by
+    more than `tolerance`.
+    """
+    def key(r: Dict[str, Any]) -> Tuple[str, str, int]:
+        return r["ammeter_type"], r["client"], r["concurrency"]
+
+    base = {key(r): r for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        b = base.get(key(r))
+        if b is None or not b["requests_per_second"]:
+            continue
+        throughput = r["requests_per_second"] / b["requests_per_second"]
+        b_p99 = (b.get("latency_ms") or {}).get("p99")
+        r_p99 = (r.get("latency_ms") or {}).get("p99")
+        p99 = r_p99 / b_p99 if b_p99 and r_p99 is not None else None
+        rows.append({
+            "ammeter_type": r["ammeter_type"],
+            "client": r["client"],
+            "concurrency": r["concurrency"],
+            "throughput_ratio": throughput,
+            "p99_ratio": p99,
+            "regression": throughput < 1 - tolerance or (p99 is not None and p99 > 1 + tolerance),
+        })
+    return rows
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Plain-text table of a benchmark report."""
+    lines = [f"{'ammeter':<10} {'client':<9} {'conc':>4} {'req/s':>10} {'samples/s':>11} "
+             f"{'p50 ms':>8} {'p99 ms':>8} {'errors':>6}"]
+    for r in report["results"]:
+        latency = r.get("latency_ms") or {}
+        lines.append(
+            f"{r['ammeter_type']:<10} {r['client']:<9} {r['concurrency']:>4} {r['requests_per_second']:>10.0f} "
+            f"{r['samples_per_second']:>11.0f} {latency.get('p50', float('nan')):>8.3f} "
+            f"{latency.get('p99', float('nan')):>8.3f} {r['errors']:>6}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    """Plain-text lines of compare() rows, flagging regressions."""
+    lines = []
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else "ok"
+        p99 = f"{row['p99_ratio']:.2f}x" if row["p99_ratio"] is not None else "-"
+        lines.append(f"{row['ammeter_type']:<10} {row['client']:<9} {row['concurrency']:>4} "
+                     f"throughput {row['throughput_ratio']:.2f}x  p99 {p99}  {flag}")
+    return "\n".join(lines)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5, check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+from src.testing.online_stats import OnlineStats
+
+PERCENTILES = (50, 95, 99)
+
+
+def summarize(values: np.ndarray) -> Dict[str, float]:
+    """Summary statistics of a full sample array (vectorized)."""
+    if len(values) == 0:
+        raise ValueError("No measurements collected")
+
+    values = np.asarray(values, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, PERCENTILES)
+    return {
+        "mean": float(values.mean()),
+        "median": float(p50),
+        "std": float(values.std()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+    }
+
+
+class SampleBuffer:
+    """
+    Growable pair of float64 arrays holding measurements and their epoch timestamps.
+
+    Preallocate with the expected sample count when it is known; otherwise the
+    capacity doubles as needed, so appends stay amortised O(1) without boxing
+    every value in a Python float.
+    """
+
+    __slots__ = ("_values", "_timestamps", "_size")
+
+    def __init__(self, capacity: int = 1024):
+        capacity = max(1, int(capacity))
+        self._values = np.empty(capacity, dtype=np.float64)
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._values)
+
+    def append(self, value: float, timestamp: float) -> None:
+        if self._size == len(self._values):
+            self._grow(self._size + 1)
+        self._values[self._size] = value
+        self._timestamps[self._size] = timestamp
+        self._size += 1
+
+    def extend(self, values: np.ndarray, timestamps: np.ndarray) -> None:
+        n = len(values)
+        if n != len(timestamps):
+            raise ValueError("values and timestamps must have the same length")
+        end = self._size + n
+        if end > len(self._values):
+            self._grow(end)
+        self._values[self._size:end] = values
+        self._timestamps[self._size:end] = timestamps
+        self._size = end
+
+    @property
+    def measurements(self) -> np.ndarray:
+        """View of the filled part of the measurements array."""
+        return self._values[:self._size]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """View of the filled part of the timestamps array."""
+        return self._timestamps[:self._size]
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Final (measurements, timestamps). Views are returned as-is unless the
+        buffer was over-allocated, in which case the slack is released by copying.
+        """
+        if self._size * 4 < len(self._values) * 3:
+            return self.measurements.copy(), self.timestamps.copy()
+        return self.measurements, self.timestamps
+
+    def _grow(self, min_capacity: int) -> None:
+        capacity = max(min_capacity, 2 * len(self._values))
+        self._values = np.resize(self._values, capacity)
+        self._timestamps = np.resize(self._timestamps, capacity)
+
+
+class StreamingBuffer:
+    """
+    Constant-memory sink for unbounded runs. Every sample is folded into
+    `stats` (an OnlineStats); at most `keep_samples` raw samples are retained,
+    evenly spread over the run: once the reservoir fills up, every other kept
+    sample is dropped and the keep stride doubles. keep_samples=0 keeps none.
+
+    Exposes the same append/extend/arrays interface as SampleBuffer.
+    """
+
+    __slots__ = ("stats", "keep_samples", "stride", "_seen", "_values", "_timestamps", "_size")
+
+    def __init__(self, keep_samples: int = 0):
+        if keep_samples < 0 or keep_samples == 1:
+            raise ValueError("keep_samples must be 0 or >= 2")
+        self.stats = OnlineStats()
+        self.keep_samples = int(keep_samples)
+        self.stride = 1
+        self._seen = 0
+        self._values = np.empty(self.keep_samples, dtype=np.float64)
+        self._timestamps = np.empty(self.keep_samples, dtype=np.float64)
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Number of samples seen (not the number kept)."""
+        return self._seen
+
+    @property
+    def kept(self) -> int:
+        return self._size
+
+    def append(self, value: float, timestamp: float) -> None:
+        self.stats.update(value)
+        if self.keep_samples and self._seen % self.stride == 0:
+            if self._size == self.keep_samples:
+                self._compact()
+            if self._seen % self.stride == 0:
+                self._values[self._size] = value
+                self._timestamps[self._size] = timestamp
+                self._size += 1
+        self._seen += 1
+
+    def extend(self, values: np.ndarray, timestamps: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if len(values) != len(timestamps):
+            raise ValueError("values and timestamps must have the same length")
+        self.stats.update_many(values)
+        if self.keep_samples:
+            for i in np.flatnonzero((self._seen + np.arange(len(values))) % self.stride == 0):
+                # The stride may double part-way through the block, so re-check each candidate.
+                if (self._seen + i) % self.stride:
+                    continue
+                if self._size == self.keep_samples:
+                    self._compact()
+                    if (self._seen + i) % self.stride:
+                        continue
+                self._values[self._size] = values[i]
+                self._timestamps[self._size] = timestamps[i]
+                self._size += 1
+        self._seen += len(values)
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self._values[:self._size].copy(), self._timestamps[:self._size].copy()
+
+    def _compact(self) -> None:
+        # Kept samples sit at multiples of `stride`; keep those at multiples of 2 * stride.
+        half = (self._size + 1) // 2
+        self._values[:half] = self._values[:self._size:2]
+        self._timestamps[:half] = self._timestamps[:self._size:2]
+        self._size = half
+        self.stride *= 2
@@ -0,0 +1,191 @@
+"""
+Process-pool campaign runner.
+
+A campaign is a matrix of (ammeter_type x sampling configuration x
+repetition) jobs. Jobs are spread over a ProcessPoolExecutor; each worker
+process builds one AmmeterTestFramework and one pooled client at start-up
+and reuses them (and their open connections) for every job it runs. Each
+job's result is saved by the worker as usual, and only a small summary is
+shipped back to the parent, which aggregates them and reports progress.
+
+    jobs = build_matrix(["greenlee", "entes"], [{"measurements_count": 1000}], repetitions=5)
+    report = run_campaign_pool(jobs, max_workers=8, progress=print_progress)
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Ammeters.client import AmmeterClientPool
+from src.testing.ammeter_framework import AmmeterTestFramework
+
+
+@dataclass(frozen=True)
+class CampaignJob:
+    ammeter_type: str
+    # Keyword arguments for run_test(), e.g. {"measurements_count": 1000}
+    sampling: Dict[str, Any] = field(default_factory=dict)
+    repetition: int = 0
+
+
+@dataclass(frozen=True)
+class CampaignProgress:
+    done: int
+    total: int
+    failed: int
+    elapsed_seconds: float
+    eta_seconds: Optional[float]
+    last: Dict[str, Any]
+
+
+def build_matrix(
+    ammeter_types: Sequence[str],
+    sampling_configs: Sequence[Dict[str, Any]],
+    repetitions: int = 1,
+) -> List[CampaignJob]:
+    if repetitions <= 0:
+        raise ValueError("repetitions must be > 0")
+    return [
+        CampaignJob(ammeter_type, dict(sampling), repetition)
+        for repetition in range(repetitions)
+        for sampling in sampling_configs
+        for ammeter_type in ammeter_types
+    ]
+
+
+# Per-worker state, created once by _init_worker() in each pool process.
+_worker_framework: Optional[AmmeterTestFramework] = None
+_worker_client: Optional[AmmeterClientPool] = None
+
+
+def _init_worker(config_path: str, results_dir: str) -> None:
+    global _worker_framework, _worker_client
+    _worker_framework = AmmeterTestFramework(config_path, results_dir=results_dir)
+    _worker_client = AmmeterClientPool()
+
+
+def _run_job(job: CampaignJob) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {
+        "ammeter_type": job.ammeter_type,
+        "sampling": job.sampling,
+        "repetition": job.repetition,
+        "worker_pid": os.getpid(),
+    }
+    started = time.perf_counter()
+    try:
+        result = _worker_framework.run_test(
+            job.ammeter_type,
+            _worker_client,
+            get_batch=_worker_client.request_batch,
+            **job.sampling,
+        )
+    except Exception as e:
+        summary["error"] = f"{type(e).__name__}: {e}"
+    else:
+        summary["run_id"] = result["run_id"]
+        summary["stats"] = result["stats"]
+    summary["elapsed_seconds"] = time.perf_counter() - started
+    return summary
+
+
+def iter_campaign(
+    jobs: Iterable[CampaignJob],
+    *,
+    config_path: str = "config/config.yaml",
+    results_dir: str = "results",
+    max_workers: Optional[int] = None,
+) -> Iterator[Tuple[CampaignProgress, Dict[str, Any]]]:
+    """Run the jobs on a process pool, yielding (progress, job summary) as each job finishes."""
+    jobs = list(jobs)
+    total = len(jobs)
+    done = failed = 0
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(config_path, results_dir),
+    ) as pool:
+        futures = [pool.submit(_run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            summary = future.result()
+            done += 1
+            failed += "error" in summary
+            elapsed = time.perf_counter() - started
+            # Jobs finish in roughly uniform waves, so the mean rate is a fair ETA estimate.
+            eta = elapsed / done * (total - done)
+            yield CampaignProgress(done, total, failed, elapsed, eta, summary), summary
+
+
+def run_campaign_pool(
+    jobs: Iterable[CampaignJob],
+    *,
+    config_path: str = "config/config.yaml",
+    results_dir: str = "results",
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[CampaignProgress], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Run a campaign to completion and return an aggregate report:
+    per-job summaries, failures, and per (ammeter_type, sampling) group
+    statistics across repetitions.
+    """
+    started = time.perf_counter()
+    summaries: List[Dict[str, Any]] = []
+    for state, summary in iter_campaign(
+        jobs, config_path=config_path, results_dir=results_dir, max_workers=max_workers,
+    ):
+        summaries.append(summary)
+        if progress is not None:
+            progress(state)
+
+    return {
+        "elapsed_seconds": time.perf_counter() - started,
+        "jobs": summaries,
+        "failed": [s for s in summaries if "error" in s],
+        "groups": aggregate(summaries),
+    }
+
+
+def aggregate(summaries: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Group successful job summaries by (ammeter_type, sampling) and summarise across repetitions."""
+    groups: Dict[Tuple[str, Tuple], List[Dict[str, Any]]] = {}
+    for s in summaries:
+        if "error" in s:
+            continue
+        key = (s["ammeter_type"], tuple(sorted(s["sampling"].items())))
+        groups.setdefault(key, []).append(s)
+
+    report = []
+    for (ammeter_type, sampling), members in groups.items():
+        means = np.array([m["stats"]["mean"] for m in members])
+        stds = np.array([m["stats"]["std"] for m in members])
+        report.append({
+            "ammeter_type": ammeter_type,
+            "sampling": dict(sampling),
+            "runs": len(members),
+            "run_ids": [m["run_id"] for m in members],
+            "mean_of_means": float(means.mean()),
+            "std_of_means": float(means.std()),
+            "mean_std": float(stds.mean()),
+            "min": float(min(m["stats"]["min"] for m in members)),
+            "max": float(max(m["stats"]["max"] for m in members)),
+        })
+    return report
+
+
+def print_progress(state: CampaignProgress) -> None:
+    """Progress callback writing one status line per finished job to stderr."""
+    eta = f"{state.eta_seconds:.1f}s" if state.eta_seconds is not None else "?"
+    status = "FAILED " + state.last["error"] if "error" in state.last else "ok"
+    print(
+        f"[{state.done}/{state.total}] {state.last['ammeter_type']} rep={state.last['repetition']} "
+        f"{status} elapsed={state.elapsed_seconds:.1f}s eta={eta}",
+        file=sys.stderr,
+    )
@@ -0,0 +1,176 @@
+"""
+SQLite index of the runs saved in a results directory.
+
+Every saved result gets one row with its identity, sampling parameters and
+summary stats, so finding the latest run or filtering runs by ammeter type,
+time range or stats is an indexed query instead of opening every file.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+CATALOG_FILE = "catalog.sqlite3"
+
+STAT_COLUMNS = ("mean", "median", "std", "min", "max", "p50", "p95", "p99")
+SAMPLING_COLUMNS = ("measurements_count", "total_duration_seconds", "sampling_frequency_hz")
+ORDERABLE_COLUMNS = ("started_at_epoch", "ammeter_type", "samples") + SAMPLING_COLUMNS + STAT_COLUMNS
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    ammeter_type TEXT NOT NULL,
+    started_at_epoch REAL,
+    path TEXT NOT NULL,
+    format TEXT NOT NULL,
+    samples INTEGER,
+    {", ".join(f"{c} REAL" for c in SAMPLING_COLUMNS)},
+    {", ".join(f'"{c}" REAL' for c in STAT_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs (started_at_epoch);
+CREATE INDEX IF NOT EXISTS runs_by_type_time ON runs (ammeter_type, started_at_epoch);
+"""
+
+
+class ResultCatalog:
+    """
+    Catalog stored as `catalog.sqlite3` inside a results directory.
+
+    Connections are opened per call, so one catalog can be shared by threads
+    and by several processes writing to the same results directory.
+    """
+
+    def __init__(self, results_dir: Union[str, Path]):
+        self.results_dir = Path(results_dir)
+        self.path = self.results_dir / CATALOG_FILE
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+
+    def record(self, result: Dict[str, Any], path: Union[str, Path]) -> None:
+        """Insert or replace the row for a saved result."""
+        path = Path(path)
+        sampling = result.get("sampling") or {}
+        stats = result.get("stats") or {}
+        row = {
+            "run_id": result["run_id"],
+            "ammeter_type": result.get("ammeter_type", ""),
+            "started_at_epoch": result.get("started_at_epoch"),
+            "path": path.name if path.parent == self.results_dir else str(path),
+            "format": "npy" if path.name.endswith(".meta.json") else "json",
+            "samples": _sample_count(result),
+            **{c: sampling.get(c) for c in SAMPLING_COLUMNS},
+            **{c: _number(stats.get(c)) for c in STAT_COLUMNS},
+        }
+        columns = ", ".join(f'"{c}"' for c in row)
+        placeholders = ", ".join("?" for _ in row)
+        with closing(self._connect()) as db, db:
+            db.execute(f"INSERT OR REPLACE INTO runs ({columns}) VALUES ({placeholders})", tuple(row.values()))
+
+    def query(
+        self,
+        *,
+        ammeter_type: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        stats: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        order_by: str = "started_at_epoch",
+        descending: bool = True,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return matching runs as dicts (newest first by default).
+
+        `since`/`until` bound started_at_epoch; `stats` maps a stat name to an
+        inclusive (low, high) range, either side may be None, e.g.
+        stats={"mean": (0.5, None)}.
+        """
+        if order_by not in ORDERABLE_COLUMNS:
+            raise ValueError(f"Cannot order by {order_by!r}. Expected one of {', '.join(ORDERABLE_COLUMNS)}")
+
+        where: List[str] = []
+        params: List[Any] = []
+        if ammeter_type is not None:
+            where.append("ammeter_type = ?")
+            params.append(ammeter_type)
+        if since is not None:
+            where.append("started_at_epoch >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("started_at_epoch <= ?")
+            params.append(until)
+        for name, (low, high) in (stats or {}).items():
+            if name not in STAT_COLUMNS:
+                raise ValueError(f"Unknown stat {name!r}. Expected one of {', '.join(STAT_COLUMNS)}")
+            if low is not None:
+                where.append(f'"{name}" >= ?')
+                params.append(low)
+            if high is not None:
+                where.append(f'"{name}" <= ?')
+                params.append(high)
+
+        sql = "SELECT * FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f' ORDER BY "{order_by}" {"DESC" if descending else "ASC"}'
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with closing(self._connect()) as db:
+            return [dict(row) for row in db.execute(sql, params)]
+
+    def latest(self, ammeter_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        rows = self.query(ammeter_type=ammeter_type, limit=1)
+        return rows[0] if rows else None
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as db:
+            row = db.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return dict(row) if row else None
+
+    def result_path(self, row: Dict[str, Any]) -> Path:
+        """Absolute path of the result file a catalog row points to."""
+        return self.results_dir / row["path"]
+
+    def rebuild(self) -> int:
+        """(Re)index every result file in the directory, e.g. results saved before the catalog existed."""
+        count = 0
+        for path in _result_files(self.results_dir.glob("*.json")):
+            try:
+                doc = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if "run_id" in doc:
+                self.record(doc, path)
+                count += 1
+        return count
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30)
+        db.row_factory = sqlite3.Row
+        return db
+
+
+def _result_files(paths: Iterable[Path]) -> Iterable[Path]:
+    # Index files of in-flight streaming runs are not results.
+    return (p for p in paths if not p.name.endswith(".index.json"))
+
+
+def _sample_count(result: Dict[str, Any]) -> Optional[int]:
+    if "streaming" in result:
+        return int(result["streaming"]["samples_seen"])
+    # Recovered runs are indexed before their arrays are attached to the result.
+    if "recovered" in result:
+        return int(result["recovered"]["samples"])
+    # Synchronized runs hold one column per ammeter on a shared time base.
+    key = "timestamps_epoch" if "synchronized" in result else "measurements"
+    measurements = (result.get("data") or {}).get(key)
+    return len(measurements) if measurements is not None else None
+
+
+def _number(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) else None
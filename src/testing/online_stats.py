@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+class P2Quantile:
+    """
+    Streaming estimate of a single quantile with the P-square algorithm
+    (Jain & Chlamtac, 1985): five markers, O(1) memory and time per update.
+    """
+
+    __slots__ = ("p", "_heights", "_positions", "_desired", "_increments")
+
+    def __init__(self, p: float):
+        if not 0.0 < p < 1.0:
+            raise ValueError("p must be between 0 and 1")
+        self.p = p
+        self._heights: List[float] = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1.0, 1.0 + 2 * p, 1.0 + 4 * p, 3.0 + 2 * p, 5.0]
+        self._increments = [0.0, p / 2, p, (1.0 + p) / 2, 1.0]
+
+    def update(self, x: float) -> None:
+        q = self._heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        n = self._positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Nudge the three middle markers towards their desired positions.
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                candidate = self._parabolic(i, step)
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = candidate
+                n[i] += step
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self._heights, self._positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> float:
+        if not self._heights:
+            raise ValueError("No observations")
+        if len(self._heights) < 5 or self._positions[4] <= 5:
+            # Still exact: fall back to the same interpolation as numpy.percentile.
+            return float(np.percentile(self._heights, self.p * 100))
+        return self._heights[2]
+
+
+class OnlineStats:
+    """
+    Constant-memory running statistics: Welford mean/variance, min/max and
+    P-square estimates of the median and tail percentiles. summary() returns
+    the same keys as AmmeterTestFramework._summarize().
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._quantiles = [P2Quantile(p) for p in self.QUANTILES]
+
+    def update(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        for q in self._quantiles:
+            q.update(x)
+
+    def update_many(self, values: Sequence[float]) -> None:
+        """Fold in a block of values at once (Chan et al. parallel variance merge)."""
+        values = np.asarray(values, dtype=np.float64)
+        n_b = len(values)
+        if n_b == 0:
+            return
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self._m2 += m2_b + delta * delta * self.count * n_b / n
+        self.count = n
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        for x in values.tolist():
+            for q in self._quantiles:
+                q.update(x)
+
+    @property
+    def variance(self) -> float:
+        """Population variance, matching numpy's default ddof=0."""
+        return self._m2 / self.count if self.count else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        if self.count == 0:
+            raise ValueError("No measurements collected")
+
+        p50, p95, p99 = (q.value() for q in self._quantiles)
+        return {
+            "mean": float(self.mean),
+            "median": float(p50),
+            "std": math.sqrt(self.variance),
+            "min": float(self.min),
+            "max": float(self.max),
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+        }
@@ -0,0 +1,133 @@
+"""
+Plots of run results that stay fast for any run length.
+
+A figure can only show about one value range per horizontal pixel, so each
+series is reduced with min/max-per-pixel decimation before it reaches
+matplotlib: the samples are split into one bucket per pixel column and only
+every bucket's minimum and maximum are drawn, in time order. Spikes survive,
+and matplotlib draws at most two points per pixel whatever the run length.
+Decimation reads the arrays in bounded blocks, so results memory-mapped by
+load_run() (or the part file of a run still being written) are plotted
+without loading them into memory.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
+
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
+
+from src.testing.result_writer import RunSource, load_run
+
+FIGSIZE = (6.4, 4.8)
+DPI = 100
+# Rows of buckets decimated per block; bounds memory for memory-mapped inputs.
+BLOCK_SAMPLES = 1 << 20
+
+# A plottable run, see load_run().
+Source = RunSource
+
+
+def decimate_minmax(t: np.ndarray, y: np.ndarray, buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Keep the minimum and maximum sample of each of `buckets` equal-count
+    buckets, in time order (at most 2 * buckets points). Short series are
+    returned unchanged.
+    """
+    n = len(y)
+    if len(t) != n:
+        raise ValueError("t and y must have the same length")
+    if buckets <= 0:
+        raise ValueError("buckets must be > 0")
+    if n <= 2 * buckets:
+        return np.asarray(t, dtype=np.float64), np.asarray(y, dtype=np.float64)
+
+    size = n // buckets
+    full = buckets * size
+    rows_per_block = max(1, BLOCK_SAMPLES // size)
+    keep = np.empty(2 * buckets + 2, dtype=np.int64)
+    filled = 0
+
+    for row in range(0, buckets, rows_per_block):
+        rows = min(rows_per_block, buckets - row)
+        start = row * size
+        block = np.asarray(y[start:start + rows * size], dtype=np.float64).reshape(rows, size)
+        base = start + np.arange(rows) * size
+        lo = base + block.argmin(axis=1)
+        hi = base + block.argmax(axis=1)
+        pairs = np.sort(np.stack([lo, hi], axis=1), axis=1).ravel()
+        keep[filled:filled + len(pairs)] = pairs
+        filled += len(pairs)
+
+    # The n % buckets leftover samples form one short extra bucket.
+    if full < n:
+        tail = np.asarray(y[full:], dtype=np.float64)
+        keep[filled:filled + 2] = sorted((full + int(tail.argmin()), full + int(tail.argmax())))
+        filled += 2
+
+    index = keep[:filled]
+    return np.asarray(t[index], dtype=np.float64), np.asarray(y[index], dtype=np.float64)
+
+
+def plot_run(
+    ax: Axes,
+    source: Source,
+    *,
+    label: Optional[str] = None,
+    buckets: Optional[int] = None,
+    t0: Optional[float] = None,
+):
+    """
+    Draw one run on `ax` against seconds since `t0` (default: its first sample).
+    `buckets` defaults to the axes' width in pixels.
+    """
+    run = load_run(source)
+    return _draw(ax, run, label if label is not None else run.get("ammeter_type"), buckets, t0)
+
+
+def plot_single(source: Source, out_path: Union[str, Path]) -> Path:
+    """Plot current over time for one run and save it as an image."""
+    fig = Figure(figsize=FIGSIZE, dpi=DPI)
+    ax = fig.add_subplot()
+    run = load_run(source)
+    _draw(ax, run, run.get("ammeter_type"))
+    ax.set_title(f"Current over time ({run.get('ammeter_type', '?')})")
+    ax.set_xlabel("Time (seconds)")
+    ax.set_ylabel("Current (A)")
+    fig.tight_layout()
+    fig.savefig(out_path)
+    return Path(out_path)
+
+
+def plot_comparison(sources: Mapping[str, Source], out_path: Union[str, Path]) -> Path:
+    """Plot several runs on one set of axes, each against its own start time."""
+    fig = Figure(figsize=FIGSIZE, dpi=DPI)
+    ax = fig.add_subplot()
+    for label, source in sources.items():
+        plot_run(ax, source, label=label)
+    ax.set_title("Current over time – comparison")
+    ax.set_xlabel("Time (seconds)")
+    ax.set_ylabel("Current (A)")
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(out_path)
+    return Path(out_path)
+
+
+def _draw(
+    ax: Axes,
+    run: Dict[str, Any],
+    label: Optional[str],
+    buckets: Optional[int] = None,
+    t0: Optional[float] = None,
+):
+    t, y = run["data"]["timestamps_epoch"], run["data"]["measurements"]
+    if buckets is None:
+        buckets = max(1, int(ax.get_window_extent().width))
+    if t0 is None:
+        t0 = float(t[0]) if len(t) else 0.0
+    t, y = decimate_minmax(t, y, buckets)
+    # Normalize after decimating: only the kept points are touched.
+    return ax.plot(t - t0, y, linewidth=0.8, label=label)
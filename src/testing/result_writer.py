@@ -0,0 +1,265 @@
+"""
+Crash-safe, append-only result writer for long runs.
+
+While a run is sampling, (measurement, timestamp) pairs are buffered in a
+small chunk and appended to `<run_id>.samples.part` every
+`flush_interval_seconds` (or whenever the chunk fills up). After each flush
+the part file is fsync'ed and `<run_id>.index.json` is atomically replaced
+with the number of samples durably on disk. A crash or Ctrl-C therefore
+loses at most one flush interval, and recover_run() (or a writer opened with
+resume=True) can pick the run up from the index.
+
+finalize() turns the part file into the regular "npy" result format of
+src.testing.results_io, so finished runs look the same however they were
+written.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from src.testing.buffers import SampleBuffer, StreamingBuffer
+from src.testing.catalog import CATALOG_FILE, ResultCatalog
+from src.testing.online_stats import OnlineStats
+from src.testing.results_io import load_result, save_npy, to_json
+
+RECORD_DTYPE = np.dtype([("measurement", "<f8"), ("timestamp", "<f8")])
+DEFAULT_CHUNK_SAMPLES = 65536
+COPY_CHUNK_SAMPLES = 1 << 20
+
+PART_SUFFIX = ".samples.part"
+INDEX_SUFFIX = ".index.json"
+
+# A run to read back: a result dict, a saved result file (.json / .meta.json),
+# or the .index.json of a run still being streamed to disk.
+RunSource = Union[Dict[str, Any], str, Path]
+
+
+class StreamingResultWriter:
+    """
+    Sample sink that tees every sample into `buffer` (which still produces the
+    in-memory result and stats) and into an append-only part file on disk.
+    It exposes the same append/extend/arrays interface as the buffers.
+    """
+
+    def __init__(
+        self,
+        results_dir: Union[str, Path],
+        run_id: str,
+        buffer: Union[SampleBuffer, StreamingBuffer],
+        *,
+        flush_interval_seconds: float = 1.0,
+        chunk_samples: int = DEFAULT_CHUNK_SAMPLES,
+        meta: Optional[Dict[str, Any]] = None,
+        resume: bool = False,
+    ):
+        if flush_interval_seconds <= 0:
+            raise ValueError("flush_interval_seconds must be > 0")
+        if chunk_samples <= 0:
+            raise ValueError("chunk_samples must be > 0")
+
+        self.results_dir = Path(results_dir)
+        self.run_id = run_id
+        self.buffer = buffer
+        self.flush_interval_seconds = flush_interval_seconds
+        self.meta = dict(meta or {})
+
+        self.part_path = self.results_dir / f"{run_id}{PART_SUFFIX}"
+        self.index_path = self.results_dir / f"{run_id}{INDEX_SUFFIX}"
+
+        self.samples_on_disk = 0
+        self.chunks = 0
+        if resume and self.index_path.exists():
+            index = read_index(self.results_dir, run_id)
+            self.samples_on_disk = int(index["samples"])
+            self.chunks = int(index["chunks"])
+            self.meta = {**index.get("meta", {}), **self.meta}
+            self._file = open(self.part_path, "r+b")
+            # Anything past the indexed size is a torn write from the crash.
+            self._file.truncate(self.samples_on_disk * RECORD_DTYPE.itemsize)
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self._file = open(self.part_path, "wb")
+
+        self._chunk = np.empty(chunk_samples, dtype=RECORD_DTYPE)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._write_index("running")
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def append(self, value: float, timestamp: float) -> None:
+        self.buffer.append(value, timestamp)
+        self._chunk[self._pending] = (value, timestamp)
+        self._pending += 1
+        if self._flush_due():
+            self.flush()
+
+    def extend(self, values: np.ndarray, timestamps: np.ndarray) -> None:
+        self.buffer.extend(values, timestamps)
+        n = len(values)
+        if n <= len(self._chunk) - self._pending:
+            staged = self._chunk[self._pending:self._pending + n]
+            staged["measurement"] = values
+            staged["timestamp"] = timestamps
+            self._pending += n
+            if self._flush_due():
+                self.flush()
+            return
+
+        # The batch overflows the chunk: write the chunk and the batch, then sync once.
+        records = np.empty(n, dtype=RECORD_DTYPE)
+        records["measurement"] = values
+        records["timestamp"] = timestamps
+        self._write_pending()
+        self._file.write(records.tobytes())
+        self.samples_on_disk += n
+        self._sync("running")
+        self._last_flush = time.monotonic()
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.buffer.arrays()
+
+    def flush(self) -> None:
+        """Append buffered samples to the part file, fsync it and advance the index."""
+        if self._pending:
+            self._write_pending()
+            self._sync("running")
+        self._last_flush = time.monotonic()
+
+    def abort(self) -> None:
+        """Flush what we have and leave the run recoverable (used on errors / Ctrl-C)."""
+        if self._file.closed:
+            return
+        self.flush()
+        self._write_index("interrupted")
+        self._file.close()
+
+    def finalize(self, result: Dict[str, Any]) -> Path:
+        """
+        Flush, convert the part file into `<run_id>.<name>.npy` arrays and write
+        the `<run_id>.meta.json` sidecar for `result`. Returns the sidecar path.
+        """
+        self.flush()
+        self._file.close()
+        return _finalize_part(self.results_dir, self.run_id, self.samples_on_disk, result)
+
+    def _flush_due(self) -> bool:
+        return self._pending == len(self._chunk) or time.monotonic() - self._last_flush >= self.flush_interval_seconds
+
+    def _write_pending(self) -> None:
+        self._file.write(self._chunk[:self._pending].tobytes())
+        self.samples_on_disk += self._pending
+        self._pending = 0
+
+    def _sync(self, status: str) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.chunks += 1
+        self._write_index(status)
+
+    def _write_index(self, status: str) -> None:
+        index = {
+            "run_id": self.run_id,
+            "status": status,
+            "samples": self.samples_on_disk,
+            "chunks": self.chunks,
+            "record_dtype": RECORD_DTYPE.descr,
+            "updated_at_epoch": time.time(),
+            "meta": self.meta,
+        }
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        tmp.write_text(json.dumps(index, default=to_json), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+
+def read_index(results_dir: Union[str, Path], run_id: str) -> Dict[str, Any]:
+    path = Path(results_dir) / f"{run_id}{INDEX_SUFFIX}"
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def load_run(source: RunSource) -> Dict[str, Any]:
+    """
+    Result dict of a source, with its arrays memory-mapped when it is on disk.
+    For a run still being written, data holds the samples flushed so far.
+    """
+    if isinstance(source, dict):
+        return source
+
+    path = Path(source)
+    if not path.name.endswith(INDEX_SUFFIX):
+        return load_result(path)
+
+    run_id = path.name[:-len(INDEX_SUFFIX)]
+    index = read_index(path.parent, run_id)
+    samples = int(index["samples"])
+    if samples:
+        part = np.memmap(path.parent / f"{run_id}{PART_SUFFIX}", dtype=RECORD_DTYPE, mode="r", shape=(samples,))
+        data = {"measurements": part["measurement"], "timestamps_epoch": part["timestamp"]}
+    else:
+        data = {"measurements": np.empty(0), "timestamps_epoch": np.empty(0)}
+    return {"run_id": run_id, **index.get("meta", {}), "data": data}
+
+
+def recover_run(results_dir: Union[str, Path], run_id: str) -> Path:
+    """
+    Finalize a run that never finished (crash, Ctrl-C) from its index and part
+    file. Stats are recomputed from the samples that made it to disk, chunk by
+    chunk, so the run is never read into memory whole (percentiles are therefore
+    the P-square estimates of streaming runs). A run interrupted before its
+    first flush is finalized empty, with empty stats.
+    """
+    results_dir = Path(results_dir)
+    index = read_index(results_dir, run_id)
+    samples = int(index["samples"])
+    stats = OnlineStats()
+    if samples:
+        part = np.memmap(results_dir / f"{run_id}{PART_SUFFIX}", dtype=RECORD_DTYPE, mode="r", shape=(samples,))
+        for start in range(0, samples, COPY_CHUNK_SAMPLES):
+            stats.update_many(part["measurement"][start:start + COPY_CHUNK_SAMPLES])
+        del part
+
+    result = {
+        "run_id": run_id,
+        **index.get("meta", {}),
+        "data": {},
+        "stats": stats.summary() if samples else {},
+        "recovered": {"status": index["status"], "samples": samples},
+    }
+    meta_path = _finalize_part(results_dir, run_id, samples, result)
+    if (results_dir / CATALOG_FILE).exists():
+        ResultCatalog(results_dir).record(result, meta_path)
+    return meta_path
+
+
+def _finalize_part(results_dir: Path, run_id: str, samples: int, result: Dict[str, Any]) -> Path:
+    part_path = results_dir / f"{run_id}{PART_SUFFIX}"
+    part = np.memmap(part_path, dtype=RECORD_DTYPE, mode="r", shape=(samples,)) if samples else \
+        np.empty(0, dtype=RECORD_DTYPE)
+
+    # Copy each column out in bounded chunks so finalizing never needs the whole run in RAM.
+    for name, field in (("measurements", "measurement"), ("timestamps_epoch", "timestamp")):
+        tmp = results_dir / f"{run_id}.{name}.npy.tmp"
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float64, shape=(samples,))
+        for start in range(0, samples, COPY_CHUNK_SAMPLES):
+            stop = min(start + COPY_CHUNK_SAMPLES, samples)
+            out[start:stop] = part[field][start:stop]
+        out.flush()
+        del out
+        os.replace(tmp, results_dir / f"{run_id}.{name}.npy")
+    del part
+
+    meta_path = save_npy(result, results_dir, written_arrays={
+        "measurements": f"{run_id}.measurements.npy",
+        "timestamps_epoch": f"{run_id}.timestamps_epoch.npy",
+    })
+
+    part_path.unlink(missing_ok=True)
+    (results_dir / f"{run_id}{INDEX_SUFFIX}").unlink(missing_ok=True)
+    return meta_path
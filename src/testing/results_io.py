@@ -0,0 +1,111 @@
+"""
+Reading and writing run results.
+
+Two on-disk formats are supported:
+
+- "json": the whole result in one `<run_id>.json` file (the original format).
+- "npy": every array in result["data"] goes to its own `<run_id>.<name>.npy`
+  file, and everything else goes to a small `<run_id>.meta.json` sidecar.
+  load_result() memory-maps the arrays, so opening a multi-million-sample
+  run costs almost nothing until the data is actually touched.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+RESULT_FORMATS = ("json", "npy")
+META_SUFFIX = ".meta.json"
+
+PathLike = Union[str, Path]
+
+
+def save_result(result: Dict[str, Any], results_dir: PathLike, result_format: str = "json") -> Path:
+    """Write `result` in the given format; returns the file to pass to load_result()."""
+    if result_format == "json":
+        return save_json(result, results_dir)
+    if result_format == "npy":
+        return save_npy(result, results_dir)
+    raise ValueError(f"Unknown result format {result_format!r}. Expected one of {', '.join(RESULT_FORMATS)}")
+
+
+def save_json(result: Dict[str, Any], results_dir: PathLike) -> Path:
+    out_file = Path(results_dir) / f"{result['run_id']}.json"
+    _write_text_atomic(out_file, json.dumps(result, indent=2, default=to_json))
+    return out_file
+
+
+def save_npy(
+    result: Dict[str, Any],
+    results_dir: PathLike,
+    written_arrays: Optional[Dict[str, str]] = None,
+) -> Path:
+    """
+    `written_arrays` maps data names to .npy files already present in
+    `results_dir` (e.g. produced by the streaming writer); they take precedence
+    over same-named arrays in result["data"], which are then not written.
+    """
+    results_dir = Path(results_dir)
+    run_id = result["run_id"]
+
+    arrays: Dict[str, str] = dict(written_arrays or {})
+    meta_data: Dict[str, Any] = {"format": "npy", "arrays": arrays}
+    for name, value in result["data"].items():
+        if name in arrays:
+            continue
+        if isinstance(value, (np.ndarray, list, tuple)):
+            file_name = f"{run_id}.{name}.npy"
+            tmp = results_dir / (file_name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, np.asarray(value, dtype=np.float64))
+            os.replace(tmp, results_dir / file_name)
+            arrays[name] = file_name
+        else:
+            meta_data[name] = value
+
+    meta = {**result, "data": meta_data}
+    out_file = results_dir / f"{run_id}{META_SUFFIX}"
+    # The sidecar goes last, so a readable sidecar implies its arrays are complete.
+    _write_text_atomic(out_file, json.dumps(meta, indent=2, default=to_json))
+    return out_file
+
+
+def load_result(path: PathLike, mmap: bool = True) -> Dict[str, Any]:
+    """
+    Load a result saved in either format. Arrays come back as float64 NumPy
+    arrays, read-only memory maps for the "npy" format when `mmap` is True.
+    """
+    path = Path(path)
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    data = doc.get("data", {})
+
+    if data.get("format") == "npy":
+        loaded = {k: v for k, v in data.items() if k not in ("format", "arrays")}
+        for name, file_name in data["arrays"].items():
+            loaded[name] = np.load(path.parent / file_name, mmap_mode="r" if mmap else None)
+        doc["data"] = loaded
+        return doc
+
+    for name, value in data.items():
+        if isinstance(value, list):
+            data[name] = np.asarray(value, dtype=np.float64)
+    return doc
+
+
+def to_json(obj: Any) -> Any:
+    """json.dumps hook for the NumPy arrays and scalars held in results."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _write_text_atomic(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
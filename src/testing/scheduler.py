@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from array import array
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Any, Iterator, List
+
+
+OVERRUN_POLICIES = ("catch_up", "skip", "record")
+
+# Sleep until this close to a deadline, then busy-wait the rest: OS sleeps
+# routinely overshoot by tens of microseconds (and by milliseconds on Windows).
+DEFAULT_SPIN_THRESHOLD_NS = 1_500_000
+
+
+@dataclass(frozen=True)
+class Tick:
+    index: int
+    deadline_ns: int
+    fired_ns: int
+
+    @property
+    def jitter_ns(self) -> int:
+        return self.fired_ns - self.deadline_ns
+
+
+class SampleScheduler:
+    """
+    Fixed-rate tick source for time-based sampling.
+
+    Tick k is due at start + k * period on time.perf_counter_ns(), so timing
+    error never accumulates from one sample to the next. A run has exactly
+    floor(duration * frequency) ticks.
+
+    When a sample overruns and later ticks are already overdue, the
+    overrun_policy decides what happens to them:
+    - "catch_up": fire them immediately, back to back, until on schedule again
+      (the target sample count is always reached)
+    - "skip": silently drop them and continue with the next tick that is due
+    - "record": drop them like "skip", but keep their indices in `missed`
+      (only counted without keep_jitter, so streaming runs stay constant-memory)
+    """
+
+    def __init__(
+        self,
+        frequency_hz: float,
+        duration_seconds: float,
+        *,
+        overrun_policy: str = "record",
+        spin_threshold_ns: int = DEFAULT_SPIN_THRESHOLD_NS,
+        keep_jitter: bool = True,
+    ):
+        if frequency_hz <= 0:
+            raise ValueError("frequency_hz must be > 0")
+        if duration_seconds <= 0:
+            raise ValueError("duration_seconds must be > 0")
+        if overrun_policy not in OVERRUN_POLICIES:
+            raise ValueError(f"Unknown overrun_policy={overrun_policy!r}. Expected one of {', '.join(OVERRUN_POLICIES)}")
+        if spin_threshold_ns < 0:
+            raise ValueError("spin_threshold_ns must be >= 0")
+
+        self.period_ns = max(1, round(1e9 / frequency_hz))
+        # The epsilon keeps e.g. 2.3 s * 10 Hz (= 22.999999999999996) at 23 ticks.
+        self.total_ticks = max(1, math.floor(duration_seconds * frequency_hz + 1e-9))
+        self.overrun_policy = overrun_policy
+        self.spin_threshold_ns = spin_threshold_ns
+        # Without keep_jitter only running counts/sum/max are tracked (constant memory):
+        # no per-tick jitter and no missed tick indices.
+        self.keep_jitter = keep_jitter
+
+        # Compact int64 storage: long high-rate runs record one entry per sample.
+        self.jitter_ns = array("q")
+        self.missed: List[int] = []
+        self.skipped = 0
+        self.start_ns = 0
+        self._fired = 0
+        self._jitter_sum_ns = 0
+        self._jitter_max_ns = 0
+
+    def ticks(self) -> Iterator[Tick]:
+        """Block until each tick is due and yield it."""
+        self._reset()
+        index = 0
+        while index < self.total_ticks:
+            index = self._next_due(index, time.perf_counter_ns())
+            if index >= self.total_ticks:
+                break
+            deadline = self.deadline_ns(index)
+            self._wait_until(deadline)
+            yield self._fire(index, deadline)
+            index += 1
+
+    async def aticks(self) -> AsyncIterator[Tick]:
+        """
+        Asyncio version of ticks(). It only sleeps (never spins) so other
+        tasks keep running; expect event-loop timer resolution (~1 ms) jitter.
+        """
+        self._reset()
+        index = 0
+        while index < self.total_ticks:
+            index = self._next_due(index, time.perf_counter_ns())
+            if index >= self.total_ticks:
+                break
+            deadline = self.deadline_ns(index)
+            remaining = deadline - time.perf_counter_ns()
+            if remaining > 0:
+                await asyncio.sleep(remaining / 1e9)
+            yield self._fire(index, deadline)
+            index += 1
+
+    def deadline_ns(self, index: int) -> int:
+        return self.start_ns + index * self.period_ns
+
+    def report(self) -> Dict[str, Any]:
+        """Summary for the run result."""
+        return {
+            "overrun_policy": self.overrun_policy,
+            "period_seconds": self.period_ns / 1e9,
+            "target_samples": self.total_ticks,
+            "fired_samples": self._fired,
+            "missed_samples": len(self.missed) + self.skipped,
+            **({"missed_ticks": list(self.missed)} if self.keep_jitter else {}),
+            "jitter_mean_seconds": (self._jitter_sum_ns / self._fired / 1e9) if self._fired else 0.0,
+            "jitter_max_seconds": self._jitter_max_ns / 1e9,
+        }
+
+    def _reset(self) -> None:
+        self.jitter_ns = array("q")
+        self.missed = []
+        self.skipped = 0
+        self._fired = 0
+        self._jitter_sum_ns = 0
+        self._jitter_max_ns = 0
+        self.start_ns = time.perf_counter_ns()
+
+    def _next_due(self, index: int, now_ns: int) -> int:
+        """Apply the overrun policy: return the index of the next tick to fire."""
+        if self.overrun_policy == "catch_up":
+            return index
+        # Latest tick whose deadline has already passed; everything before it is dropped.
+        latest_due = (now_ns - self.start_ns) // self.period_ns
+        if latest_due <= index:
+            return index
+        latest_due = min(latest_due, self.total_ticks)
+        if self.overrun_policy == "record" and self.keep_jitter:
+            self.missed.extend(range(index, latest_due))
+        else:
+            self.skipped += latest_due - index
+        return latest_due
+
+    def _wait_until(self, deadline_ns: int) -> None:
+        remaining = deadline_ns - time.perf_counter_ns()
+        if remaining > self.spin_threshold_ns:
+            time.sleep((remaining - self.spin_threshold_ns) / 1e9)
+        while time.perf_counter_ns() < deadline_ns:
+            pass
+
+    def _fire(self, index: int, deadline_ns: int) -> Tick:
+        tick = Tick(index=index, deadline_ns=deadline_ns, fired_ns=time.perf_counter_ns())
+        jitter = tick.jitter_ns
+        self._fired += 1
+        self._jitter_sum_ns += jitter
+        if jitter > self._jitter_max_ns:
+            self._jitter_max_ns = jitter
+        if self.keep_jitter:
+            self.jitter_ns.append(jitter)
+        return tick
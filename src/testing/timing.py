@@ -0,0 +1,193 @@
+"""
+Per-request timing of a run.
+
+For every request the framework records, on time.perf_counter_ns():
+
+- when the request started and when the response came back,
+- the scheduler deadline it was meant to meet (time-based runs),
+- the connect / send / recv breakdown, when the measurement function reports
+  one (the socket clients in Ammeters.client do, see PhaseTimes).
+
+Each quantity is folded into a fixed log-bucketed LatencyHistogram, so the
+summary costs constant memory however long the run is; buffered runs also keep
+the raw per-request values as arrays for the result's `data`.
+"""
+from __future__ import annotations
+
+import time
+from array import array
+from typing import Any, ContextManager, Dict, Optional
+
+import numpy as np
+
+from Ammeters.client import PHASES, PhaseTimes, capture_phases
+
+# Bucket edges: [0, 1us) then 20 log-spaced buckets per decade from 1us to 100s.
+BUCKETS_PER_DECADE = 20
+EDGES_NS = np.concatenate(([0.0], np.logspace(3, 11, 8 * BUCKETS_PER_DECADE + 1)))
+PENDING_CHUNK = 4096
+# Marks a missing value in the per-request columns (NaN in the result arrays).
+MISSING = -(2 ** 63)
+TIMING_PERCENTILES = (50, 90, 99)
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed histogram of durations in nanoseconds. Values are buffered and
+    binned in vectorized chunks; percentiles are interpolated inside buckets
+    (within 12% of the true value at 20 buckets per decade).
+    """
+
+    __slots__ = ("counts", "count", "sum_ns", "min_ns", "max_ns", "_pending")
+
+    def __init__(self):
+        self.counts = np.zeros(len(EDGES_NS) - 1, dtype=np.int64)
+        self.count = 0
+        self.sum_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+        self._pending = array("q")
+
+    def add(self, ns: int) -> None:
+        self._pending.append(ns)
+        if len(self._pending) >= PENDING_CHUNK:
+            self._flush()
+
+    def quantile(self, q: float) -> float:
+        """Approximate q-quantile (0..1) in nanoseconds."""
+        self._flush()
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = np.cumsum(self.counts)
+        i = int(np.searchsorted(cumulative, rank, side="left"))
+        i = min(i, len(self.counts) - 1)
+        below = cumulative[i] - self.counts[i]
+        fraction = (rank - below) / self.counts[i] if self.counts[i] else 0.0
+        low, high = EDGES_NS[i], EDGES_NS[i + 1]
+        value = low + (high - low) * fraction
+        return float(min(max(value, self.min_ns), self.max_ns))
+
+    def summary(self) -> Dict[str, Any]:
+        self._flush()
+        if not self.count:
+            return {"count": 0}
+        nonzero = np.flatnonzero(self.counts)
+        first, last = int(nonzero[0]), int(nonzero[-1])
+        return {
+            "count": self.count,
+            "mean_seconds": self.sum_ns / self.count / 1e9,
+            "min_seconds": self.min_ns / 1e9,
+            "max_seconds": self.max_ns / 1e9,
+            **{f"p{p}_seconds": self.quantile(p / 100) / 1e9 for p in TIMING_PERCENTILES},
+            # Only the occupied range of buckets, to keep saved results small.
+            "histogram": {
+                "edges_seconds": (EDGES_NS[first:last + 2] / 1e9).tolist(),
+                "counts": self.counts[first:last + 1].tolist(),
+            },
+        }
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._fold(np.frombuffer(self._pending, dtype=np.int64))
+            self._pending = array("q")
+
+    def _fold(self, ns: np.ndarray) -> None:
+        ns = ns[ns >= 0]
+        if not len(ns):
+            return
+        # Anything past the last edge lands in the last bucket (np.histogram's last bucket is closed).
+        self.counts += np.histogram(np.minimum(ns, EDGES_NS[-1]), EDGES_NS)[0]
+        low, high = int(ns.min()), int(ns.max())
+        self.min_ns = low if not self.count else min(self.min_ns, low)
+        self.max_ns = max(self.max_ns, high)
+        self.count += len(ns)
+        self.sum_ns += int(ns.sum())
+
+
+class RequestTimer:
+    """
+    Timing sink for one run. Requests made inside capture() report their
+    connect/send/recv breakdown into `phases`, which record() reads back.
+
+    Also maps perf_counter_ns() readings onto the epoch (anchored when the
+    timer is created, or shared with the timer passed as `origin`), which is
+    how the framework timestamps samples.
+    """
+
+    def __init__(self, keep_samples: bool = True, origin: Optional["RequestTimer"] = None):
+        self.keep_samples = keep_samples
+        self.phases = PhaseTimes()
+        if origin is not None:
+            self.origin_epoch, self.origin_ns = origin.origin_epoch, origin.origin_ns
+        else:
+            self.origin_epoch = time.time()
+            self.origin_ns = time.perf_counter_ns()
+        self.latency = LatencyHistogram()
+        self.scheduler_lag = LatencyHistogram()
+        self.phase_histograms = {name: LatencyHistogram() for name in PHASES}
+        self._start = array("q")
+        self._end = array("q")
+        self._deadline = array("q")
+        self._phase_ns = {name: array("q") for name in PHASES}
+
+    def capture(self) -> ContextManager[PhaseTimes]:
+        return capture_phases(self.phases)
+
+    def to_epoch(self, ns: int) -> float:
+        return self.origin_epoch + (ns - self.origin_ns) / 1e9
+
+    def record(self, start_ns: int, end_ns: int, deadline_ns: Optional[int] = None) -> None:
+        """Record one request; phase durations are taken from self.phases."""
+        self.latency.add(end_ns - start_ns)
+        if deadline_ns is not None:
+            self.scheduler_lag.add(start_ns - deadline_ns)
+        phases = self.phases
+        connect_ns, send_ns, recv_ns = phases.connect_ns, phases.send_ns, phases.recv_ns
+        phases.reset()
+        if recv_ns >= 0:
+            self.phase_histograms["connect"].add(connect_ns)
+            self.phase_histograms["send"].add(send_ns)
+            self.phase_histograms["recv"].add(recv_ns)
+
+        if self.keep_samples:
+            self._start.append(start_ns - self.origin_ns)
+            self._end.append(end_ns - self.origin_ns)
+            self._deadline.append(deadline_ns - self.origin_ns if deadline_ns is not None else MISSING)
+            self._phase_ns["connect"].append(connect_ns if connect_ns >= 0 else MISSING)
+            self._phase_ns["send"].append(send_ns if send_ns >= 0 else MISSING)
+            self._phase_ns["recv"].append(recv_ns if recv_ns >= 0 else MISSING)
+
+    def stats(self) -> Dict[str, Any]:
+        """Histogram summaries for result["stats"]["latency"]."""
+        stats = {"request": self.latency.summary()}
+        for name, histogram in (("scheduler_lag", self.scheduler_lag), *self.phase_histograms.items()):
+            summary = histogram.summary()
+            if summary["count"]:
+                stats[name] = summary
+        return stats
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Per-request arrays for result["data"], in seconds: start/response/deadline
+        are offsets from `origin_epoch`, phases are durations. Missing values are NaN.
+        """
+        if not self.keep_samples:
+            return {}
+        data = {
+            "request_start_seconds": _seconds(self._start),
+            "response_seconds": _seconds(self._end),
+        }
+        # Optional columns are only included when at least one request had them.
+        for name, values in (("deadline", self._deadline), *self._phase_ns.items()):
+            column = _seconds(values)
+            if not np.isnan(column).all():
+                data[f"{name}_seconds"] = column
+        return data
+
+
+def _seconds(ns: array) -> np.ndarray:
+    raw = np.frombuffer(ns, dtype=np.int64) if len(ns) else np.empty(0, dtype=np.int64)
+    out = raw / 1e9
+    out[raw == MISSING] = np.nan
+    return out
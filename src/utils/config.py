@@ -1,9 +1,208 @@
+"""
+Config loading.
+
+get_config() parses config.yaml once into a typed Config (ammeter specs with
+their command already encoded, sampling/streaming/scheduler/result defaults)
+and caches it per file, keyed on the file's mtime and size: calling it again
+costs one stat() and returns the same object until the file changes, when it
+is re-parsed. Long-running services can therefore hot-reload simply by
+calling get_config() again (AmmeterTestFramework does so per run with
+hot_reload=True).
+
+Config objects are shared between callers and must be treated as read-only;
+load_config() returns a private copy of the raw YAML dict.
+"""
+from __future__ import annotations
+
+import copy
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
+
 import yaml
-from typing import Dict
+
+from src.testing.results_io import RESULT_FORMATS
+from src.testing.scheduler import OVERRUN_POLICIES
+
+
+@dataclass(frozen=True, slots=True)
+class AmmeterSpec:
+    name: str
+    port: int
+    command: str
+    # `command` encoded once, as sent on the wire.
+    command_bytes: bytes
+    # Emulator class as "package.module:ClassName" (see Ammeters.registry); None = by name.
+    driver: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class SamplingDefaults:
+    measurements_count: Optional[int]
+    total_duration_seconds: Optional[float]
+    sampling_frequency_hz: Optional[float]
+    batch_size: Optional[int]
+
+
+@dataclass(frozen=True, slots=True)
+class AnalysisSettings:
+    # Names of the cross-run metrics to compute (see src.testing.analysis); empty = all.
+    statistical_metrics: Tuple[str, ...]
+    reference: Optional[str]
+    outlier_threshold: float
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    path: str
+    # (st_mtime_ns, st_size) of the file this was parsed from.
+    version: Tuple[int, int]
+    raw: Dict[str, Any]
+    ammeters: Dict[str, AmmeterSpec]
+    sampling: SamplingDefaults
+    keep_samples: int
+    overrun_policy: Optional[str]
+    spin_threshold_us: Optional[float]
+    result_format: str
+    catalog: bool
+    flush_interval_seconds: Optional[float]
+    analysis: AnalysisSettings
+
+    def ammeter(self, name: str) -> AmmeterSpec:
+        try:
+            return self.ammeters[name]
+        except KeyError:
+            available = ", ".join(sorted(self.ammeters))
+            raise KeyError(f"Unknown ammeter_type={name!r}. Available: {available}") from None
+
+
+_cache: Dict[str, Config] = {}
+_cache_lock = threading.Lock()
+
+
+def get_config(config_path: Union[str, Path] = "config/config.yaml") -> Config:
+    """
+    Cached, validated config for `config_path`; re-parsed only when the file
+    changed since the last call. Raises ValueError for an invalid file.
+    """
+    key = os.path.abspath(config_path)
+    st = os.stat(key)
+    version = (st.st_mtime_ns, st.st_size)
+    cached = _cache.get(key)
+    if cached is not None and cached.version == version:
+        return cached
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached.version == version:
+            return cached
+        with open(key, "r", encoding="utf-8") as f:
+            try:
+                raw = yaml.safe_load(f) or {}
+            except yaml.YAMLError as e:
+                raise ValueError(f"{key}: {e}") from e
+        config = parse_config(raw, path=key, version=version)
+        _cache[key] = config
+        return config
+
+
+def clear_config_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
 
 def load_config(config_path: str) -> Dict:
     """
     טעינת קובץ הקונפיגורציה
     """
-    with open(config_path, 'r') as f:
-        return yaml.safe_load(f)
+    return copy.deepcopy(get_config(config_path).raw)
+
+
+def parse_config(raw: Mapping[str, Any], path: str = "<config>", version: Tuple[int, int] = (0, 0)) -> Config:
+    """Build a Config from an already-loaded YAML document."""
+    if not isinstance(raw, Mapping):
+        raise ValueError(f"{path}: expected a mapping at the top level")
+
+    ammeters_cfg = _section(raw, "ammeters", path)
+    ammeters = {name: _ammeter_spec(name, cfg, path) for name, cfg in ammeters_cfg.items()}
+
+    testing = _section(raw, "testing", path)
+    sampling_cfg = _section(testing, "sampling", path, "testing.")
+    sampling = SamplingDefaults(
+        measurements_count=_number(sampling_cfg, "measurements_count", int, path, "testing.sampling."),
+        total_duration_seconds=_number(sampling_cfg, "total_duration_seconds", float, path, "testing.sampling."),
+        sampling_frequency_hz=_number(sampling_cfg, "sampling_frequency_hz", float, path, "testing.sampling."),
+        batch_size=_number(sampling_cfg, "batch_size", int, path, "testing.sampling."),
+    )
+    streaming_cfg = _section(testing, "streaming", path, "testing.")
+    scheduler_cfg = _section(testing, "scheduler", path, "testing.")
+    results_cfg = _section(raw, "result_management", path)
+    analysis_cfg = _section(raw, "analysis", path)
+    metrics = analysis_cfg.get("statistical_metrics") or ()
+    if isinstance(metrics, str):
+        metrics = (metrics,)
+    if not all(isinstance(m, str) for m in metrics):
+        raise ValueError(f"{path}: analysis.statistical_metrics must be a list of metric names")
+    outlier_threshold = _number(analysis_cfg, "outlier_threshold", float, path, "analysis.")
+
+    return Config(
+        path=path,
+        version=version,
+        raw=dict(raw),
+        ammeters=ammeters,
+        sampling=sampling,
+        keep_samples=_number(streaming_cfg, "keep_samples", int, path, "testing.streaming.") or 0,
+        overrun_policy=_choice(scheduler_cfg, "overrun_policy", OVERRUN_POLICIES, path, "testing.scheduler."),
+        spin_threshold_us=_number(scheduler_cfg, "spin_threshold_us", float, path, "testing.scheduler."),
+        result_format=_choice(results_cfg, "format", RESULT_FORMATS, path, "result_management.") or "json",
+        catalog=bool(results_cfg.get("catalog", True)),
+        flush_interval_seconds=_number(results_cfg, "flush_interval_seconds", float, path, "result_management."),
+        analysis=AnalysisSettings(
+            statistical_metrics=tuple(metrics),
+            reference=analysis_cfg.get("reference"),
+            outlier_threshold=outlier_threshold if outlier_threshold is not None else 3.5,
+        ),
+    )
+
+
+def _ammeter_spec(name: str, cfg: Any, path: str) -> AmmeterSpec:
+    if not isinstance(cfg, Mapping):
+        raise ValueError(f"{path}: ammeters.{name} must be a mapping")
+    port = _number(cfg, "port", int, path, f"ammeters.{name}.")
+    if port is None or not 0 <= port <= 65535:
+        raise ValueError(f"{path}: ammeters.{name}.port must be an integer in 0..65535")
+    command = cfg.get("command")
+    if isinstance(command, bytes):
+        command = command.decode("utf-8")
+    if not isinstance(command, str) or not command:
+        raise ValueError(f"{path}: ammeters.{name}.command must be a non-empty string")
+    driver = cfg.get("driver")
+    if driver is not None and (not isinstance(driver, str) or ":" not in driver):
+        raise ValueError(f"{path}: ammeters.{name}.driver must look like 'package.module:ClassName'")
+    return AmmeterSpec(name=name, port=port, command=command, command_bytes=command.encode("utf-8"), driver=driver)
+
+
+def _section(parent: Mapping[str, Any], name: str, path: str, prefix: str = "") -> Mapping[str, Any]:
+    # Missing and empty (null) sections both read as {}.
+    value = parent.get(name) or {}
+    if not isinstance(value, Mapping):
+        raise ValueError(f"{path}: {prefix}{name} must be a mapping")
+    return value
+
+
+def _number(section: Mapping[str, Any], name: str, kind: type, path: str, prefix: str = ""):
+    value = section.get(name)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or (kind is int and value != int(value)):
+        raise ValueError(f"{path}: {prefix}{name} must be {'an integer' if kind is int else 'a number'}, got {value!r}")
+    return kind(value)
+
+
+def _choice(section: Mapping[str, Any], name: str, choices: Tuple[str, ...], path: str, prefix: str = ""):
+    value = section.get(name)
+    if value is not None and value not in choices:
+        raise ValueError(f"{path}: {prefix}{name} must be one of {', '.join(choices)}, got {value!r}")
+    return value
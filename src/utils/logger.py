@@ -1,6 +1,9 @@
 import logging
+import logging.handlers
 import os
+import queue
 from datetime import datetime
+from typing import Any, Dict, Optional
 
 class TestLogger:
     def __init__(self, test_name: str):
@@ -35,4 +38,36 @@ class TestLogger:
         self.logger.debug(message)
 
     def warning(self, message: str):
-        self.logger.warning(message) 
\ No newline at end of file
+        self.logger.warning(message)
+
+
+def configure_emulator_logging(
+    config: Optional[Dict[str, Any]] = None,
+    handler: Optional[logging.Handler] = None,
+) -> logging.handlers.QueueListener:
+    """
+    Route the emulators' logs (the "Ammeters" logger tree) through a queue.
+
+    The emulator threads only enqueue records; formatting and console/file I/O
+    happen on the QueueListener's own thread, so a slow terminal never stalls
+    a server loop. The level comes from emulators.logging.level (default
+    WARNING). Call .stop() on the returned listener to flush it on shutdown.
+    """
+    logging_cfg = ((config or {}).get("emulators") or {}).get("logging") or {}
+    level = str(logging_cfg.get("level") or "WARNING").upper()
+
+    if handler is None:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s"))
+
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    emulator_logger = logging.getLogger("Ammeters")
+    for old in [h for h in emulator_logger.handlers if isinstance(h, logging.handlers.QueueHandler)]:
+        emulator_logger.removeHandler(old)
+    emulator_logger.addHandler(logging.handlers.QueueHandler(records))
+    emulator_logger.setLevel(level)
+    emulator_logger.propagate = False
+
+    listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    return listener